@@ -21,6 +21,18 @@ class Materials(BaseModel):
                           min_length=5, max_length=50)
     department: int = Field(title="Departments", gt=5, le=20)
 
+    model_config = {
+        "json_schema_extra" : {
+            "examples" : [
+                {
+                    "sub" : "Compiler Design",
+                    "syllabus" : "Lexical Analysis, Parsing, Code Generation",
+                    "department" : 10
+                }
+            ]
+        }
+    }
+
 @app.put("/books/{book_id}")
 async def get_books(book_id: int,
                     details: Materials):
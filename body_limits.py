@@ -0,0 +1,221 @@
+"""Body Limits¶
+Nothing stops a client from sending a 200 MB body to update_item or create_item (body_nested_models.py), or to
+get_body_handlers (handling_errors.py): FastAPI reads all of it, and decodes all of it, before the validation
+fails. A JSON body nested thousands of levels deep, or with an array of millions of items, is also fully decoded
+before anything looks at it.
+
+BodyLimitMiddleware checks the body while it's being received, and stops as soon as a limit is crossed,
+without reading (or buffering) the rest:
+
+max_body_size: a Content-Length bigger than that gives a 413 before anything is read, and so does a body
+(e.g. sent with Transfer-Encoding: chunked) that turns out to be bigger than that.
+max_depth: JSON objects and arrays nested deeper than that give a 422.
+max_array_length: a JSON array with more items than that gives a 422 (at least 1).
+
+The JSON limits only apply to bodies sent as JSON. They're checked with a small scanner that follows the
+nesting of the body chunk by chunk, without decoding it (in about a third of the time json.loads takes on the
+same body). The 422 is a RequestValidationError, so the app renders it like any other validation error, with
+its own handler if it has one (see handling_errors.py), or else as:
+
+{"detail": [{"type": "too_long", "loc": ["body"], "msg": "List should have at most 1000 items", ...}]}
+
+The limits apply to the whole app, and a path operation can change some of them with @body_limits(...),
+e.g. to accept bigger bodies, or turn one off with None:
+
+add_body_limits(app, max_body_size=1024 * 1024, max_depth=32, max_array_length=10_000)
+
+@app.post("/arbitdict/")
+@body_limits(max_body_size=64 * 1024 * 1024)
+async def any_values(weights: dict[int, float]):
+    ..."""
+
+import dataclasses
+import re
+from dataclasses import dataclass
+
+from fastapi import FastAPI, HTTPException
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from content_types import is_json_request
+
+
+@dataclass(frozen=True)
+class BodyLimits:
+    max_body_size: int | None = None
+    max_depth: int | None = None
+    max_array_length: int | None = None
+
+    def __post_init__(self):
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            # Arrays are measured by their commas, so an empty array can't be told from one with one item.
+            if value is not None and value < 1:
+                raise ValueError(f"{field.name} must be at least 1, or None for no limit")
+
+    @property
+    def checks_json(self) -> bool:
+        return self.max_depth is not None or self.max_array_length is not None
+
+
+def body_limits(**limits):
+    """Change some of the app limits for one path operation."""
+    fields = {field.name for field in dataclasses.fields(BodyLimits)}
+    if not limits.keys() <= fields:
+        raise TypeError(f"Unknown body limits: {', '.join(sorted(limits.keys() - fields))}")
+    BodyLimits(**limits)  # fail now on invalid values, not on the first request
+
+    def decorator(endpoint):
+        endpoint.body_limits = limits
+        return endpoint
+
+    return decorator
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"The body can't be bigger than {limit} bytes")
+
+
+class BodyShapeError(RequestValidationError, StarletteHTTPException):
+    """A body that crosses max_depth or max_array_length. Handled as the RequestValidationError it is. It's also an
+    HTTPException only because FastAPI raises those again as they are when they come from reading the body, and
+    turns any other error into a 400."""
+
+    def __init__(self, errors: list[dict]):
+        RequestValidationError.__init__(self, errors)
+        StarletteHTTPException.__init__(self, status_code=422, detail=errors)
+
+
+def _invalid(type_: str, msg: str, ctx: dict) -> BodyShapeError:
+    return BodyShapeError([{"type": type_, "loc": ("body",), "msg": msg, "input": None, "ctx": ctx}])
+
+
+# Escaped characters, like \" in a string, removed first so that the strings can be split on their quotes.
+_ESCAPE = re.compile(rb"\\.", re.DOTALL)
+_NOT_STRUCTURE = bytes(byte for byte in range(256) if byte not in b'[]{},"')
+# Objects and arrays with nothing nested in them, once only the structure is left, e.g. {,,} or [,].
+_INNERMOST = re.compile(rb"\{,*\}|\[,*\]")
+_TOKEN = re.compile(rb"[\[{]|[\]}]|,+")
+_OBJECT = -1
+
+
+class JsonShapeChecker:
+    """Follows the nesting of a JSON document received in chunks, without decoding it."""
+
+    def __init__(self, max_depth: int | None = None, max_array_length: int | None = None):
+        self.max_depth = max_depth
+        self.max_array_length = max_array_length
+        # An array of more than max_array_length items, with nothing nested left in it.
+        self.long_array = re.compile(rb"\[,{%d,}\]" % max_array_length) if max_array_length is not None else None
+        # One entry per open object (_OBJECT) or array (the number of commas seen in it so far).
+        self.stack: list[int] = []
+        self.in_string = False
+        self.carry = b""  # a backslash at the end of the previous chunk
+
+    def feed(self, chunk: bytes) -> None:
+        data = self.carry + chunk
+        self.carry = b""
+        if b"\\" in data:
+            data = _ESCAPE.sub(b"", data)
+            if data.endswith(b"\\"):
+                data, self.carry = data[:-1], b"\\"
+        # Every other part between quotes is in a string: only the structure outside them is kept.
+        parts = data.translate(None, _NOT_STRUCTURE).split(b'"')
+        outside = parts[1::2] if self.in_string else parts[0::2]
+        if len(parts) % 2 == 0:
+            self.in_string = not self.in_string
+        self.check(b"".join(outside))
+
+    def check(self, structure: bytes) -> None:
+        # The objects and arrays that start and end in this chunk are removed, innermost first, one level at
+        # a time, by regular expressions, instead of being followed token by token. Their commas are left in
+        # place of them, and the arrays are checked before they're removed.
+        remainder, levels = structure, 0
+        while True:
+            if self.long_array is not None and self.long_array.search(remainder):
+                raise self.too_long()
+            reduced = _INNERMOST.sub(b"", remainder)
+            if len(reduced) == len(remainder):
+                break
+            remainder, levels = reduced, levels + 1
+        if self.max_depth is not None and len(self.stack) + remainder.count(b"[") + remainder.count(b"{") + levels > self.max_depth:
+            # Maybe too deep: follow the whole chunk to know
+            self.walk(structure)
+        else:
+            self.walk(remainder)
+
+    def walk(self, structure: bytes) -> None:
+        stack, max_depth, max_array_length = self.stack, self.max_depth, self.max_array_length
+        for token in _TOKEN.findall(structure):
+            first = token[0]
+            if first == 44:  # a run of commas
+                if stack and stack[-1] >= 0:
+                    stack[-1] += len(token)
+                    if max_array_length is not None and stack[-1] >= max_array_length:
+                        raise self.too_long()
+            elif first == 91 or first == 123:  # [ or {
+                stack.append(0 if first == 91 else _OBJECT)
+                if max_depth is not None and len(stack) > max_depth:
+                    raise _invalid("json_too_deep", f"JSON can't be nested more than {max_depth} levels deep",
+                                   {"max_depth": max_depth})
+            elif stack:
+                stack.pop()
+
+    def too_long(self) -> BodyShapeError:
+        return _invalid("too_long", f"List should have at most {self.max_array_length} items",
+                        {"field_type": "List", "max_length": self.max_array_length})
+
+
+class BodyLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: BodyLimits = BodyLimits()):
+        self.app = app
+        self.limits = limits
+        self.route_limits: dict[object, BodyLimits] = {}
+
+    def limits_for(self, scope: Scope) -> BodyLimits:
+        # The router stores the matched route in the scope, before the path operation reads the body.
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        overrides = getattr(endpoint, "body_limits", None)
+        if not overrides:
+            return self.limits
+        limits = self.route_limits.get(endpoint)
+        if limits is None:
+            limits = self.route_limits[endpoint] = dataclasses.replace(self.limits, **overrides)
+        return limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limits = checker = None
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal limits, checker, received
+            if limits is None:
+                limits = self.limits_for(scope)
+                headers = dict(scope["headers"])
+                content_length = headers.get(b"content-length", b"")
+                if limits.max_body_size is not None and content_length.isdigit() and int(content_length) > limits.max_body_size:
+                    raise _too_large(limits.max_body_size)
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if limits.checks_json and is_json_request(content_type):
+                    checker = JsonShapeChecker(limits.max_depth, limits.max_array_length)
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if limits.max_body_size is not None and received > limits.max_body_size:
+                    raise _too_large(limits.max_body_size)
+                if checker is not None and body:
+                    checker.feed(body)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def add_body_limits(app: FastAPI, max_body_size: int | None = None, max_depth: int | None = None,
+                    max_array_length: int | None = None) -> None:
+    """Limit the size and the shape of the bodies of every path operation of the app."""
+    app.add_middleware(BodyLimitMiddleware, limits=BodyLimits(max_body_size, max_depth, max_array_length))
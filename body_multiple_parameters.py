@@ -19,6 +19,8 @@ class Items(BaseModel):
     item_id: int
     item_name: str | None = None
 
+    model_config = {"json_schema_extra" : {"examples" : [{"item_id" : 6, "item_name" : "Gugan"}]}}
+
 @app.put("/multiparams/{params_id}")
 async def get_params(params_id: Annotated[str, Path(title="Multiple Parameters",
                                                     description="This is a multi parameter model",
@@ -46,6 +48,8 @@ class UserDetails(BaseModel):
     emp_id: int
     name: str | None = None
 
+    model_config = {"json_schema_extra" : {"examples" : [{"emp_id" : 1, "name" : "Arun"}]}}
+
 @app.put("/users/{user_id}")
 async def user_details(user_id: int, item: Items, user: UserDetails):
     results = {"User ID" : user_id, "Item Details" : item, "Users" : user}
@@ -67,3 +71,18 @@ async def get_albums(album_id: int, item_id: Items, user_id: UserDetails, import
     results = {"Album Details" : album_id, "Item Details" : item_id, "User Details" : user_id, "Importance" : importance}
     return results
 
+"""Each of these body parameters is validated separately, after the whole body has been decoded into dicts.
+EmbeddedBody (see combined_body.py) validates the same body, with the same errors, in a single pass. It only
+saves the validation itself (a few microseconds), not a measurable share of the whole request, and the docs
+show its request body inline instead of with references to the models:"""
+
+from fastapi import Depends
+from combined_body import EmbeddedBody
+
+album_body = EmbeddedBody("get_combined_albums", item_id=Items, user_id=UserDetails, importance=str)
+
+@app.put("/albums/{album_id}/combined", openapi_extra=album_body.openapi_extra)
+async def get_combined_albums(album_id: int, body: Annotated[album_body.model, Depends(album_body)]):
+    results = {"Album Details" : album_id, "Item Details" : body.item_id, "User Details" : body.user_id, "Importance" : body.importance}
+    return results
+
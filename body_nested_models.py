@@ -1,9 +1,15 @@
 from fastapi import FastAPI
 from pydantic import BaseModel, HttpUrl
 from typing import Annotated
+from interning import InternedTag
+from body_limits import add_body_limits, body_limits
 
 app = FastAPI()
 
+# Bodies bigger than 1 MB, nested more than 32 levels deep, or with arrays of more than 10,000 items, are rejected
+# while they're being received (see body_limits.py). Some of the path operations below raise these limits.
+add_body_limits(app, max_body_size=1024 * 1024, max_depth=32, max_array_length=10_000)
+
 @app.get("/")
 async def get_root():
     return {"message" : "Hello Body Nested Models"}
@@ -96,7 +102,7 @@ class Item(BaseModel):
     description: str | None = None
     price: float
     tax: float
-    tags: set[str] = set()
+    tags: set[InternedTag] = set()
     image: Image | None = None
 
 @app.put("/items/{item_id}")
@@ -104,7 +110,10 @@ async def update_item(item_id: str, item: Item):
     results = {"Item_ID" : item_id, "Item Details" : item}
     return results
 
-"""Special types and validation¶
+"""InternedTag is a str shared between all the items with the same tag (see interning.py), so a large catalog
+doesn't keep a copy of each tag for every item.
+
+Special types and validation¶
 Apart from normal singular types like str, int, float, etc. you can use more complex singular types that inherit from str.
 
 For example, as in the Image model we have a url field, we can declare it to be an instance of Pydantic's HttpUrl instead of a str:"""
@@ -118,7 +127,7 @@ class ModItem(BaseModel):
     description: str | None = None
     price: float
     tax: float
-    tags: set[str] = set()
+    tags: set[InternedTag] = set()
     image: ModImage | None = None
 
 @app.put("/moditems/{item_id}")
@@ -134,7 +143,7 @@ class SModItem(BaseModel):
     description: str | None = None
     price: float
     tax: float
-    tags: set[str] = set()
+    tags: set[InternedTag] = set()
     image: list[ModImage] | None = None
 
 @app.put("/Smoditems/{item_id}")
@@ -219,6 +228,30 @@ class Offer(BaseModel):
     description: str | None = None
     items : list[TModItem]
 
+    model_config = {
+        "json_schema_extra" : {
+            "examples" : [
+                {
+                    "name" : "SevalKodiVeeran",
+                    "description" : "Yaamiruka Bayam Yen",
+                    "items" : [
+                        {
+                            "name" : "Shanmugar",
+                            "description" : "Murugar Padai Veedu",
+                            "price" : 389.99,
+                            "tax" : 18.4,
+                            "tags" : ["Velan", "Senthuran", "Rawoothar"],
+                            "image" : [
+                                {"url" : "https://instagram.com/", "name" : "Instagram"},
+                                {"url" : "https://facebook.com/", "name" : "FaceBook"}
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+    }
+
 @app.post("/order/")
 async def create_item(offer : Offer):
     return offer
@@ -402,6 +435,42 @@ Response Body:
   ]
 }"""
 
+"""Cached URL validation¶
+When the same image URLs come back in most offers, their validation can be cached: CachedHttpUrl is an HttpUrl
+whose validation goes through a process-wide LRU cache (see url_cache.py). It's opt-in, only the models that
+declare it use the cache:"""
+
+from url_cache import CachedHttpUrl
+
+class CachedTModImage(TModImage):
+    url : CachedHttpUrl
+
+class CachedTModItem(TModItem):
+    image: list[CachedTModImage] | None = None
+
+class CachedOffer(Offer):
+    items : list[CachedTModItem]
+
+@app.post("/order/cached/")
+async def create_cached_item(offer : CachedOffer):
+    return offer
+
+"""Lazy nested models¶
+When the handler only reads a few top-level fields of a large offer, LazyList (see lazy_models.py) validates
+the items on first use instead of before the handler runs. Invalid items still give a 422, with the same errors:"""
+
+from lazy_models import LazyList, LazyModel
+
+class LazyOffer(LazyModel):
+    name: str
+    description: str | None = None
+    items : LazyList[TModItem]
+
+@app.post("/order/lazy/")
+@body_limits(max_body_size=16 * 1024 * 1024, max_array_length=100_000)
+async def create_lazy_item(offer : LazyOffer):
+    return {"Offer" : offer.name, "Items" : len(offer.items)}
+
 
 """Bodies of pure lists¶
 If the top level value of the JSON body you expect is a JSON array (a Python list),
@@ -448,6 +517,41 @@ Response Body:
 ]
 """
 
+"""Streaming bodies of lists¶
+For very big lists, StreamedBody (see streaming_ingest.py) validates each image while the body is being received,
+and gives them to the path operation as an async iterator, so the whole list never has to be in memory.
+The body can be the same JSON array, or NDJSON (one image per line) with Content-Type: application/x-ndjson"""
+
+from collections.abc import AsyncIterator
+from fastapi import Depends
+from streaming_ingest import StreamedBody
+
+image_stream = StreamedBody(ModImage)
+
+# The records are limited one by one, by max_record_size
+@app.post("/images/stream/", openapi_extra=image_stream.openapi_extra)
+@body_limits(max_body_size=None, max_array_length=None)
+async def stream_images(images: Annotated[AsyncIterator[ModImage], Depends(image_stream)]):
+    count, hosts = 0, set()
+    async for image in images:
+        count += 1
+        hosts.add(image.url.host)
+    return {"Images": count, "Hosts": sorted(hosts)}
+
+"""Request Body (NDJSON):
+{"url": "https://facebook.com/", "name": "Facebook"}
+{"url": "https://Twitter.com/", "name": "X"}
+
+Response Body:
+{
+  "Images": 2,
+  "Hosts": [
+    "facebook.com",
+    "twitter.com"
+  ]
+}
+"""
+
 """Bodies of arbitrary dicts¶
 You can also declare a body as a dict with keys of some type and values of some other type.
 
@@ -462,6 +566,7 @@ That's what we are going to see here.
 In this case, you would accept any dict as long as it has int keys with float values:"""
 
 @app.post("/arbitdict/")
+@body_limits(max_body_size=64 * 1024 * 1024)
 async def any_values(weights: dict[int, float]):
     return weights
 
@@ -483,4 +588,14 @@ Response Body:
   "5270": 45.38,
   "7892": 121.7
 }
-"""
\ No newline at end of file
+"""
+"""Columnar bodies of dicts¶
+With millions of entries, every key and value becomes a Python object. weights_body (see columnar_weights.py)
+parses the same body straight into two NumPy arrays, and ColumnarResponse renders them back to the same JSON:"""
+
+from columnar_weights import ColumnarResponse, Weights, weights_body, weights_openapi_extra
+
+@app.post("/arbitdict/columnar/", response_class=ColumnarResponse, openapi_extra=weights_openapi_extra)
+@body_limits(max_body_size=64 * 1024 * 1024)
+async def columnar_values(weights: Annotated[Weights, Depends(weights_body)]):
+    return ColumnarResponse(weights)
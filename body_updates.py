@@ -1,6 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
+from compiled_encoder import compiled_jsonable_encoder
 from pydantic import BaseModel
+from typing import Annotated
+from versioned_store import VersionedStore, not_modified
 
 app = FastAPI()
 
@@ -23,7 +26,10 @@ class Items(BaseModel):
     tags: list[str] | None = []
 
 
-things = {
+"""The items are kept in a VersionedStore (see versioned_store.py): every item has a version and an ETag, GET answers
+If-None-Match with a 304, and writes with an If-Match that isn't the current ETag get a 412."""
+
+things = VersionedStore({
     "Murugan" : {
         "name" : "Murugan",
         "description" : "God Of War",
@@ -42,17 +48,24 @@ things = {
         "tax" : 6.66666,
         "tags" : ["Shanmugar", "JayanthiNathar", "Thirucheeralaivai Murugan"]
     }
-}
+})
 
 @app.get("/details/{id}", response_model=Items)
-async def updates(id: str):
-    return things[id]
+async def updates(id: str, response: Response, if_none_match: Annotated[str | None, Header()] = None):
+    snapshot = things.snapshot(id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not_modified(snapshot, if_none_match):
+        return Response(status_code=304, headers={"ETag": snapshot.etag})
+    response.headers["ETag"] = snapshot.etag
+    return snapshot.data
 
 @app.put("/conversions/{id}", response_model=Items)
-async def get_conversions(id: str, my_item: Items):
-    json_conversion = jsonable_encoder(my_item)
-    things[id] = json_conversion
-    return things
+async def get_conversions(id: str, my_item: Items, response: Response, if_match: Annotated[str | None, Header()] = None):
+    json_conversion = compiled_jsonable_encoder(my_item)  # same as jsonable_encoder, see compiled_encoder.py
+    snapshot = things.put(id, json_conversion, if_match=if_match)
+    response.headers["ETag"] = snapshot.etag
+    return snapshot.data
 
 """Using Pydantic's exclude_unset parameter¶
 If you want to receive partial updates, it's very useful to use the parameter exclude_unset in Pydantic's model's .model_dump().
@@ -75,6 +88,26 @@ async def get_items(item_id: str, item: Items) -> Items:
     return update_model
 
 
+"""That validates and copies the whole stored item twice, whatever the size of the update. PartialUpdate
+(see partial_update.py) validates only the fields that are sent, and makes the new version of the stored item
+from the previous one and those fields, sharing all the values that didn't change. It's served with PATCH,
+the method for partial updates:"""
+
+from fastapi import Depends
+from partial_update import PartialUpdate
+
+item_updates = PartialUpdate(Items, things)
+
+@app.patch("/items/{item_id}", response_model=Items, openapi_extra=item_updates.openapi_extra)
+async def update_items(item_id: str, changes: Annotated[dict, Depends(item_updates.changes)], response: Response,
+                    if_match: Annotated[str | None, Header()] = None):
+    if if_match is None and item_id not in things:
+        raise HTTPException(status_code=404, detail="Item not found")
+    snapshot = item_updates.update(item_id, changes, if_match=if_match)
+    response.headers["ETag"] = snapshot.etag
+    return snapshot.data
+
+
 """Using Pydantic's update parameter¶
 Now, you can create a copy of the existing model using .model_copy(), and pass the update parameter with a dict containing the data to update.
 
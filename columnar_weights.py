@@ -0,0 +1,196 @@
+"""Columnar Bodies¶
+A body declared as weights: dict[int, float] (see /arbitdict/ in body_nested_models.py) is decoded into a dict of
+str keys, then validated into a new dict with a Python int and a Python float for each entry, and encoded back to
+JSON one entry at a time. With millions of entries, that's millions of Python objects, in memory all at once.
+
+weights_body is a dependency that parses the same body straight into a Weights: two contiguous NumPy arrays,
+keys (int64) and values (float64). The work is done by a few calls that each go over the whole body in C:
+
+A regular expression checks that the body is a JSON object of "int": number entries.
+NumPy parses all the keys and values at once (keys with up to 15 digits are exact as floats), and they are split
+into the two arrays.
+
+and the checks (key ranges, duplicated keys, finite values) are vectorized. Returned in a ColumnarResponse, a
+Weights is rendered back to the same JSON object, from the arrays.
+
+Any body the fast path doesn't handle (invalid JSON, keys like "1e3", quoted values, NaN, duplicated keys, ...)
+goes through the same decoding and Pydantic validation as dict[int, float], so the result and the errors
+(with the same loc) are the same as with /arbitdict/. The only difference: keys have to fit in an int64.
+
+To use it, first install NumPy:
+$ pip install numpy
+
+Command to run the memory and latency comparison with the dict path:
+python columnar_weights.py --benchmark"""
+
+import asyncio
+import json
+import re
+import sys
+import time
+import tracemalloc
+from typing import Annotated
+
+import numpy as np
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import Field, TypeAdapter, ValidationError
+from starlette.responses import Response
+
+from content_types import is_json_request
+
+_NUMBER = rb"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?"
+# Keys with up to 15 digits are exact in a float64.
+_ENTRY = rb'\s*"-?\d{1,15}"\s*:\s*' + _NUMBER + rb"\s*"
+_OBJECT = re.compile(rb"\s*\{(?:" + _ENTRY + rb"(?:," + _ENTRY + rb")*+|\s*)\}\s*")
+# Turns the object into a flat list of numbers: key,value,key,value
+_FLATTEN = bytes.maketrans(b":", b",")
+
+# Like dict[int, float], but the keys have to fit in the int64 array.
+_ADAPTER = TypeAdapter(dict[Annotated[int, Field(ge=-2**63, le=2**63 - 1)], float])
+
+
+class Weights:
+    """A dict[int, float] stored as two NumPy arrays."""
+
+    __slots__ = ("keys", "values")
+    block_size = 65536
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray):
+        self.keys = keys
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_dict(cls, weights: dict[int, float]) -> "Weights":
+        return cls(np.fromiter(weights.keys(), np.int64, len(weights)), np.fromiter(weights.values(), np.float64, len(weights)))
+
+    def to_dict(self) -> dict[int, float]:
+        return dict(zip(self.keys.tolist(), self.values.tolist()))
+
+    def render(self) -> bytes:
+        """The JSON object, like json.dumps(self.to_dict()) without the spaces."""
+        if not len(self):
+            return b"{}"
+        if not np.isfinite(self.values).all():
+            raise ValueError("Out of range float values are not JSON compliant")  # like JSONResponse
+        # NumPy writes floats with the same shortest repr as Python. The entries are rendered in
+        # blocks, so the temporary fixed-width strings stay small.
+        chunks = []
+        for start in range(0, len(self), self.block_size):
+            keys = self.keys[start:start + self.block_size].astype("S20")
+            values = self.values[start:start + self.block_size].astype("S32")
+            entries = np.strings.add(np.strings.add(b'"', keys), np.strings.add(b'":', np.strings.add(values, b",")))
+            # The fixed-width strings are padded with NUL bytes, which never appear in the entries.
+            chunks.append(entries.tobytes().replace(b"\x00", b""))
+        chunks[-1] = chunks[-1][:-1]
+        return b"{" + b"".join(chunks) + b"}"
+
+
+def _fast_parse(body: bytes) -> Weights | None:
+    if not _OBJECT.fullmatch(body):
+        return None
+    count = body.count(b":")
+    if not count:
+        return Weights(np.empty(0, np.int64), np.empty(0, np.float64))
+    numbers = np.fromstring(body.translate(_FLATTEN, b'"{}'), dtype=np.float64, sep=",")
+    if len(numbers) != 2 * count:
+        return None
+    keys, values = numbers[0::2].astype(np.int64), numbers[1::2].copy()
+    if not np.isfinite(values).all():
+        return None
+    ordered = np.sort(keys)
+    if (ordered[1:] == ordered[:-1]).any():
+        return None  # the last value wins in a dict, let the slow path deal with it
+    return Weights(keys, values)
+
+
+def parse_weights(body: bytes) -> Weights:
+    weights = _fast_parse(body)
+    if weights is not None:
+        return weights
+    # Same decoding and validation as FastAPI for a dict[int, float] body.
+    if not body:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    try:
+        decoded = json.loads(body)
+    except json.JSONDecodeError as exc:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", exc.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": exc.msg}}]
+        ) from None
+    return Weights.from_dict(_validate(decoded))
+
+
+def _validate(decoded) -> dict[int, float]:
+    try:
+        return _ADAPTER.validate_python(decoded)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+        ) from None
+
+
+async def weights_body(request: Request) -> Weights:
+    body = await request.body()
+    # Like FastAPI: other bodies are validated as they are, and rejected.
+    if not is_json_request(request.headers.get("content-type")):
+        _validate(body)
+    return parse_weights(body)
+
+
+# The path operation doesn't declare the body itself, so it's documented here.
+weights_openapi_extra = {"requestBody": {"required": True, "content": {"application/json": {
+    "schema": {"type": "object", "additionalProperties": {"type": "number"}, "title": "Weights"},
+}}}}
+
+
+class ColumnarResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Weights) -> bytes:
+        return content.render()
+
+
+"""Benchmark¶
+Sends the same body with a million entries to /arbitdict/ (the dict path) and /arbitdict/columnar/ in
+body_nested_models.py, and measures the latency and the peak memory allocated while handling it."""
+
+
+async def _measure(app, request, rounds: int) -> tuple[float, int, bytes]:
+    from load_benchmark import asgi_request
+
+    await asgi_request(app, request)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        status, body = await asgi_request(app, request)
+    latency = (time.perf_counter() - start) / rounds
+    tracemalloc.start()
+    await asgi_request(app, request)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return latency, peak, body
+
+
+def benchmark_weights(entries: int = 1_000_000, rounds: int = 3) -> list[dict]:
+    from body_nested_models import app
+    from load_benchmark import GeneratedRequest
+
+    rng = np.random.default_rng(0)
+    weights = dict(zip(rng.choice(10 * entries, entries, replace=False).tolist(), rng.random(entries).tolist()))
+    body = json.dumps(weights).encode("utf-8")
+    results, bodies = [], []
+    for name, path in (("dict[int, float]", "/arbitdict/"), ("columnar", "/arbitdict/columnar/")):
+        request = GeneratedRequest("POST", path, [], [(b"content-type", b"application/json")], body)
+        latency, peak, response = asyncio.run(_measure(app, request, rounds))
+        bodies.append(json.loads(response))
+        results.append({"path": name, "latency_ms": latency * 1000, "peak_mb": peak / 1e6})
+    assert bodies[0] == bodies[1], "Both paths must return the same JSON"
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'path':<18} {'latency ms':>11} {'peak MB':>8}   (1,000,000 entries)")
+    for row in benchmark_weights():
+        print(f"{row['path']:<18} {row['latency_ms']:>11.0f} {row['peak_mb']:>8.0f}")
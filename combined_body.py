@@ -0,0 +1,128 @@
+"""Combined Bodies¶
+With several body parameters, like item_id: Items, user_id: UserDetails and importance: Annotated[str, Body()]
+in get_albums (see body_multiple_parameters.py), FastAPI expects them embedded in one JSON object:
+
+{
+    "item_id": {"item_id": 6, "item_name": "Gugan"},
+    "user_id": {"emp_id": 1, "name": "Arun"},
+    "importance": "high"
+}
+
+It decodes the whole body into Python dicts and lists first, then validates each parameter separately.
+
+EmbeddedBody builds, once, a Pydantic model with one field per parameter, and validates the raw body with it, in a
+single pass over the JSON, without the intermediate dicts. Used as a dependency, it gives that model to the path
+operation:
+
+album_body = EmbeddedBody("get_combined_albums", item_id=Items, user_id=UserDetails, importance=str)
+
+@app.put("/albums/{album_id}/combined", openapi_extra=album_body.openapi_extra)
+async def get_combined_albums(album_id: int, body: Annotated[album_body.model, Depends(album_body)]):
+    body.item_id, body.user_id, body.importance
+
+A parameter with a default value is declared as a tuple, like item=(Items | None, None).
+
+Valid bodies are validated in that single pass. Invalid ones are validated again the way FastAPI does it, so the errors
+are the same as with the separate body parameters, with the same loc, like ["body", "item_id", "item_id"].
+That includes FastAPI's own rules: a null value counts as a missing one, and a body that isn't a JSON object
+(or isn't sent as JSON) is missing all its parameters. The openapi_extra documents the same request body."""
+
+import json
+from typing import Annotated, Any
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BeforeValidator, TypeAdapter, ValidationError, create_model
+from pydantic_core import PydanticCustomError, PydanticUndefined
+
+from content_types import is_json_request
+
+
+def _null_as_missing(default: Any):
+    # FastAPI treats a null body parameter like a missing one.
+    def validate(value: Any) -> Any:
+        if value is not None:
+            return value
+        if default is PydanticUndefined:
+            raise PydanticCustomError("missing", "Field required")
+        return default
+
+    return BeforeValidator(validate)
+
+
+def _accepts_null(annotation: Any) -> bool:
+    try:
+        TypeAdapter(annotation).validate_python(None)
+    except ValidationError:
+        return False
+    return True
+
+
+def _inline_refs(schema: Any, definitions: dict) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        return {key: _inline_refs(value, definitions) for key, value in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(value, definitions) for value in schema]
+    return schema
+
+
+class EmbeddedBody:
+    def __init__(self, name: str, **parameters: Any):
+        fields = {}
+        for parameter, declaration in parameters.items():
+            annotation, default = declaration if isinstance(declaration, tuple) else (declaration, PydanticUndefined)
+            # A null is rejected anyway by the types that don't accept it, and then handled in validate_python().
+            # The others need a validator, unless the default is None, which gives the same result.
+            if default is not None and _accepts_null(annotation):
+                annotation = Annotated[annotation, _null_as_missing(default)]
+            fields[parameter] = (annotation, ... if default is PydanticUndefined else default)
+        self.model = create_model(f"Body_{name}", **fields)
+        self.required = [parameter for parameter, field in self.model.model_fields.items() if field.is_required()]
+        schema = self.model.model_json_schema()
+        self.openapi_extra = {"requestBody": {"required": bool(self.required), "content": {
+            "application/json": {"schema": _inline_refs(schema, schema.get("$defs", {}))},
+        }}}
+
+    async def __call__(self, request: Request):
+        body = await request.body()
+        if not body or not is_json_request(request.headers.get("content-type")):
+            return self.validate_python({})
+        try:
+            return self.model.model_validate_json(body)
+        except ValidationError:
+            pass
+        # Invalid bodies are validated again like FastAPI does (decoded, then validated as Python objects),
+        # as some errors differ between the two, like the type of a list given for a model.
+        return self.validate_decoded(body)
+
+    def validate_python(self, value: dict):
+        # Null parameters are left out, so they are reported as missing, or get their default value.
+        value = {key: item for key, item in value.items() if item is not None}
+        try:
+            return self.model.model_validate(value, from_attributes=True)
+        except ValidationError as exc:
+            raise RequestValidationError([self.error(error) for error in exc.errors(include_url=False)]) from None
+
+    def validate_decoded(self, body: bytes):
+        try:
+            decoded = json.loads(body)
+        except json.JSONDecodeError as exc:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", exc.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": exc.msg}}]
+            ) from None
+        if decoded is None:
+            return self.validate_python({})
+        if isinstance(decoded, dict):
+            return self.validate_python(decoded)
+        # A list or a single value: every parameter is missing, even the ones with a default.
+        raise RequestValidationError(
+            [{"type": "missing", "loc": ("body", parameter), "msg": "Field required", "input": None} for parameter in self.model.model_fields]
+        )
+
+    def error(self, error: dict) -> dict:
+        if error["type"] == "missing" and len(error["loc"]) == 1:
+            error["input"] = None
+        error["loc"] = ("body", *error["loc"])
+        return error
@@ -0,0 +1,168 @@
+"""Compiled Encoder¶
+jsonable_encoder(item) (see json_compatible_encoder.py and body_updates.py) dumps a model with
+model_dump(mode="json"), which is done by Pydantic's compiled serializer, and then walks through all of the
+result again, in Python: for every value, a series of isinstance() checks to find out what it is, on every call,
+even though a model_dump(mode="json") is made of JSON-compatible values only.
+
+compiled_jsonable_encoder(item) gives the same result. The first time it sees a model class (EncoderItem,
+Items, Offer, ...), it looks at the types of its fields, recursively, and builds an encoder for that class,
+kept for the next calls:
+
+Fields whose type can only give plain JSON values (str, numbers, datetimes, URLs, enums, nested models made of
+those, lists of them, ...) are taken from the serializer as they are. That's the datetime-to-ISO conversion too:
+it's done by Pydantic's serializer in both cases.
+The others (dict with str keys, where jsonable_encoder drops the keys starting with "_sa", Any, types it
+doesn't know) still go through jsonable_encoder, but only them.
+A class the encoder can't reason about (custom serializers, computed fields, extra="allow", its own
+model_dump) is always encoded with jsonable_encoder.
+
+Anything that is not a model goes to jsonable_encoder.
+
+Command to run the benchmark against jsonable_encoder, on nested models:
+python compiled_encoder.py --benchmark"""
+
+import datetime
+import decimal
+import enum
+import ipaddress
+import sys
+import threading
+import time
+import types
+import typing
+import uuid
+from collections.abc import Callable
+from pathlib import PurePath
+from typing import Annotated, Any, Literal
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import AnyUrl, BaseModel
+
+# Types that a model_dump(mode="json") turns into a plain str, number, bool or None.
+_PLAIN_TYPES = (
+    str, int, float, bool, bytes, type(None), datetime.datetime, datetime.date, datetime.time, datetime.timedelta,
+    uuid.UUID, decimal.Decimal, enum.Enum, PurePath, ipaddress.IPv4Address, ipaddress.IPv6Address,
+    ipaddress.IPv4Network, ipaddress.IPv6Network, AnyUrl,
+)
+_UNION_TYPES = (typing.Union, types.UnionType)
+_SEQUENCE_TYPES = (list, set, frozenset, tuple, typing.Sequence, typing.AbstractSet)
+
+
+def _has_plain_dump(cls: type[BaseModel]) -> bool:
+    """Whether model_dump(mode="json") of the class can be used as is, without the walk of jsonable_encoder."""
+    decorators = cls.__pydantic_decorators__
+    return not (
+        decorators.field_serializers
+        or decorators.model_serializers
+        or cls.model_computed_fields
+        or cls.model_config.get("extra") == "allow"
+        or cls.model_dump is not BaseModel.model_dump
+        or any((info.serialization_alias or name).startswith("_sa") for name, info in cls.model_fields.items())
+    )
+
+
+def _is_plain(annotation: Any, seen: set) -> bool:
+    """Whether values of this type are dumped as JSON values that jsonable_encoder would leave as they are."""
+    origin = typing.get_origin(annotation)
+    if origin is Annotated:
+        return _is_plain(typing.get_args(annotation)[0], seen)
+    if origin is Literal:
+        return all(isinstance(value, _PLAIN_TYPES) for value in typing.get_args(annotation))
+    if origin in _UNION_TYPES:
+        return all(_is_plain(argument, seen) for argument in typing.get_args(annotation))
+    if origin is not None and isinstance(origin, type) and issubclass(origin, _SEQUENCE_TYPES):
+        return all(_is_plain(argument, seen) for argument in typing.get_args(annotation) if argument is not Ellipsis)
+    if origin is not None and isinstance(origin, type) and issubclass(origin, dict):
+        key, value = typing.get_args(annotation) or (Any, Any)
+        # Keys that are dumped as strings could start with "_sa", which jsonable_encoder drops.
+        return key in (int, float, bool, uuid.UUID) and _is_plain(value, seen)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if annotation in seen:
+            return True  # a model that refers to itself: the rest of its fields decide
+        seen.add(annotation)
+        return _has_plain_dump(annotation) and all(_is_plain(info.annotation, seen) for info in annotation.model_fields.values())
+    return isinstance(annotation, type) and issubclass(annotation, _PLAIN_TYPES)
+
+
+def build_encoder(cls: type[BaseModel]) -> Callable[[BaseModel], Any]:
+    """An encoder for the instances of cls that gives the same result as jsonable_encoder."""
+    if not _has_plain_dump(cls):
+        return jsonable_encoder
+    serializer = cls.__pydantic_serializer__
+    walked = [
+        info.serialization_alias or name
+        for name, info in cls.model_fields.items()
+        if not _is_plain(info.annotation, set())
+    ]
+
+    def encode(obj: BaseModel) -> Any:
+        data = serializer.to_python(obj, mode="json", by_alias=True)
+        for key in walked:
+            if key in data:
+                data[key] = jsonable_encoder(data[key])
+        return data
+
+    encode.walked_fields = walked
+    return encode
+
+
+_encoders: dict[type, Callable[[Any], Any]] = {}
+_lock = threading.Lock()
+
+
+def compiled_jsonable_encoder(obj: Any) -> Any:
+    """jsonable_encoder(obj), with an encoder built once per model class."""
+    encoder = _encoders.get(type(obj))
+    if encoder is None:
+        if not isinstance(obj, BaseModel):
+            return jsonable_encoder(obj)
+        with _lock:
+            encoder = _encoders.get(type(obj))
+            if encoder is None:
+                encoder = _encoders[type(obj)] = build_encoder(type(obj))
+    return encoder(obj)
+
+
+"""Benchmark¶
+Encodes an EncoderItem (json_compatible_encoder.py), an Items (body_updates.py) and Offers with more and more
+nested items (body_nested_models.py) with jsonable_encoder and compiled_jsonable_encoder, and checks that both
+give the same result."""
+
+
+def _per_call_us(function, obj, rounds: int) -> float:
+    function(obj)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function(obj)
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def benchmark_encoders() -> list[dict]:
+    import json
+
+    from body_nested_models import Offer
+    from body_updates import Items
+    from json_compatible_encoder import EncoderItem
+    from url_cache import offer_payload
+
+    samples = [
+        ("EncoderItem", EncoderItem(name="Murugan", description="Senthil", joining_date=datetime.datetime(2024, 1, 1, 6, 30, tzinfo=datetime.timezone.utc)), 5000),
+        ("Items", Items(name="Shanmuga", price=666.666, tax=6.66666, tags=["Shanmugar", "JayanthiNathar"]), 5000),
+    ]
+    for items in (10, 100, 1000):
+        samples.append((f"Offer, {items} items", Offer.model_validate_json(offer_payload(items)), max(5, 20_000 // items)))
+    results = []
+    for name, obj, rounds in samples:
+        assert json.dumps(compiled_jsonable_encoder(obj)) == json.dumps(jsonable_encoder(obj)), name
+        results.append({
+            "model": name,
+            "jsonable_encoder": _per_call_us(jsonable_encoder, obj, rounds),
+            "compiled": _per_call_us(compiled_jsonable_encoder, obj, rounds),
+        })
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'model':<20} {'jsonable_encoder us':>20} {'compiled us':>12}")
+    for row in benchmark_encoders():
+        print(f"{row['model']:<20} {row['jsonable_encoder']:>20.1f} {row['compiled']:>12.1f}")
@@ -0,0 +1,296 @@
+"""Compiled Router¶
+Path operations are evaluated in order: for every request Starlette tests the regex of each route,
+one after the other, until one matches. The more routes an app has, the slower the lookup gets.
+
+compile_router(app) builds, once at startup:
+
+A dict with the static paths (the ones without parameters), like /users/me or /users.
+A segment trie with the parameterized paths, like /users/{user_id} or /files/{file_path:path}.
+
+A request path is looked up in both, which gives only the routes that can match it. They are then
+checked in declaration order, so the result is the same as with the ordered list, but the lookup
+cost depends on the length of the path, not on the number of routes. The routes after the first
+Mount, and requests that only match partially (another method), go through the ordered list as before.
+
+Order matters¶
+As explained in path_parameters.py, declaring /users/{user_id} before /users/me means /users/me
+can never be reached, and declaring the same path operation twice means the second one is never used.
+
+Instead of silently ignoring those routes, compile_router(app) raises a RouteConflictError at startup
+listing every duplicated or shadowed route. With strict=False (for apps that declare them on purpose, like
+path_parameters.py), it logs them as a warning instead, and keeps them in compiled.conflicts.
+
+from compiled_router import compile_router
+compile_router(app)
+
+Command to run the lookup benchmark:
+python compiled_router.py --benchmark"""
+
+import asyncio
+import logging
+import re
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette._utils import get_route_path
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import PARAM_REGEX, BaseRoute, Match, Route, Router, WebSocketRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+
+class RouteConflictError(Exception):
+    def __init__(self, conflicts: list[str]):
+        self.conflicts = conflicts
+        super().__init__("Unreachable path operations:\n" + "\n".join(conflicts))
+
+
+# Convertors whose values are always accepted by another convertor: {"str": {"int", ...}} means
+# a {param:str} segment matches everything an {param:int} segment matches.
+_WIDER_CONVERTORS = {
+    "str": {"str", "int", "float", "uuid"},
+    "float": {"float", "int"},
+    "int": {"int"},
+    "uuid": {"uuid"},
+}
+
+
+def _split_segments(path: str) -> list[tuple[str, str]]:
+    """Split a route path into (kind, value) segments. kind is "static", the name of the
+    convertor for segments that are a single parameter, or "pattern" for mixed segments."""
+    segments = []
+    parts = path.split("/")[1:]
+    for position, part in enumerate(parts):
+        params = list(PARAM_REGEX.finditer(part))
+        if not params:
+            segments.append(("static", part))
+            continue
+        convertor = (params[0].group(2) or ":str")[1:]
+        if convertor == "path":
+            # A path parameter swallows the rest of the path, slashes included.
+            segments.append(("path", "/".join(parts[position:])))
+            break
+        if len(params) == 1 and params[0].group(0) == part:
+            segments.append((convertor, part))
+        else:
+            segments.append(("pattern", part))
+    return segments
+
+
+def _methods_overlap(first: BaseRoute, second: BaseRoute) -> set[str] | None:
+    first_methods, second_methods = getattr(first, "methods", None), getattr(second, "methods", None)
+    if first_methods is None or second_methods is None:
+        return first_methods or second_methods or {"*"}
+    return first_methods & second_methods
+
+
+def _covers(first: BaseRoute, second: BaseRoute) -> bool:
+    """True when every path matched by the second route is also matched by the first one."""
+    if isinstance(first, WebSocketRoute) != isinstance(second, WebSocketRoute):
+        return False
+    second_segments = _split_segments(second.path)
+    if all(kind == "static" for kind, _ in second_segments):
+        return first.path_regex.match(second.path) is not None
+    first_segments = _split_segments(first.path)
+    for index, (kind, value) in enumerate(first_segments):
+        if kind == "path":
+            return True
+        if index >= len(second_segments):
+            return False
+        second_kind, second_value = second_segments[index]
+        if kind == "static" or kind == "pattern" or second_kind in ("pattern", "path"):
+            if (kind, value) != (second_kind, second_value):
+                return False
+        elif second_kind == "static":
+            regex = first.param_convertors[PARAM_REGEX.search(value).group(1)].regex
+            if not re.fullmatch(regex, second_value):
+                return False
+        elif second_kind not in _WIDER_CONVERTORS.get(kind, {kind}):
+            return False
+    return len(first_segments) == len(second_segments)
+
+
+def find_conflicts(routes: list[BaseRoute]) -> list[str]:
+    """Return a description of every route that an earlier route makes unreachable."""
+    conflicts = []
+    for index, route in enumerate(routes):
+        for earlier in routes[:index]:
+            methods = _methods_overlap(earlier, route)
+            if not methods or not _covers(earlier, route):
+                continue
+            problem = "duplicated by" if _covers(route, earlier) else "shadowed by"
+            conflicts.append(
+                f"{', '.join(sorted(methods))} {route.path} ({route.name}) is {problem} "
+                f"{earlier.path} ({earlier.name}), declared before it"
+            )
+            break
+    return conflicts
+
+
+class _Node:
+    __slots__ = ("static", "dynamic", "tail", "routes")
+
+    def __init__(self):
+        self.static: dict[str, _Node] = {}
+        self.dynamic: dict[str, tuple[re.Pattern, _Node]] = {}
+        self.tail: dict[str, tuple[re.Pattern, list]] = {}
+        self.routes: list[tuple[int, BaseRoute]] = []
+
+
+def _segment_regex(route: BaseRoute, value: str) -> re.Pattern:
+    pattern, last = "", 0
+    for match in PARAM_REGEX.finditer(value):
+        pattern += re.escape(value[last:match.start()])
+        pattern += f"(?:{route.param_convertors[match.group(1)].regex})"
+        last = match.end()
+    return re.compile(pattern + re.escape(value[last:]))
+
+
+class CompiledRouter:
+    """Looks up the candidate routes for a path through the static dict and the segment trie,
+    then lets the candidates confirm the match (in declaration order) like the Router would."""
+
+    def __init__(self, router: Router, strict: bool = True):
+        self.router = router
+        self.fallback: ASGIApp = router.app
+        routes = []
+        # Anything that isn't a plain route (e.g. a Mount) may catch the paths of the routes
+        # declared after it, so only the leading plain routes are compiled.
+        for route in router.routes:
+            if not isinstance(route, (Route, WebSocketRoute)):
+                break
+            routes.append(route)
+        self.conflicts = find_conflicts(routes)
+        if self.conflicts:
+            if strict:
+                raise RouteConflictError(self.conflicts)
+            logger.warning("Unreachable path operations:\n%s", "\n".join(self.conflicts))
+        self.static: dict[str, list[tuple[int, BaseRoute]]] = {}
+        self.root = _Node()
+        for index, route in enumerate(routes):
+            self._add(index, route)
+
+    def _add(self, index: int, route: BaseRoute) -> None:
+        segments = _split_segments(route.path)
+        if all(kind == "static" for kind, _ in segments):
+            self.static.setdefault(route.path, []).append((index, route))
+            return
+        node = self.root
+        for kind, value in segments:
+            if kind == "static":
+                node = node.static.setdefault(value, _Node())
+            elif kind == "path":
+                regex, routes = node.tail.setdefault(value, (_segment_regex(route, value), []))
+                routes.append((index, route))
+                return
+            else:
+                if value not in node.dynamic:
+                    node.dynamic[value] = (_segment_regex(route, value), _Node())
+                node = node.dynamic[value][1]
+        node.routes.append((index, route))
+
+    def _walk(self, node: _Node, segments: list[str], position: int, found: list) -> None:
+        if position == len(segments):
+            found.extend(node.routes)
+        else:
+            segment = segments[position]
+            child = node.static.get(segment)
+            if child is not None:
+                self._walk(child, segments, position + 1, found)
+            for regex, child in node.dynamic.values():
+                if regex.fullmatch(segment):
+                    self._walk(child, segments, position + 1, found)
+        if node.tail:
+            rest = "/".join(segments[position:])
+            for regex, routes in node.tail.values():
+                if regex.fullmatch(rest):
+                    found.extend(routes)
+
+    def candidates(self, path: str) -> list[BaseRoute]:
+        found = list(self.static.get(path, ()))
+        self._walk(self.root, path.split("/")[1:], 0, found)
+        found.sort(key=lambda indexed: indexed[0])
+        return [route for _, route in found]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.fallback(scope, receive, send)
+            return
+        for route in self.candidates(get_route_path(scope)):
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                break
+        else:
+            # Not found, or only partial matches (e.g. another method): the Router also tries the routes that
+            # are not compiled (the ones after a Mount), and takes care of redirect_slashes, the 405 and the 404.
+            await self.fallback(scope, receive, send)
+            return
+        scope.setdefault("router", self.router)
+        scope["route"] = route
+        scope.update(child_scope)
+        await route.handle(scope, receive, send)
+
+
+def compile_router(app: FastAPI, strict: bool = True) -> CompiledRouter:
+    """Route the app's requests through a CompiledRouter. Call it after all the path
+    operations have been declared. With strict=True, raises RouteConflictError when a
+    path operation is duplicated or shadowed, otherwise logs them."""
+    router = app.router
+    compiled = CompiledRouter(router, strict=strict)
+    # The compiled router takes the place of router.app in the middleware stack of the router, so that the
+    # middleware of the router still runs around it.
+    if router.middleware_stack == router.app:
+        router.middleware_stack = compiled
+        return compiled
+    middleware = router.middleware_stack
+    while getattr(middleware, "app", None) != router.app:
+        if not hasattr(middleware, "app"):
+            raise TypeError(f"Can't find the router behind {type(middleware).__name__} in its middleware stack")
+        middleware = middleware.app
+    middleware.app = compiled
+    return compiled
+
+
+"""Lookup benchmark¶
+Builds apps with N routes like /resource{i}/{item_id} and requests the last one, which is the worst case for the ordered list."""
+
+
+async def _time_requests(app: ASGIApp, path: str, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "path": path, "root_path": "", "method": "GET", "headers": [], "query_string": b""}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e9
+
+
+async def _noop_endpoint(request: Request) -> Response:
+    return Response()
+
+
+def benchmark_lookup(sizes=(10, 100, 1000), requests: int = 5000) -> list[dict]:
+    results = []
+    for size in sizes:
+        router = Router(routes=[Route(f"/resource{i}/{{item_id}}", _noop_endpoint) for i in range(size)])
+        target = f"/resource{size - 1}/42"
+        linear_ns = asyncio.run(_time_requests(router, target, requests))
+        compiled = CompiledRouter(router)
+        router.middleware_stack = compiled
+        compiled_ns = asyncio.run(_time_requests(router, target, requests))
+        results.append({"routes": size, "compiled_ns": compiled_ns, "linear_ns": linear_ns})
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'routes':>7} {'compiled ns/req':>16} {'linear ns/req':>14}")
+    for row in benchmark_lookup():
+        print(f"{row['routes']:>7} {row['compiled_ns']:>16.0f} {row['linear_ns']:>14.0f}")
@@ -0,0 +1,113 @@
+"""Constant Responses¶
+Most tutorial modules have a root path operation that returns a literal, like:
+
+@app.get("/")
+async def get_root():
+    return {"message": "Hello Path Parameters!"}
+
+The result never changes, but on every request FastAPI still calls the function, runs it through
+jsonable_encoder (or the response model), dumps the JSON and computes the Content-Length.
+
+serve_constant_responses(app) finds those path operations once, at startup, renders the response
+body and headers a single time and swaps the route's ASGI app for one that sends the cached bytes.
+
+A path operation is treated as constant only when:
+
+It takes no parameters and has no dependencies.
+Its body (ignoring the docstring) is a single return of a Python literal (dicts, lists, sets, strings, numbers...).
+
+Call it after all the path operations have been declared:
+
+from constant_responses import serve_constant_responses
+serve_constant_responses(app)"""
+
+import ast
+import inspect
+import textwrap
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from starlette.types import Receive, Scope, Send
+
+_NOT_CONSTANT = object()
+
+
+def constant_result(endpoint) -> Any:
+    """Return the literal an endpoint always returns, or _NOT_CONSTANT."""
+    if inspect.signature(endpoint).parameters:
+        return _NOT_CONSTANT
+    try:
+        source = textwrap.dedent(inspect.getsource(endpoint))
+    except (OSError, TypeError):
+        return _NOT_CONSTANT
+    function = ast.parse(source).body[0]
+    if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return _NOT_CONSTANT
+    body = function.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]  # docstring
+    if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+        return _NOT_CONSTANT
+    try:
+        return ast.literal_eval(body[0].value)
+    except (ValueError, TypeError, SyntaxError):
+        return _NOT_CONSTANT
+
+
+class ConstantResponse:
+    """ASGI app that replays a response rendered once."""
+
+    def __init__(self, status_code: int, headers: list[tuple[bytes, bytes]], body: bytes):
+        self.status_code = status_code
+        self.raw_headers = tuple(headers)
+        self.body = body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # New messages on every call: middleware may change them in place (e.g. CORS adds to the headers).
+        await send({"type": "http.response.start", "status": self.status_code, "headers": list(self.raw_headers)})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def render_constant(route: APIRoute, result: Any) -> ConstantResponse:
+    """Render the result the same way the route would: through its response model if it
+    has one, otherwise through jsonable_encoder, and with its response class."""
+    if route.response_field is not None:
+        value, errors = route.response_field.validate(result, {}, loc=("response",))
+        assert not errors, f"{route.name} returns a value that doesn't match its response model"
+        content = route.response_field.serialize(
+            value,
+            include=route.response_model_include,
+            exclude=route.response_model_exclude,
+            by_alias=route.response_model_by_alias,
+            exclude_unset=route.response_model_exclude_unset,
+            exclude_defaults=route.response_model_exclude_defaults,
+            exclude_none=route.response_model_exclude_none,
+        )
+    else:
+        content = jsonable_encoder(result)
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+    kwargs = {"status_code": route.status_code} if route.status_code else {}
+    response = response_class(content, **kwargs)
+    return ConstantResponse(response.status_code, response.raw_headers, response.body)
+
+
+def serve_constant_responses(app: FastAPI) -> list[APIRoute]:
+    """Serve every constant path operation of the app from pre-rendered bytes, and
+    return the routes that were switched."""
+    switched = []
+    for route in app.router.routes:
+        if not isinstance(route, APIRoute) or route.dependant.dependencies:
+            continue
+        if inspect.isasyncgenfunction(route.endpoint) or inspect.isgeneratorfunction(route.endpoint):
+            continue
+        result = constant_result(route.endpoint)
+        if result is _NOT_CONSTANT:
+            continue
+        route.app = render_constant(route, result)
+        switched.append(route)
+    return switched
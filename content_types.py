@@ -0,0 +1,16 @@
+"""Content types¶
+Helpers shared by the modules that read request bodies themselves (combined_body.py, partial_update.py,
+columnar_weights.py, body_limits.py), to decide like FastAPI does how a body is decoded."""
+
+import email.message
+
+
+def is_json_request(content_type: str | None) -> bool:
+    """Same check as FastAPI, to decide whether a body is decoded as JSON: application/json, or any
+    application/*+json."""
+    if not content_type:
+        return False
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    return message.get_content_maintype() == "application" and (subtype == "json" or subtype.endswith("+json"))
@@ -22,7 +22,7 @@ class DeclareExtraData(BaseModel):
     tax: float | None = None
 
     model_config = {
-        "json_example_schema" : {
+        "json_schema_extra" : {
             "examples" : [
                 {
                     "name" : "Murugan",
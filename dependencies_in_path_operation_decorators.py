@@ -23,11 +23,11 @@ The path operation decorator receives an optional argument dependencies.
 It should be a list of Depends():"""
 
 # Remember to import Header and HTTPException from fastapi
-async def verify_token(x_token: Annotated[str, Header()]):
+async def verify_token(x_token: Annotated[str, Header(examples=["fake-super-secret-token"])]):
     if x_token != "fake-super-secret-token":
         raise HTTPException(status_code=418, detail="X-token header Invalid")
 
-async def verify_key(x_key: Annotated[str, Header()]):
+async def verify_key(x_key: Annotated[str, Header(examples=["fake-super-secret-key"])]):
     if x_key != "fake-super-secret-key":
         raise HTTPException(status_code=418, detail="X-Key header invalid")
     return verify_key
@@ -0,0 +1,271 @@
+"""Direct JSON Responses¶
+With a response_model (get_sockets and get_output in response_model_return_type.py), the value
+returned by the path operation is validated against the response model, dumped to Python dicts and lists
+(model_dump(mode="json")), and then, as a separate step, encoded to JSON by json.dumps in the response class:
+two full copies of the response, one of them made of Python objects, before the first byte is sent.
+
+DirectJSONRoute validates the value the same way, and then dumps it straight to UTF-8 JSON bytes, in one call
+to Pydantic's serializer (TypeAdapter.dump_json), with the include, exclude, by_alias and exclude_* options
+of the route, compiled once in a ResponsePlan (see response_plans.py). No dicts, no lists, no json.dumps. The
+bytes are sent as they are by DirectJSONResponse.
+
+app = FastAPI()
+app.router.route_class = DirectJSONRoute
+
+@app.post("/Sockets/", response_model=ResponseModel)
+async def get_sockets(items: ResponseModel) -> Any:
+    return items
+
+It only applies to the path operations declared after it, so it's set as soon as the app is created, and to
+the ones declared in an APIRouter(route_class=DirectJSONRoute). The JSON is the same as with JSONResponse
+(compact, not ASCII-escaped). Path operations without a response model, that return a Response, or that
+declare another response_class (HTMLResponse, ...) are left as they are. Generator path operations with a list response model and
+response_class=StreamingJSONArrayResponse (see json_array_stream.py) get the plan of the items, to validate and
+dump them one by one.
+
+It's built on the public API of FastAPI only: the route serves the path operation through a function with the
+same parameters, and a Response one (the one FastAPI gives the dependencies), that validates and dumps the
+value and returns the DirectJSONResponse, with the status code and headers FastAPI would have given it. The
+route keeps its response model and response class for the docs. The response class is the one of the path
+operation, or of its router, when it's declared. Recent versions of FastAPI already dump straight to JSON bytes
+for path operations with a response model and the default response class, with the include and exclude given
+on every response; DirectJSONRoute does it for response_class=JSONResponse too, always with the compiled plan,
+and on any version.
+
+Command to run the benchmark, with larger and larger responses:
+python direct_json.py --benchmark"""
+
+import collections.abc
+import inspect
+import sys
+import time
+import tracemalloc
+import typing
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import Response
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.dependencies.utils import get_typed_return_annotation, get_typed_signature
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import TypeAdapter
+
+from json_array_stream import StreamingJSONArrayResponse
+from response_plans import ResponsePlan, response_plan
+
+
+class DirectJSONResponse(JSONResponse):
+    """A JSONResponse that sends JSON already encoded to bytes as it is."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return super().render(content)
+
+
+def _response_class(response_class) -> type:
+    if isinstance(response_class, DefaultPlaceholder):
+        return response_class.value
+    return response_class
+
+
+def _serves_json(response_class) -> bool:
+    response_class = _response_class(response_class)
+    return response_class is JSONResponse or response_class is DirectJSONResponse
+
+
+def _streams_json_array(response_class) -> bool:
+    response_class = _response_class(response_class)
+    return isinstance(response_class, type) and issubclass(response_class, StreamingJSONArrayResponse)
+
+
+def _is_generator(call) -> bool:
+    return inspect.isasyncgenfunction(call) or inspect.isgeneratorfunction(call)
+
+
+def _is_coroutine(call) -> bool:
+    return inspect.iscoroutinefunction(call) or inspect.iscoroutinefunction(getattr(call, "__call__", None))
+
+
+def _item_type(response_model: Any) -> Any:
+    """The type of the items of a list (or other sequence) response model, or None."""
+    if typing.get_origin(response_model) in (list, tuple, set, frozenset, collections.abc.Sequence):
+        arguments = [argument for argument in typing.get_args(response_model) if argument is not Ellipsis]
+        return arguments[0] if len(arguments) == 1 else None
+    return None
+
+
+def _response_model(endpoint: Callable[..., Any], response_model: Any) -> Any:
+    """The response model of the path operation, as APIRoute works it out from the return annotation."""
+    if not isinstance(response_model, DefaultPlaceholder):
+        return response_model
+    if _is_generator(endpoint):
+        return None  # the items it yields, not a response model
+    annotation = get_typed_return_annotation(endpoint)
+    if isinstance(annotation, type) and issubclass(annotation, Response):
+        return None
+    return annotation
+
+
+# The name of the Response parameter added to a path operation that has none, that FastAPI fills with the
+# response the dependencies and the path operation set the status code, headers and cookies on.
+_RESPONSE = "direct_json_response"
+
+
+def _finish(response: Response, solved: Response) -> Response:
+    # What FastAPI does with a value returned by the path operation, that it doesn't do with a Response.
+    if not is_body_allowed_for_status_code(response.status_code):
+        response.body = b""
+    response.headers.raw.extend(solved.headers.raw)
+    return response
+
+
+def _direct_endpoint(endpoint: Callable[..., Any], respond: Callable[[Any, Response], Response]) -> Callable[..., Any]:
+    """A path operation with the parameters of the endpoint, and a Response one if it has none, that responds with
+    respond."""
+    # Not functools.wraps: FastAPI unwraps __wrapped__ to find out how to call the path operation. The annotations
+    # are resolved in the module of the endpoint.
+    signature = get_typed_signature(endpoint)
+    parameters = list(signature.parameters.values())
+    # FastAPI fills one Response parameter only.
+    response_name = next((parameter.name for parameter in parameters if isinstance(parameter.annotation, type)
+                          and issubclass(parameter.annotation, Response)), None)
+    if response_name is None:
+        position = next((index for index, parameter in enumerate(parameters)
+                         if parameter.kind is inspect.Parameter.VAR_KEYWORD), len(parameters))
+        parameters.insert(position, inspect.Parameter(_RESPONSE, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+    def solved_response(kwargs: dict[str, Any]) -> Response:
+        return kwargs[response_name] if response_name is not None else kwargs.pop(_RESPONSE)
+
+    if _is_generator(endpoint):
+        # Calling a generator function only creates the generator, the response iterates it.
+        async def direct_endpoint(*args, **kwargs):
+            solved = solved_response(kwargs)
+            return respond(endpoint(*args, **kwargs), solved)
+    elif _is_coroutine(endpoint):
+        async def direct_endpoint(*args, **kwargs):
+            solved = solved_response(kwargs)
+            return respond(await endpoint(*args, **kwargs), solved)
+    else:
+        # Run in the threadpool by FastAPI, with the validation and the dump, like the path operation was.
+        def direct_endpoint(*args, **kwargs):
+            solved = solved_response(kwargs)
+            return respond(endpoint(*args, **kwargs), solved)
+
+    direct_endpoint.__signature__ = signature.replace(parameters=parameters)
+    for name in ("__module__", "__name__", "__qualname__", "__doc__"):
+        setattr(direct_endpoint, name, getattr(endpoint, name, None))
+    return direct_endpoint
+
+
+class DirectJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        response_class = kwargs.get("response_class", Default(JSONResponse))
+        response_model = _response_model(endpoint, kwargs.get("response_model", Default(None)))
+        status_code = kwargs.get("status_code")
+        respond = None
+        if response_model is not None and _streams_json_array(response_class) and _is_generator(endpoint):
+            item_type = _item_type(response_model)
+            if item_type is not None:
+                respond = self.streaming_response(self.plan(item_type, kwargs), status_code)
+        elif response_model is not None and _serves_json(response_class) and not _is_generator(endpoint):
+            respond = self.json_response(self.plan(response_model, kwargs), status_code)
+        if respond is not None:
+            # The route keeps its response model and response class, for the docs.
+            kwargs["response_model"] = response_model
+            endpoint = _direct_endpoint(endpoint, respond)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def plan(response_model: Any, options: dict[str, Any]) -> ResponsePlan:
+        return response_plan(response_model, options.get("response_model_include"),
+                             options.get("response_model_exclude"), options.get("response_model_by_alias", True),
+                             options.get("response_model_exclude_unset", False),
+                             options.get("response_model_exclude_defaults", False),
+                             options.get("response_model_exclude_none", False))
+
+    @staticmethod
+    def json_response(plan: ResponsePlan, status_code: int | None) -> Callable[[Any, Response], Response]:
+        def respond(content: Any, solved: Response) -> Response:
+            if isinstance(content, Response):
+                return content
+            value, errors = plan.validate(content, loc=("response",))
+            if errors:
+                raise ResponseValidationError(errors, body=content)
+            status = solved.status_code or status_code
+            return _finish(DirectJSONResponse(plan.serialize_json(value), **({"status_code": status} if status else {})),
+                           solved)
+        return respond
+
+    @staticmethod
+    def streaming_response(plan: ResponsePlan, status_code: int | None) -> Callable[[Any, Response], Response]:
+        def respond(items: Any, solved: Response) -> Response:
+            status = solved.status_code or status_code
+            return _finish(StreamingJSONArrayResponse(items, plan=plan, **({"status_code": status} if status else {})),
+                           solved)
+        return respond
+
+
+"""Benchmark¶
+Serializes a ResponseModel (response_model_return_type.py) with more and more tags, and a list of more and
+more ResponseModels (get_floors), with jsonable_encoder and json.dumps (the response without a response
+model), with model_dump(mode="json") and json.dumps (the response model with a JSONResponse), and with
+dump_json (DirectJSONRoute). Gives the time and the peak memory allocated by each one, and checks that all
+three give the same bytes."""
+
+
+def _json_response(content: Any) -> bytes:
+    return JSONResponse(content).body
+
+
+def _measure(function, rounds: int) -> tuple[float, float]:
+    function()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    seconds = (time.perf_counter() - start) / rounds
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds * 1000, peak / 1e6
+
+
+def benchmark_serialization() -> list[dict]:
+    from response_model_return_type import ResponseModel
+
+    samples = []
+    for tags in (10, 10_000, 1_000_000):
+        item = ResponseModel(name="Valliammai", description="Murugan Wife Name", price=66.6666, tax=6.66,
+                             tags=[f"Deivanai {number}" for number in range(tags)])
+        samples.append((f"1 item, {tags} tags", ResponseModel, item, max(3, 100_000 // tags)))
+    for items in (10, 10_000, 100_000):
+        floors = [ResponseModel(name=f"Valliammai {number}", description="Murugan Wife Name", price=66.6666,
+                                tax=6.66, tags=["Deivanai", "IndranMagal", "Iravadham"]) for number in range(items)]
+        samples.append((f"{items} items", list[ResponseModel], floors, max(3, 10_000 // items)))
+    results = []
+    for name, response_model, value, rounds in samples:
+        adapter = TypeAdapter(response_model)
+        paths = {
+            "jsonable_encoder": lambda: _json_response(jsonable_encoder(value)),
+            "model_dump": lambda: _json_response(adapter.dump_python(value, mode="json")),
+            "dump_json": lambda: adapter.dump_json(value),
+        }
+        assert len({path() for path in paths.values()}) == 1, name
+        row = {"response": name}
+        for path, function in paths.items():
+            row[path] = _measure(function, rounds)
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'response':<22} {'jsonable_encoder':>22} {'model_dump + dumps':>22} {'dump_json':>22}")
+    for row in benchmark_serialization():
+        cells = [f"{row[path][0]:>8.2f} ms {row[path][1]:>7.1f} MB" for path in ("jsonable_encoder", "model_dump", "dump_json")]
+        print(f"{row['response']:<22} " + " ".join(f"{cell:>22}" for cell in cells))
@@ -0,0 +1,79 @@
+"""Enum Path Parameters¶
+A path parameter declared with a str Enum, like model_name: ModelName, is validated by Pydantic on every
+request, and the path operation then usually compares it with each member, one if after the other.
+
+EnumPath builds the value -> member map once. Used as a dependency, it converts the raw path parameter
+with a single dict lookup, and rejects unknown values with a 422 whose body is the same one FastAPI
+would send, pre-rendered except for the rejected value.
+
+from enum_path import EnumPath, add_enum_path_handler
+
+model_name_path = EnumPath(ModelName, "model_name")
+add_enum_path_handler(app)
+
+@app.get("/models/{model_name}", openapi_extra=model_name_path.openapi_extra)
+async def get_model(model_name: Annotated[ModelName, Depends(model_name_path)]):
+    ...
+
+The openapi_extra keeps the parameter (and its possible values) in the docs, as the path operation
+no longer declares it as a Path parameter."""
+
+import json
+from enum import Enum
+
+from fastapi import FastAPI, Request
+from starlette.responses import Response
+
+
+class EnumPathError(Exception):
+    def __init__(self, response: Response):
+        self.response = response
+
+
+async def enum_path_error_handler(request: Request, exc: EnumPathError) -> Response:
+    return exc.response
+
+
+def add_enum_path_handler(app: FastAPI) -> None:
+    app.add_exception_handler(EnumPathError, enum_path_error_handler)
+
+
+def _expected(values: list[str]) -> str:
+    # Same wording as Pydantic's enum error: 'A', 'B' or 'C'
+    quoted = [repr(value) for value in values]
+    if len(quoted) == 1:
+        return quoted[0]
+    return f"{', '.join(quoted[:-1])} or {quoted[-1]}"
+
+
+def _dumps(value) -> bytes:
+    # Same encoding as JSONResponse
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class EnumPath:
+    def __init__(self, enum_class: type[Enum], name: str):
+        self.enum_class = enum_class
+        self.name = name
+        self.members = {member.value: member for member in enum_class}
+        expected = _expected([str(value) for value in self.members])
+        self.error_prefix = _dumps({"detail": [{
+            "type": "enum",
+            "loc": ["path", name],
+            "msg": f"Input should be {expected}",
+        }]})[:-3] + b',"input":'
+        self.error_suffix = b"," + _dumps({"ctx": {"expected": expected}})[1:-1] + b"}]}"
+        self.openapi_extra = {"parameters": [{
+            "name": name,
+            "in": "path",
+            "required": True,
+            "schema": {"type": "string", "enum": list(self.members), "title": enum_class.__name__},
+        }]}
+
+    def __call__(self, request: Request) -> Enum:
+        value = request.path_params[self.name]
+        member = self.members.get(value)
+        if member is None:
+            body = self.error_prefix + _dumps(value) + self.error_suffix
+            raise EnumPathError(Response(body, status_code=422, media_type="application/json"))
+        return member
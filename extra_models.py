@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, EmailStr
+from direct_json import DirectJSONRoute
 
 app = FastAPI()
+# Response models are dumped straight to JSON bytes (see direct_json.py), and list ones can be streamed.
+app.router.route_class = DirectJSONRoute
 
 @app.get("/")
 async def get_root():
@@ -122,14 +125,24 @@ class PlaneItem(BaseItem):
     type: str
     size: float = 10.5
 
-items = {
+vehicles = {
     "foo" : {"description" : "This a car type", "type" : "car"},
     "bar" : {"description": "This is a plane", "type" : "plane", "size" : 66.66666}
 }
 
-@app.post("/vehicles/{vehicle_id}", response_model= PlaneItem | CarItem)
+"""With a plain union, the response is validated against PlaneItem, then CarItem, and a car, that is also a
+valid PlaneItem, comes out as a plane. Here the union is tagged by the type field (see tagged_unions.py): the
+value of type gives the model, and only that one is used, whatever the number of models in the union."""
+
+from tagged_unions import tagged_union
+
+VehicleItem = tagged_union(field="type", tags={"plane": PlaneItem, "car": CarItem})
+
+@app.post("/vehicles/{vehicle_id}", response_model=VehicleItem)
 async def get_vehicle_details(vehicle_id: str):
-    return items[vehicle_id]
+    if vehicle_id not in vehicles:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return vehicles[vehicle_id]
 
 
 """Union in Python 3.10¶
@@ -161,9 +174,15 @@ items = [
 ]
 
 
-@app.get("/items/", response_model=list[Item])
+"""The items can also be sent one by one, as a JSON array, while the path operation yields them
+(see json_array_stream.py), as the app's routes are DirectJSONRoutes:"""
+
+from json_array_stream import StreamingJSONArrayResponse
+
+@app.get("/items/", response_model=list[Item], response_class=StreamingJSONArrayResponse)
 async def read_items():
-    return items
+    for item in items:
+        yield item
 
 """Response with arbitrary dict¶
 You can also declare a response using a plain arbitrary dict, declaring just the type of the keys and values,
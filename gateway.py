@@ -0,0 +1,186 @@
+"""Gateway¶
+Every tutorial module in this repo builds its own `app = FastAPI()`, so serving the whole
+surface used to mean one `fastapi dev <file>.py` process per module.
+
+The gateway imports each module's `app` and mounts it under its own prefix, using the
+module name:
+
+/basics_tutorials/...      -> basics_tutorials.app
+/path_parameters/...       -> path_parameters.app
+/sub-dependencies/...      -> sub-dependencies.app
+
+Starlette's Mount does the same job, but its Router tests every mount's regex in order, so
+the cost of a request grows with the number of mounted apps. Here the prefix is the first
+path segment, so the target sub-app is found with a single dict lookup in a table that is
+built once at startup.
+
+The lifespan events are forwarded to every mounted app, so their startup and shutdown handlers run
+as they would if each one was served alone. A mounted app whose startup fails makes the gateway's
+startup fail.
+
+Command to run the gateway:
+uvicorn gateway:app
+or
+python gateway.py
+
+Command to run the dispatch benchmark:
+python gateway.py --benchmark"""
+
+import asyncio
+import contextlib
+import sys
+import time
+from collections.abc import Mapping
+
+from starlette.datastructures import URL
+from starlette.responses import PlainTextResponse, RedirectResponse
+from starlette.routing import Mount, Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from tutorials import load_tutorial_apps
+
+
+class Gateway:
+    """ASGI app that dispatches on the first path segment through a precomputed
+    prefix table, and hands the request to the mounted app the same way a
+    Starlette Mount would (by extending root_path)."""
+
+    def __init__(self, apps: Mapping[str, ASGIApp]):
+        self.apps = {"/" + name.strip("/"): app for name, app in apps.items()}
+        self.not_found = PlainTextResponse("Not Found", status_code=404)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        path = scope["path"]
+        route_path = path[len(root_path):] if root_path and path.startswith(root_path) else path
+        end = route_path.find("/", 1)
+        prefix = route_path if end == -1 else route_path[:end]
+        app = self.apps.get(prefix)
+        if app is None:
+            await self.not_found(scope, receive, send)
+            return
+        if end == -1 and scope["type"] == "http":
+            # Same as Starlette's redirect_slashes: /basics_tutorials -> /basics_tutorials/
+            redirect_scope = dict(scope, path=path + "/")
+            await RedirectResponse(url=str(URL(scope=redirect_scope)))(scope, receive, send)
+            return
+
+        scope["app_root_path"] = scope.get("app_root_path", root_path)
+        scope["root_path"] = root_path + prefix
+        await app(scope, receive, send)
+
+    async def lifespan(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Each mounted app gets its own lifespan, so that its startup and shutdown handlers run, in the order
+        # of the table on startup and in the reverse order on shutdown.
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        state = scope.get("state", {})
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                for app in dict.fromkeys(self.apps.values()):
+                    await stack.enter_async_context(_mounted_lifespan(app, state))
+                await send({"type": "lifespan.startup.complete"})
+                message = await receive()
+                assert message["type"] == "lifespan.shutdown"
+        except Exception as exc:
+            failed = "lifespan.shutdown.failed" if message["type"] == "lifespan.shutdown" else "lifespan.startup.failed"
+            await send({"type": failed, "message": str(exc)})
+            raise  # like Starlette, so that the server reports it
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+class LifespanFailed(Exception):
+    pass
+
+
+async def _lifespan_reply(task: asyncio.Task, replies: asyncio.Queue) -> dict | None:
+    """The next message the app sends, or None when the app has returned without sending one."""
+    reply = asyncio.ensure_future(replies.get())
+    await asyncio.wait({reply, task}, return_when=asyncio.FIRST_COMPLETED)
+    if reply.done():
+        return reply.result()
+    reply.cancel()
+    return None
+
+
+@contextlib.asynccontextmanager
+async def _mounted_lifespan(app: ASGIApp, state: dict):
+    """Run the lifespan of a mounted app: its startup on enter, its shutdown on exit."""
+    messages, replies = asyncio.Queue(), asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": state}
+    task = asyncio.ensure_future(app(scope, messages.get, replies.put))
+    await messages.put({"type": "lifespan.startup"})
+    reply = await _lifespan_reply(task, replies)
+    if reply is None:
+        # An app that doesn't support the lifespan protocol returns (or raises) right away: nothing to start.
+        task.exception()  # retrieved, so that it isn't reported as never retrieved
+        yield
+        return
+    if reply["type"] == "lifespan.startup.failed":
+        await asyncio.gather(task, return_exceptions=True)
+        raise LifespanFailed(reply.get("message", ""))
+    try:
+        yield
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        reply = await _lifespan_reply(task, replies)
+        await asyncio.gather(task, return_exceptions=True)
+        if reply is not None and reply["type"] == "lifespan.shutdown.failed":
+            raise LifespanFailed(reply.get("message", ""))
+
+
+"""Dispatch benchmark¶
+The benchmark mounts N no-op sub-apps and sends requests to the last one, which is the worst case
+for Starlette's ordered mount list. The per-request cost of the Gateway should stay flat as N grows."""
+
+
+async def _noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    return None
+
+
+async def _time_dispatch(app: ASGIApp, path: str, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "path": path, "root_path": "", "method": "GET", "headers": []}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e9
+
+
+def benchmark_dispatch(sizes=(1, 10, 35, 100, 1000), requests: int = 20000) -> list[dict]:
+    """Return the nanoseconds per request for the Gateway and for a Starlette Router
+    of Mounts, for each number of mounted sub-apps."""
+    results = []
+    for size in sizes:
+        names = [f"app{i}" for i in range(size)]
+        target = f"/{names[-1]}/items/1"
+        gateway = Gateway({name: _noop_app for name in names})
+        router = Router(routes=[Mount(f"/{name}", app=_noop_app) for name in names])
+        results.append({
+            "mounted": size,
+            "gateway_ns": asyncio.run(_time_dispatch(gateway, target, requests)),
+            "starlette_ns": asyncio.run(_time_dispatch(router, target, requests)),
+        })
+    return results
+
+
+app = Gateway(load_tutorial_apps())
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        print(f"{'mounted':>8} {'gateway ns/req':>15} {'starlette ns/req':>17}")
+        for row in benchmark_dispatch():
+            print(f"{row['mounted']:>8} {row['gateway_ns']:>15.0f} {row['starlette_ns']:>17.0f}")
+    else:
+        import uvicorn
+
+        uvicorn.run(app)
@@ -9,12 +9,12 @@ In that case, they will be applied to all the path operations in the application
 from fastapi import FastAPI, Depends, HTTPException, Header
 from typing import Annotated
 
-async def verify_token(x_token: Annotated[str, Header()]):
+async def verify_token(x_token: Annotated[str, Header(examples=["fake-super-secret-token"])]):
     if x_token != "fake-super-secret-token":
         raise HTTPException(status_code=400, detail="X-Token header invalid")
 
 
-async def verify_key(x_key: Annotated[str, Header()]):
+async def verify_key(x_key: Annotated[str, Header(examples=["fake-super-secret-key"])]):
     if x_key != "fake-super-secret-key":
         raise HTTPException(status_code=400, detail="X-Key header invalid")
     return x_key
@@ -4,9 +4,13 @@ from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
+from body_limits import add_body_limits
 
 app = FastAPI()
 
+# Rejects big or deeply nested bodies, like the ones of get_body_handlers, while they're being received (see body_limits.py)
+add_body_limits(app, max_body_size=64 * 1024, max_depth=16, max_array_length=1000)
+
 @app.get("/")
 async def get_root():
     return {"message" : "Hello Handling Errors!"}
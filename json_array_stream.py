@@ -0,0 +1,159 @@
+"""Streaming JSON Arrays¶
+read_items in extra_models.py (response_model=list[Item]) and get_floors in response_model_return_type.py
+build the whole list, validate all of it, and serialize it to one JSON string before the first byte is sent:
+the client waits for all of it, and the whole list and its JSON are in memory at the same time.
+
+With StreamingJSONArrayResponse, the path operation yields the items instead of returning a list, and each
+item is validated by the item type of the response model, dumped to JSON and sent as soon as it's yielded, as
+a chunk of a JSON array: "[" and the first item, then "," and the next one, ..., then "]". The time to the
+first byte and the memory used don't depend on the length of the list. Each item costs more than in a list,
+though (it's validated alone, and goes through the event loop alone): the whole body takes longer to send,
+about 4 times on the benchmark. It's for lists that are long, or slow to produce.
+
+app = FastAPI()
+app.router.route_class = DirectJSONRoute
+
+@app.get("/items/", response_model=list[Item], response_class=StreamingJSONArrayResponse)
+async def read_items():
+    for item in items:
+        yield item
+
+It's opt-in: without response_class, a generator path operation is streamed by FastAPI as JSON Lines (one
+JSON document per line, not an array). The response model (list[Item], or any other sequence of a type) is
+still the one in the docs, and the body is the same JSON as the one of the list. DirectJSONRoute (see
+direct_json.py) gives the response its item type, compiled in a ResponsePlan with the include, exclude,
+by_alias and exclude_* options of the route, applied to each item. Without it, the items are encoded with
+jsonable_encoder, without validation. Generators and async generators both work.
+
+As the status code and headers are sent with the first chunk, an item that is not valid can't give a 500
+anymore: the ResponseValidationError is raised, the server logs it and cuts the response, and the client gets
+a JSON array that's not closed (invalid JSON), so it can't take a partial list for the whole one.
+
+Command to run the benchmark of the time to the first byte and the peak memory against the list response:
+python json_array_stream.py --benchmark"""
+
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Mapping
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+
+from response_plans import ResponsePlan
+
+
+def _encode_item(item: Any) -> bytes:
+    # The same JSON as JSONResponse.render
+    return json.dumps(jsonable_encoder(item), ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+async def json_array(items: Iterable | AsyncIterable, plan: ResponsePlan | None = None) -> AsyncIterator[bytes]:
+    """The chunks of the JSON array of the items, one per item."""
+    if not isinstance(items, AsyncIterable):
+        items = iterate_in_threadpool(iter(items))
+    separator, index = b"[", 0
+    async for item in items:
+        if plan is None:
+            chunk = _encode_item(item)
+        else:
+            value, errors = plan.validate(item, loc=("response", index))
+            if errors:
+                raise ResponseValidationError(errors, body=item)
+            chunk = plan.serialize_json(value)
+        yield separator + chunk
+        separator, index = b",", index + 1
+    yield b"]" if index else b"[]"
+
+
+# Also a JSONResponse, so that the docs show the schema of the response model. It's sent like a StreamingResponse.
+class StreamingJSONArrayResponse(StreamingResponse, JSONResponse):
+    media_type = "application/json"
+
+    def __init__(self, content: Iterable | AsyncIterable, status_code: int = 200, headers: Mapping[str, str] | None = None,
+                 media_type: str | None = None, background: BackgroundTask | None = None, plan: ResponsePlan | None = None):
+        super().__init__(json_array(content, plan), status_code, headers, media_type, background)
+
+
+"""Benchmark¶
+Requests a list of more and more ResponseModels (response_model_return_type.py) from a path operation that
+returns the list, and from one that yields the items with StreamingJSONArrayResponse, and gives the time to the
+first byte of the body, the total time, and the peak memory allocated while handling the request."""
+
+
+def _floor(number: int) -> dict:
+    return {"name": f"Valliammai {number}", "description": "Murugan Wife Name", "price": 66.6666, "tax": 6.66,
+            "tags": ["Deivanai", "IndranMagal", "Iravadham"]}
+
+
+async def _request(app, path: str) -> tuple[float, float, bytes]:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "server": ("testserver", 80), "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"testserver")]}
+    start = time.perf_counter()
+    first_byte, last = None, b""
+
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client doesn't disconnect
+
+    async def send(message):
+        nonlocal first_byte, last
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            last = (last + message["body"])[-20:]  # the body is not kept, as a client reading it would do
+
+    await app(scope, receive, send)
+    return (first_byte - start) * 1000, (time.perf_counter() - start) * 1000, last
+
+
+def benchmark_streaming(sizes: tuple[int, ...] = (100, 10_000, 100_000)) -> list[dict]:
+    from fastapi import FastAPI
+
+    from direct_json import DirectJSONRoute
+    from response_model_return_type import ResponseModel
+
+    app = FastAPI()
+    app.router.route_class = DirectJSONRoute
+    results = []
+    for size in sizes:
+        @app.get(f"/list/{size}", response_model=list[ResponseModel])
+        async def list_floors(size: int = size):
+            return [_floor(number) for number in range(size)]
+
+        @app.get(f"/stream/{size}", response_model=list[ResponseModel], response_class=StreamingJSONArrayResponse)
+        async def stream_floors(size: int = size):
+            for number in range(size):
+                yield _floor(number)
+
+        row = {"items": size}
+        for name in ("list", "stream"):
+            asyncio.run(_request(app, f"/{name}/{size}"))
+            first_byte, total, last = asyncio.run(_request(app, f"/{name}/{size}"))
+            assert last.endswith(b"]}]"), name
+            tracemalloc.start()
+            asyncio.run(_request(app, f"/{name}/{size}"))
+            row[name] = (first_byte, total, tracemalloc.get_traced_memory()[1] / 1e6)
+            tracemalloc.stop()
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'items':>8} {'list: first byte, total, peak':>34} {'stream: first byte, total, peak':>36}")
+    for row in benchmark_streaming():
+        cells = [f"{row[name][0]:>8.1f} ms {row[name][1]:>8.1f} ms {row[name][2]:>6.1f} MB" for name in ("list", "stream")]
+        print(f"{row['items']:>8} {cells[0]:>34} {cells[1]:>36}")
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.encoders import jsonable_encoder
+from compiled_encoder import compiled_jsonable_encoder
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -40,6 +41,10 @@ details = {}
 # Remember to import jsonable_encoder from fastapi.encoders
 @app.put("/users/{id}")
 async def get_details(id: str, item: EncoderItem):
-    json_compatible_data = jsonable_encoder(item)
+    json_compatible_data = compiled_jsonable_encoder(item)
     details[id] = json_compatible_data
-    return details[id]
\ No newline at end of file
+    return details[id]
+
+"""Here it's compiled_jsonable_encoder (see compiled_encoder.py): the same result as jsonable_encoder(item), datetime
+in ISO format included, with an encoder built once for EncoderItem instead of checking the type of every value on
+every call."""
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Multi-worker Launcher¶
+fastapi dev basics_tutorials.py (see basics_tutorials.py) runs one process, so it uses one CPU core.
+
+launcher.py forks N worker processes. Each worker opens its own listening socket on the same port with
+SO_REUSEPORT, so the kernel balances the incoming connections between them, without a shared accept()
+queue. The launcher restarts any worker that exits (a crash, or being killed), and stops all of them
+on Ctrl+C or SIGTERM.
+
+Metrics across workers¶
+Every worker has its own MetricsRegistry (see metrics.py). Before forking, the launcher maps an anonymous
+shared memory segment with one slot per worker. Each worker publishes a snapshot of its histograms to its
+slot every second, and when /metrics is requested, so GET /metrics on any worker returns the totals of the
+whole cluster. A restarted worker starts from the snapshot left in its slot, so the totals never go down (a crashed
+worker only loses what it recorded since its last publication).
+
+Each slot begins with a sequence number, odd while the slot is being written (a seqlock), so readers in
+other workers retry instead of reading a half-written snapshot. A worker killed while writing leaves its
+slot odd; the snapshot there is lost, and the next write of the restarted worker makes it even again.
+
+Command to run 4 workers of basics_tutorials.py on port 8000, with GET /metrics:
+python launcher.py basics_tutorials:app --workers 4 --port 8000 --metrics"""
+
+import argparse
+import json
+import mmap
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+import metrics
+
+# Sequence number (u64) and payload length (u32) at the start of every slot.
+SLOT_HEADER = struct.Struct("<QI")
+
+
+class SharedMetrics:
+    """The worker's view of the shared memory segment: it writes its own slot and reads all of them."""
+
+    def __init__(self, segment: mmap.mmap, slot: int, slots: int, slot_size: int):
+        self.segment = segment
+        self.slot = slot
+        self.slots = slots
+        self.slot_size = slot_size
+        self.lock = threading.Lock()
+
+    def publish(self, registry: metrics.MetricsRegistry) -> None:
+        payload = json.dumps(registry.snapshot(), separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            raise ValueError(f"Metrics snapshot of {len(payload)} bytes doesn't fit in a {self.slot_size} bytes slot")
+        offset = self.slot * self.slot_size
+        with self.lock:
+            # sequence | 1, not sequence + 1: a worker killed while writing left the sequence odd, and its
+            # restarted worker must still leave it even once it's done.
+            writing = SLOT_HEADER.unpack_from(self.segment, offset)[0] | 1
+            SLOT_HEADER.pack_into(self.segment, offset, writing, 0)
+            start = offset + SLOT_HEADER.size
+            self.segment[start:start + len(payload)] = payload
+            SLOT_HEADER.pack_into(self.segment, offset, writing + 1, len(payload))
+
+    def read(self, slot: int) -> list:
+        offset = slot * self.slot_size
+        for _ in range(1000):
+            sequence, length = SLOT_HEADER.unpack_from(self.segment, offset)
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            start = offset + SLOT_HEADER.size
+            payload = self.segment[start:start + length]
+            if SLOT_HEADER.unpack_from(self.segment, offset)[0] == sequence:
+                return json.loads(payload) if length else []
+        # The worker died while writing its slot: the snapshot is lost.
+        return []
+
+    def collect(self, registry: metrics.MetricsRegistry) -> metrics.MetricsRegistry:
+        self.publish(registry)
+        cluster = metrics.MetricsRegistry()
+        for slot in range(self.slots):
+            cluster.merge(self.read(slot))
+        return cluster
+
+    def publish_every(self, registry: metrics.MetricsRegistry, interval: float) -> None:
+        def run():
+            while True:
+                time.sleep(interval)
+                self.publish(registry)
+
+        threading.Thread(target=run, name="metrics-publisher", daemon=True).start()
+
+
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(args: argparse.Namespace, shared: SharedMetrics) -> None:
+    """Runs in the forked process: import the app, bind the port and serve until stopped."""
+    import uvicorn
+    from uvicorn.importer import import_from_string
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Start from what the previous worker in this slot had recorded, if any.
+    metrics.registry.merge(shared.read(shared.slot))
+    metrics.registry.cluster = shared
+    app = import_from_string(args.app)
+    if args.metrics:
+        metrics.add_metrics(app)
+    shared.publish_every(metrics.registry, args.publish_interval)
+    sock = _listen(args.host, args.port, args.backlog)
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Launcher:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.segment = mmap.mmap(-1, args.workers * args.slot_size)
+        self.workers: dict[int, int] = {}  # pid -> slot
+        self.started: dict[int, float] = {}  # slot -> start time
+        self.stopping = False
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.args, SharedMetrics(self.segment, slot, self.args.workers, self.args.slot_size))
+            except BaseException:
+                import traceback
+
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = slot
+        self.started[slot] = time.monotonic()
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        print(f"Launcher {os.getpid()}: {self.args.workers} workers on http://{self.args.host}:{self.args.port}")
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self.workers.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            print(f"Worker {pid} exited ({_describe(status)}), restarting it", file=sys.stderr)
+            # Don't restart in a tight loop when the worker fails right away (e.g. a broken import).
+            if time.monotonic() - self.started[slot] < 1:
+                time.sleep(1)
+            self.spawn(slot)
+
+
+def _describe(status: int) -> str:
+    if os.WIFSIGNALED(status):
+        return f"signal {signal.Signals(os.WTERMSIG(status)).name}"
+    return f"exit code {os.waitstatus_to_exitcode(status)}"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a FastAPI app in several worker processes.")
+    parser.add_argument("app", help="The app to run, as module:attribute, e.g. basics_tutorials:app")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--metrics", action="store_true", help="Add GET /metrics with the totals of all the workers")
+    parser.add_argument("--publish-interval", type=float, default=1.0, help="Seconds between metrics publications")
+    parser.add_argument("--slot-size", type=int, default=4 * 1024 * 1024, help="Shared memory bytes per worker")
+    parser.add_argument("--log-level", default="info")
+    Launcher(parser.parse_args(argv)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Lazy App Factory¶
+Importing a tutorial module like response_model_return_type.py or body_nested_models.py does all
+the expensive work up front: every Pydantic model builds its validator and serializer when the class
+is defined, and every path operation decorator builds its dependant, body field and response field.
+
+On a cold start that cost is paid before the first request, even for routes that are rarely hit.
+
+create_app() imports a tutorial module in a lazy mode:
+
+Pydantic models are declared with defer_build, so their validators are built on first use.
+Path operations are registered as LazyAPIRoute, which only compiles the path (so routing still works)
+and builds the full APIRoute on the first request that matches it, or when warmup() is called. The models
+of its parameters and of its response are built first.
+
+Only the tutorial module itself is imported that way: its `from fastapi import FastAPI` and
+`from pydantic import BaseModel` get LazyFastAPI and LazyBaseModel, through an __import__ of its own.
+Nothing is patched, so the modules it imports, and the rest of the process, are left as they are.
+
+Every step is timed, and startup_report() prints the import time per module and the build time per route.
+
+Command to print the startup report for some modules (or all of them):
+python lazy_app.py body_nested_models response_model_return_type
+python lazy_app.py --warmup"""
+
+import builtins
+import inspect
+import sys
+import time
+import types
+import typing
+from pathlib import Path
+
+import fastapi
+import pydantic
+from fastapi import FastAPI, params
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ConfigDict
+from starlette.routing import compile_path, get_name
+
+from tutorials import TUTORIALS_DIR, import_tutorial, tutorial_paths
+
+
+class LazyAPIRoute(APIRoute):
+    """APIRoute that keeps its arguments and only builds itself when one of the attributes
+    that need the full build (app, dependant, response_field, ...) is first accessed."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        self._lazy_args = (path, endpoint, kwargs)
+        self.build_seconds = None
+        self.path = path
+        self.endpoint = endpoint
+        self.name = get_name(endpoint) if kwargs.get("name") is None else kwargs["name"]
+        self.path_regex, self.path_format, self.param_convertors = compile_path(path)
+        self.methods = {method.upper() for method in kwargs.get("methods") or ["GET"]}
+        self.include_in_schema = kwargs.get("include_in_schema", True)
+
+    @property
+    def is_built(self) -> bool:
+        return "_lazy_args" not in self.__dict__
+
+    def build(self) -> "LazyAPIRoute":
+        if not self.is_built:
+            path, endpoint, kwargs = self.__dict__.pop("_lazy_args")
+            start = time.perf_counter()
+            _complete_models(endpoint, kwargs.get("response_model"), *kwargs.get("dependencies") or ())
+            APIRoute.__init__(self, path, endpoint, **kwargs)
+            self.build_seconds = time.perf_counter() - start
+        return self
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set yet, i.e. the ones APIRoute.__init__ sets.
+        if name.startswith("__") or "_lazy_args" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.build(), name)
+
+
+def _complete_models(*values, seen: set | None = None) -> None:
+    """Build the deferred models found in the types, and in the signatures of the functions, given."""
+    seen = set() if seen is None else seen
+    for value in values:
+        if isinstance(value, params.Depends):
+            value = value.dependency
+        if value is None or isinstance(value, (str, int, float, bool)) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, type) and issubclass(value, BaseModel):
+            if not value.__pydantic_complete__:
+                value.model_rebuild()
+            # Built: the field FastAPI wraps it in is then built with the route too, not deferred to the first
+            # request, where Pydantic warns that the alias of that field "has no effect".
+            value.model_config = {**value.model_config, "defer_build": False}
+        elif typing.get_origin(value) is not None:
+            _complete_models(*typing.get_args(value), *getattr(value, "__metadata__", ()), seen=seen)
+        elif callable(value) and not isinstance(value, type):
+            try:
+                hints = typing.get_type_hints(value, include_extras=True)
+                defaults = [parameter.default for parameter in inspect.signature(value).parameters.values()]
+            except (NameError, TypeError, ValueError):
+                continue
+            _complete_models(*hints.values(), *defaults, seen=seen)
+
+
+class LazyFastAPI(FastAPI):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router.route_class = LazyAPIRoute
+
+
+class LazyBaseModel(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+
+class _ModuleView(types.ModuleType):
+    """A module with some of its attributes replaced, for the module that imports it only."""
+
+    def __init__(self, module: types.ModuleType, **replaced):
+        super().__init__(module.__name__, module.__doc__)
+        self.__dict__.update(replaced)
+        self.__wrapped__ = module
+
+    def __getattr__(self, name: str):
+        return getattr(self.__wrapped__, name)
+
+
+_LAZY_MODULES = {
+    "fastapi": _ModuleView(fastapi, FastAPI=LazyFastAPI),
+    "pydantic": _ModuleView(pydantic, BaseModel=LazyBaseModel),
+}
+
+
+def _lazy_import(name, globals=None, locals=None, fromlist=(), level=0):
+    module = builtins.__import__(name, globals, locals, fromlist, level)
+    if level == 0 and name in _LAZY_MODULES:
+        return _LAZY_MODULES[name]
+    return module
+
+
+import_seconds: dict[str, float] = {}
+app_modules: dict[int, object] = {}
+
+
+def create_app(module: str | Path) -> FastAPI:
+    """Import a tutorial module in lazy mode and return its app.
+
+    The module must not have been imported before, otherwise its eagerly built app is returned."""
+    path = Path(module) if str(module).endswith(".py") else TUTORIALS_DIR / f"{module}.py"
+    start = time.perf_counter()
+    module = import_tutorial(path, {"__builtins__": {**vars(builtins), "__import__": _lazy_import}})
+    import_seconds.setdefault(path.stem, time.perf_counter() - start)
+    app_modules[id(module.app)] = module
+    return module.app
+
+
+def create_apps() -> dict[str, FastAPI]:
+    """Lazy version of tutorials.load_tutorial_apps(), e.g. for Gateway(create_apps())."""
+    return {path.stem: create_app(path) for path in tutorial_paths()}
+
+
+def lazy_routes(app: FastAPI) -> list[LazyAPIRoute]:
+    return [route for route in app.router.routes if isinstance(route, LazyAPIRoute)]
+
+
+def warmup(app: FastAPI) -> None:
+    """Build every route and every deferred model of the app now instead of on first request."""
+    for route in lazy_routes(app):
+        route.build()
+    module = app_modules.get(id(app))
+    for value in list(vars(module).values()) if module else ():
+        if (
+            isinstance(value, type)
+            and issubclass(value, BaseModel)
+            and value.__module__ == module.__name__
+            and not value.__pydantic_complete__
+        ):
+            value.model_rebuild()
+
+
+def startup_report(apps: dict[str, FastAPI]) -> str:
+    lines = [f"{'module / route':<60} {'ms':>9}"]
+    for name, app in apps.items():
+        lines.append(f"{name:<60} {import_seconds.get(name, 0) * 1000:>9.2f}")
+        for route in lazy_routes(app):
+            label = f"  {','.join(sorted(route.methods))} {route.path}"
+            timing = f"{route.build_seconds * 1000:>9.3f}" if route.is_built else f"{'deferred':>9}"
+            lines.append(f"{label:<60} {timing}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    modules = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    apps = {module: create_app(module) for module in modules} if modules else create_apps()
+    if "--warmup" in sys.argv:
+        for app in apps.values():
+            warmup(app)
+    print(startup_report(apps))
@@ -0,0 +1,186 @@
+"""Lazy Nested Models¶
+create_item(offer: Offer) in body_nested_models.py doesn't run before the whole Offer is validated: every
+TModItem, every TModImage in them, every URL. For a large offer whose handler only reads offer.name, or
+passes the items along without looking at them, that's most of the request time for nothing.
+
+LazyList[T] is a list field that is only checked to be a list up front. Its items are kept as they came
+in the body, and validated as list[T] the first time they are used (iterated, indexed, compared, or
+serialized in the response):
+
+class LazyOffer(LazyModel):
+    name: str
+    description: str | None = None
+    items: LazyList[TModItem]
+
+The top-level fields are validated as usual before the handler runs. When the items are invalid, the
+first access raises a RequestValidationError with all their errors, in the same shape and with the same
+loc as eager validation (["body", "items", 0, "price"]), so the client still gets a 422. len() doesn't
+need the items, so it doesn't validate them. When the top-level fields themselves are invalid, the 422 only
+has their errors: the items aren't looked at.
+
+A LazyModel validates its lazy lists when an instance of it is validated again, which is what FastAPI does first
+with the value a path operation returns for its response_model, and before it's dumped (jsonable_encoder). So
+returning the offer as is from the handler also gives that 422, before the response is serialized: an error
+raised while serializing would be wrapped by Pydantic, and end up as a 500. The RequestValidationError is not
+a ValueError, so Pydantic lets it through the validation as it is.
+
+The price of it: an offer whose items are never used is never fully validated, and a handler that does
+something before using the items has done it by the time the 422 comes. Only use it for a body parameter
+that is the whole body (not embedded), whose lists are mostly passed through.
+
+The JSON Schema (and so the docs) is the same as with list[T].
+
+Command to run the benchmark with the Offer payload of body_nested_models.py:
+python lazy_models.py --benchmark"""
+
+import sys
+import time
+import typing
+from collections.abc import Sequence
+from typing import Any, Generic, TypeVar
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, GetCoreSchemaHandler, TypeAdapter, ValidationError, model_validator
+from pydantic_core import core_schema
+
+T = TypeVar("T")
+
+_LIST = TypeAdapter(list)
+
+
+class LazyList(Sequence[T], Generic[T]):
+    __slots__ = ("_raw", "_items", "_adapter", "_loc")
+
+    def __init__(self, raw: list, adapter: TypeAdapter, loc: tuple = ()):
+        self._raw = raw
+        self._items = None
+        self._adapter = adapter
+        self._loc = loc
+
+    @property
+    def is_validated(self) -> bool:
+        return self._items is not None
+
+    def validated(self) -> list[T]:
+        if self._items is None:
+            errors = self.errors()
+            if errors:
+                raise RequestValidationError(errors)
+        return self._items
+
+    def errors(self) -> list[dict]:
+        """Validate the items, if not done yet, and return the errors, with their loc in the body."""
+        if self._items is None:
+            try:
+                self._items = self._adapter.validate_python(self._raw)
+            except ValidationError as exc:
+                return [{**error, "loc": ("body", *self._loc, *error["loc"])} for error in exc.errors(include_url=False)]
+            self._raw = None
+        return []
+
+    def __len__(self) -> int:
+        return len(self._raw) if self._items is None else len(self._items)
+
+    def __getitem__(self, index):
+        return self.validated()[index]
+
+    def __iter__(self):
+        return iter(self.validated())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyList):
+            other = other.validated()
+        return self.validated() == other
+
+    def __repr__(self) -> str:
+        if self._items is None:
+            return f"LazyList(<{len(self._raw)} items, not validated>)"
+        return f"LazyList({self._items!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        (item_type,) = typing.get_args(source) or (Any,)
+        list_type = list[item_type]
+        adapter = None
+
+        def validate(value: Any, info: core_schema.ValidationInfo) -> LazyList:
+            nonlocal adapter
+            if isinstance(value, LazyList):
+                return value
+            if adapter is None:
+                adapter = TypeAdapter(list_type)
+            # Only the list itself is checked now, with the same error as list[T].
+            return cls(_LIST.validate_python(value), adapter, (info.field_name,) if info.field_name else ())
+
+        def serialize(value: LazyList) -> list:
+            # The items themselves are serialized by the return schema, list[T], with the options of the dump.
+            return value.validated()
+
+        return core_schema.with_info_plain_validator_function(
+            validate,
+            json_schema_input_schema=handler.generate_schema(list_type),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                serialize, return_schema=handler.generate_schema(list_type)
+            ),
+        )
+
+
+class LazyModel(BaseModel):
+    @model_validator(mode="wrap")
+    @classmethod
+    def _validate_lazy_of_instances(cls, value: Any, handler) -> Any:
+        model = handler(value)
+        # An instance, not a body: e.g. the one returned by a path operation, validated for its response_model.
+        if isinstance(value, LazyModel):
+            model.validate_lazy()
+        return model
+
+    def validate_lazy(self) -> None:
+        """Validate all the lazy lists now, and raise the errors of all of them at once."""
+        errors = []
+        for name in type(self).model_fields:
+            value = getattr(self, name)
+            if isinstance(value, LazyList):
+                errors.extend(value.errors())
+        if errors:
+            raise RequestValidationError(errors)
+
+    def model_dump(self, **kwargs) -> dict[str, Any]:
+        self.validate_lazy()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        self.validate_lazy()
+        return super().model_dump_json(**kwargs)
+
+
+"""Benchmark¶
+Validates an Offer and a LazyOffer (see body_nested_models.py) with thousands of items, decoded from the same
+body, for a handler that only reads the name, and for one that uses all the items."""
+
+
+def benchmark_offer(items: int = 5000, rounds: int = 5) -> dict:
+    import json
+
+    from body_nested_models import LazyOffer, Offer
+    from url_cache import offer_payload
+
+    decoded = json.loads(offer_payload(items))
+    results = {}
+    for name, read_items in (("name only", False), ("all items", True)):
+        for model in (Offer, LazyOffer):
+            model.model_validate(decoded)  # warm up
+            start = time.perf_counter()
+            for _ in range(rounds):
+                offer = model.model_validate(decoded)
+                offer.name
+                if read_items:
+                    [item.price for item in offer.items]
+            results[f"{model.__name__}, {name}"] = (time.perf_counter() - start) / rounds * 1000
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print("Offer with 5000 items, 4 images each")
+    for name, ms in benchmark_offer().items():
+        print(f"{name + ':':<22} {ms:>7.2f} ms")
@@ -0,0 +1,435 @@
+"""Load Benchmark¶
+Drives every path operation of the tutorial apps through an in-process ASGI transport (no sockets,
+no server), so the numbers only measure FastAPI, Starlette, Pydantic and our own code.
+
+Requests are generated from each app's OpenAPI document, which FastAPI builds from the path operation
+signatures and models: path, query, header and cookie parameters and JSON or form bodies get a sample
+value from their schema (examples and defaults first, then one that satisfies the declared constraints).
+A schema can't tell which IDs exist, so path and query parameters are also tried with the keys of the
+module's own data (items, products, ...), the ones named like the parameter or the path first. Optional
+headers and cookies without an example are left out. The first of those requests that gets a 2xx/3xx
+response is the one used for the load.
+
+For each endpoint it reports:
+
+Throughput (requests per second) at the given concurrency.
+p50, p99 and p999 latency, in microseconds.
+The peak memory allocated while handling one request (traced with tracemalloc), in bytes. It's not
+a count of allocations: a request that allocates and frees many small objects can peak low.
+The share of responses that were not 2xx/3xx (e.g. a path operation shadowed by another one).
+
+The results can be saved as a JSON baseline, and a later run can be compared against it: endpoints whose
+throughput dropped, or whose p99 latency or peak memory grew, by more than the threshold are flagged.
+
+Command to run it for some modules (or all of them):
+python load_benchmark.py body_nested_models path_parameters --requests 2000 --concurrency 16
+python load_benchmark.py --save baseline.json
+python load_benchmark.py --compare baseline.json --threshold 0.1"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import sys
+import time
+import tracemalloc
+import uuid
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from urllib.parse import quote, urlencode
+
+from starlette.types import ASGIApp
+
+from tutorials import load_tutorial_apps
+
+
+@dataclass
+class GeneratedRequest:
+    method: str
+    path: str
+    query: list[tuple[str, str]]
+    headers: list[tuple[bytes, bytes]]
+    body: bytes = b""
+
+
+@dataclass
+class EndpointResult:
+    endpoint: str
+    requests: int
+    throughput: float
+    p50_us: float
+    p99_us: float
+    p999_us: float
+    peak_alloc_bytes: int
+    error_rate: float
+
+
+"""In-process ASGI transport¶"""
+
+
+async def asgi_request(app: ASGIApp, request: GeneratedRequest) -> tuple[int, bytes]:
+    """Send one request to the ASGI app and return (status code, body)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": request.method,
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+        "root_path": "",
+        "path": request.path,
+        "raw_path": request.path.encode(),
+        "query_string": urlencode(request.query).encode(),
+        "headers": [(b"host", b"testserver"), *request.headers],
+    }
+    request_sent = False
+    status, chunks = 500, []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": request.body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # The ServerErrorMiddleware has already sent the 500 and re-raises for the server to log.
+        status = 500
+    return status, b"".join(chunks)
+
+
+"""Sample values from JSON schemas¶"""
+
+
+def _resolve(schema: dict, components: dict) -> dict:
+    while "$ref" in schema:
+        schema = components[schema["$ref"].rsplit("/", 1)[-1]]
+    return schema
+
+
+def _sample_string(schema: dict) -> str:
+    formats = {
+        "email": "user@example.com",
+        "uri": "https://example.com/",
+        "date-time": "2024-01-01T00:00:00",
+        "date": "2024-01-01",
+        "time": "12:00:00",
+        "duration": "P1D",
+        "uuid": str(uuid.UUID(int=1)),
+        "binary": "data",
+    }
+    if schema.get("format") in formats:
+        return formats[schema["format"]]
+    pattern = schema.get("pattern")
+    if pattern and not re.search(r"[\\\[\](){}.*+?|]", pattern.strip("^$")):
+        return pattern.strip("^$")  # a plain literal pattern like ^fixedquery$
+    value = "string"
+    min_length, max_length = schema.get("minLength", 0), schema.get("maxLength")
+    value = value.ljust(min_length, "x")
+    return value[:max_length] if max_length is not None else value
+
+
+def _sample_number(schema: dict, integer: bool):
+    low = schema.get("minimum", schema.get("exclusiveMinimum"))
+    high = schema.get("maximum", schema.get("exclusiveMaximum"))
+    if low is not None and high is not None:
+        value = (low + high) / 2
+    elif low is not None:
+        value = low + 1
+    elif high is not None:
+        value = high - 1
+    else:
+        value = 1
+    return int(value) if integer else float(value)
+
+
+def sample_value(schema: dict, components: dict, depth: int = 0):
+    schema = _resolve(schema, components)
+    for key in ("examples", "example", "default", "const", "enum"):
+        if key in schema and schema[key] is not None:
+            value = schema[key]
+            return value[0] if key in ("examples", "enum") and isinstance(value, list) and value else value
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [_resolve(option, components) for option in schema[key]]
+            options = [option for option in options if option.get("type") != "null"] or options
+            return sample_value(options[0], components, depth)
+    if "allOf" in schema:
+        merged = {}
+        for part in schema["allOf"]:
+            merged.update(_resolve(part, components))
+        return sample_value(merged, components, depth)
+    kind = schema.get("type", "object")
+    if kind == "string":
+        return _sample_string(schema)
+    if kind in ("integer", "number"):
+        return _sample_number(schema, kind == "integer")
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    if kind == "array":
+        if depth > 8:
+            return []
+        items = [sample_value(schema.get("items", {}), components, depth + 1)]
+        return items * max(schema.get("minItems", 1), 1) if not schema.get("uniqueItems") else items
+    if depth > 8:
+        return {}
+    value = {name: sample_value(prop, components, depth + 1) for name, prop in schema.get("properties", {}).items()}
+    if not value and isinstance(schema.get("additionalProperties"), dict):
+        value["1"] = sample_value(schema["additionalProperties"], components, depth + 1)
+    return value
+
+
+def _encode_multipart(fields: dict, schema: dict, components: dict) -> tuple[bytes, bytes]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        prop = _resolve(schema.get("properties", {}).get(name, {}), components)
+        options = [_resolve(option, components) for option in prop.get("anyOf", [])]
+        prop = next((option for option in options if option.get("type") != "null"), prop)  # UploadFile | None
+        item_schema = _resolve(prop.get("items", {}), components) if prop.get("type") == "array" else prop
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            if item_schema.get("format") == "binary" or item_schema.get("contentMediaType"):
+                disposition = f'form-data; name="{name}"; filename="{name}.bin"'
+                parts.append(f"--{boundary}\r\nContent-Disposition: {disposition}\r\n"
+                             f"Content-Type: application/octet-stream\r\n\r\n{item}\r\n")
+            else:
+                item = json.dumps(item) if isinstance(item, (dict, list)) else item
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{item}\r\n')
+    body = ("".join(parts) + f"--{boundary}--\r\n").encode()
+    return body, f"multipart/form-data; boundary={boundary}".encode()
+
+
+_SAMPLE_KEYS = ("examples", "example", "default", "const", "enum")
+MAX_CANDIDATES = 16
+
+
+def _data_values(data: dict, name: str, template: str, schema: dict) -> list:
+    """The keys of the module's mappings that fit the parameter, from the mappings named like it
+    (item_id: items) or like a segment of the path first."""
+    kind = schema.get("type")
+    if kind not in ("string", "integer") or any(key in schema for key in _SAMPLE_KEYS):
+        return []
+    key_type = int if kind == "integer" else str
+    stem = name.lower().removesuffix("_id")
+    related = {stem, stem + "s", *(segment.lower() for segment in re.findall(r"[A-Za-z_]+", template.split("{")[0]))}
+    mappings = [
+        (attr.lower() not in related, list(value)[:5])
+        for attr, value in data.items()
+        if not attr.startswith("_") and isinstance(value, Mapping) and value
+        and all(type(key) is key_type for key in value)
+    ]
+    mappings.sort(key=lambda mapping: mapping[0])
+    return list(dict.fromkeys(key for _, keys in mappings for key in keys))
+
+
+def _parameter_values(parameter: dict, template: str, components: dict, data: dict) -> list:
+    """The values to try for a parameter, in order. None means: left out."""
+    schema = _resolve(parameter.get("schema", {}), components)
+    options = [_resolve(option, components) for option in schema.get("anyOf", [])]
+    plain = next((option for option in options if option.get("type") != "null"), schema)
+    sample = sample_value(schema, components)
+    if parameter["in"] in ("header", "cookie"):
+        has_example = any(key in schema for key in ("examples", "example"))
+        return [sample] if parameter.get("required") or has_example else [None]
+    if parameter["in"] not in ("path", "query"):
+        return [sample]
+    values = [*_data_values(data, parameter["name"], template, plain), sample]
+    return values if parameter.get("required") else [*values, None]
+
+
+def generate_requests(app, data: dict | None = None) -> list[tuple[str, list[GeneratedRequest]]]:
+    """Return (endpoint label, candidate requests) for every operation in the app's OpenAPI document.
+    data are the module's globals, whose mappings give the candidate IDs; the most likely valid
+    request comes first."""
+    openapi = app.openapi()
+    components = openapi.get("components", {}).get("schemas", {})
+    data = data or {}
+    generated = []
+    for template, operations in openapi.get("paths", {}).items():
+        for method, operation in operations.items():
+            parameters = operation.get("parameters", [])
+            choices = [_parameter_values(parameter, template, components, data) for parameter in parameters]
+            body, body_headers = b"", []
+            content = operation.get("requestBody", {}).get("content", {})
+            if "application/json" in content:
+                body = json.dumps(sample_value(content["application/json"]["schema"], components)).encode()
+                body_headers.append((b"content-type", b"application/json"))
+            elif "multipart/form-data" in content:
+                schema = _resolve(content["multipart/form-data"]["schema"], components)
+                body, content_type = _encode_multipart(sample_value(schema, components), schema, components)
+                body_headers.append((b"content-type", content_type))
+            elif "application/x-www-form-urlencoded" in content:
+                fields = sample_value(content["application/x-www-form-urlencoded"]["schema"], components)
+                body = urlencode(fields, doseq=True).encode()
+                body_headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+            if body:
+                body_headers.append((b"content-length", str(len(body)).encode()))
+            candidates = []
+            for combination in itertools.islice(itertools.product(*choices), MAX_CANDIDATES):
+                path, query, headers, cookies = template, [], [], []
+                for parameter, value in zip(parameters, combination):
+                    if value is None:
+                        continue
+                    values = value if isinstance(value, list) else [value]
+                    if parameter["in"] == "path":
+                        path = path.replace("{" + parameter["name"] + "}", quote(str(value), safe="/"))
+                    elif parameter["in"] == "query":
+                        query += [(parameter["name"], json.dumps(v) if isinstance(v, bool) else str(v)) for v in values]
+                    elif parameter["in"] == "header":
+                        headers.append((parameter["name"].lower().encode(), ", ".join(map(str, values)).encode()))
+                    elif parameter["in"] == "cookie":
+                        cookies.append(f"{parameter['name']}={value}")
+                if cookies:
+                    headers.append((b"cookie", "; ".join(cookies).encode()))
+                candidates.append(GeneratedRequest(method.upper(), path, query, headers + body_headers, body))
+            generated.append((f"{method.upper()} {template}", candidates))
+    return generated
+
+
+async def first_valid(app: ASGIApp, candidates: list[GeneratedRequest]) -> GeneratedRequest:
+    """The first candidate that gets a 2xx/3xx response, or else the first one."""
+    for request in candidates:
+        status, _ = await asgi_request(app, request)
+        if status < 400:
+            return request
+    return candidates[0]
+
+
+"""Running the load¶"""
+
+
+def _percentile(sorted_values: list[int], fraction: float) -> float:
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index] / 1000
+
+
+async def _peak_alloc_bytes(app: ASGIApp, request: GeneratedRequest, samples: int = 20) -> int:
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(samples):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await asgi_request(app, request)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+async def run_endpoint(app: ASGIApp, endpoint: str, request: GeneratedRequest,
+                       requests: int, concurrency: int) -> EndpointResult:
+    for _ in range(min(requests, 20)):
+        await asgi_request(app, request)  # warm up caches and lazily built validators
+    latencies: list[int] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter_ns()
+            status, _ = await asgi_request(app, request)
+            latencies.append(time.perf_counter_ns() - start)
+            errors += status >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return EndpointResult(
+        endpoint=endpoint,
+        requests=requests,
+        throughput=requests / elapsed,
+        p50_us=_percentile(latencies, 0.50),
+        p99_us=_percentile(latencies, 0.99),
+        p999_us=_percentile(latencies, 0.999),
+        peak_alloc_bytes=await _peak_alloc_bytes(app, request),
+        error_rate=errors / requests,
+    )
+
+
+async def run_benchmark(apps: dict, requests: int = 1000, concurrency: int = 8) -> list[EndpointResult]:
+    results = []
+    for module, app in apps.items():
+        data = vars(sys.modules[module]) if module in sys.modules else {}
+        for endpoint, candidates in generate_requests(app, data):
+            request = await first_valid(app, candidates)
+            result = await run_endpoint(app, f"{module} {endpoint}", request, requests, concurrency)
+            results.append(result)
+    return results
+
+
+"""Baselines¶"""
+
+
+def compare(results: list[EndpointResult], baseline: dict, threshold: float = 0.1) -> list[str]:
+    """Return a description of every endpoint that regressed by more than the threshold."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.endpoint)
+        if previous is None:
+            continue
+        checks = [
+            ("throughput", previous["throughput"] / max(result.throughput, 1e-9) - 1),
+            ("p99_us", result.p99_us / max(previous["p99_us"], 1e-9) - 1),
+            ("peak_alloc_bytes", result.peak_alloc_bytes / max(previous["peak_alloc_bytes"], 1) - 1),
+        ]
+        for metric, change in checks:
+            if change > threshold:
+                regressions.append(f"{result.endpoint}: {metric} {previous[metric]:.1f} -> "
+                                   f"{getattr(result, metric):.1f} ({change:+.0%} worse)")
+    return regressions
+
+
+def format_results(results: list[EndpointResult]) -> str:
+    lines = [f"{'endpoint':<70} {'req/s':>9} {'p50 us':>9} {'p99 us':>9} {'p999 us':>9} {'peak alloc B':>12} {'errors':>7}"]
+    for r in results:
+        lines.append(f"{r.endpoint[:70]:<70} {r.throughput:>9.0f} {r.p50_us:>9.1f} {r.p99_us:>9.1f} "
+                     f"{r.p999_us:>9.1f} {r.peak_alloc_bytes:>12} {r.error_rate:>7.0%}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the tutorial apps")
+    parser.add_argument("modules", nargs="*", help="tutorial modules to run (default: all)")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--save", metavar="FILE", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed regression (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    apps = load_tutorial_apps(names=args.modules or None)
+    results = asyncio.run(run_benchmark(apps, args.requests, args.concurrency))
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({r.endpoint: asdict(r) for r in results}, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
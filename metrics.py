@@ -0,0 +1,245 @@
+"""Metrics¶
+Built-in latency metrics per path operation, without an external APM.
+
+MetricsMiddleware times every request and records it in an HDR-style histogram keyed by the method,
+the route template (e.g. /items/{item_id}, not /items/42, so the number of series stays bounded) and the
+status code. An HDR histogram has logarithmic buckets with linear sub-buckets, so it keeps a fixed relative
+precision (here 2 significant digits) from microseconds to minutes, and recording is just an index
+computation and a list increment.
+
+add_metrics(app) installs the middleware and a GET /metrics path operation that exposes the data in the
+Prometheus text format:
+
+http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",status="200",le="0.005"} 42
+...
+http_request_duration_seconds_sum{method="GET",route="/items/{item_id}",status="200"} 0.0831
+http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 57
+
+Command to run the overhead benchmark:
+python metrics.py --benchmark"""
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Buckets exposed to Prometheus, in seconds. The HDR histogram keeps much finer buckets.
+PROMETHEUS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """HDR histogram of integer values (microseconds), with 2 significant digits of precision
+    and values up to max_value (larger values are clamped)."""
+
+    sub_bucket_bits = 8  # 2 ** 8 = 256 >= 2 * 10 ** 2
+    sub_bucket_count = 1 << sub_bucket_bits
+    sub_bucket_half = sub_bucket_count >> 1
+
+    __slots__ = ("counts", "count", "sum", "max_value")
+
+    def __init__(self, max_value: int = 60_000_000):
+        self.max_value = max_value
+        self.counts = [0] * (self.index(max_value) + 1)
+        self.count = 0
+        self.sum = 0
+
+    @classmethod
+    def index(cls, value: int) -> int:
+        if value < cls.sub_bucket_count:
+            return value
+        shift = value.bit_length() - cls.sub_bucket_bits
+        return cls.sub_bucket_count + (shift - 1) * cls.sub_bucket_half + (value >> shift) - cls.sub_bucket_half
+
+    @classmethod
+    def highest_value(cls, index: int) -> int:
+        """The highest value that is recorded at this index."""
+        if index < cls.sub_bucket_count:
+            return index
+        shift, sub_bucket = divmod(index - cls.sub_bucket_count, cls.sub_bucket_half)
+        shift += 1
+        return ((sub_bucket + cls.sub_bucket_half + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        if value > self.max_value:
+            value = self.max_value
+        if value < 256:
+            self.counts[value] += 1
+        else:
+            # Same as index(), inlined: this runs for every request.
+            shift = value.bit_length() - 8
+            self.counts[(shift << 7) + (value >> shift)] += 1
+        self.count += 1
+        self.sum += value
+
+    def value_at_quantile(self, quantile: float) -> int:
+        target = max(1, round(quantile * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.highest_value(index)
+        return 0
+
+    def cumulative_counts(self, bounds_us: list[int]) -> list[int]:
+        """Number of recorded values <= each bound (bounds sorted ascending)."""
+        result, seen, position = [], 0, 0
+        for bound in bounds_us:
+            last = min(self.index(bound), len(self.counts) - 1)
+            # Only buckets that end at or below the bound are counted as "le" the bound.
+            if self.highest_value(last) > bound:
+                last -= 1
+            while position <= last:
+                seen += self.counts[position]
+                position += 1
+            result.append(seen)
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: dict[tuple[str, str, int], Histogram] = {}
+        # Set by launcher.py in multi-worker mode, to render the totals of all the workers.
+        self.cluster = None
+
+    def record(self, method: str, route: str, status: int, duration_us: int) -> None:
+        key = (method, route, status)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.record(duration_us)
+
+    def snapshot(self) -> list:
+        """The histograms as plain lists, [method, route, status, sum, [index, count, index, count, ...]],
+        to send them to another process. Only the non-empty buckets are included."""
+        snapshot = []
+        for (method, route, status), histogram in list(self.histograms.items()):
+            counts = [value for index, count in enumerate(list(histogram.counts)) if count for value in (index, count)]
+            snapshot.append([method, route, status, histogram.sum, counts])
+        return snapshot
+
+    def merge(self, snapshot: list) -> None:
+        """Add the values of a snapshot() to this registry."""
+        for method, route, status, total, counts in snapshot:
+            key = (method, route, status)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            for index, count in zip(counts[::2], counts[1::2]):
+                histogram.counts[index] += count
+                histogram.count += count
+            histogram.sum += total
+
+    def collect(self) -> "MetricsRegistry":
+        """The registry to expose: this one, or the merged registries of all the workers."""
+        if self.cluster is None:
+            return self
+        return self.cluster.collect(self)
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        name = "http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Latency of HTTP requests by route template and status code.",
+            f"# TYPE {name} histogram",
+        ]
+        bounds_us = [round(bound * 1_000_000) for bound in PROMETHEUS_BUCKETS]
+        for (method, route, status), histogram in sorted(self.histograms.items()):
+            labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+            for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts(bounds_us)):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum / 1_000_000}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root_path = scope.get("root_path", "")
+        status = 500
+        start = time.perf_counter_ns()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; mounted apps extend the root_path.
+            route = scope.get("route")
+            template = getattr(route, "path_format", None)
+            if template is None:
+                template = "<unmatched>"
+            else:
+                template = scope.get("root_path", "")[len(root_path):] + template
+            duration_us = (time.perf_counter_ns() - start) // 1000
+            self.registry.record(scope["method"], template, status, duration_us)
+
+
+def add_metrics(app: FastAPI, path: str = "/metrics", registry: MetricsRegistry = registry) -> None:
+    """Record the latency of every request of the app and expose it on GET /metrics."""
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get(path, include_in_schema=False)
+    async def get_metrics():
+        return PlainTextResponse(registry.collect().render(), media_type="text/plain; version=0.0.4")
+
+
+"""Overhead benchmark¶
+Measures the cost of Histogram.record() alone, and of the whole middleware around an ASGI app that does nothing."""
+
+
+async def _time_calls(app: ASGIApp, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    route = type("Route", (), {"path_format": "/items/{item_id}"})()
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/items/1", "root_path": "", "route": route}, receive, send)
+    return (time.perf_counter_ns() - start) / requests
+
+
+async def _noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+
+def benchmark_overhead(requests: int = 200_000) -> dict:
+    histogram = Histogram()
+    start = time.perf_counter_ns()
+    record = histogram.record
+    for value in range(requests):
+        record(value)
+    record_ns = (time.perf_counter_ns() - start) / requests
+    bare_ns = asyncio.run(_time_calls(_noop_app, requests))
+    instrumented_ns = asyncio.run(_time_calls(MetricsMiddleware(_noop_app, MetricsRegistry()), requests))
+    return {"record_ns": record_ns, "middleware_ns": instrumented_ns - bare_ns}
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    results = benchmark_overhead()
+    print(f"Histogram.record():       {results['record_ns']:>8.0f} ns")
+    print(f"MetricsMiddleware per req: {results['middleware_ns']:>7.0f} ns")
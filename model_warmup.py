@@ -0,0 +1,203 @@
+"""Model Warmup¶
+Every Pydantic model used by a path operation (a body like Materials, Items, UserDetails or Offer, a response
+model, the models nested in them) has a validator built for it, at import, or on first use with defer_build
+(see lazy_app.py). Nothing tells how much each one costs, to build or to run.
+
+warmup_models(app) builds the validators that are not built yet (the models declared with defer_build) of the
+models referenced by the routes of an app, and times them. The others were built at import, and are left as
+they are. Called at startup, the first request doesn't pay for the deferred ones:
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_models(app)
+    yield
+
+validation_report() is the tool to find the expensive ones, not something to run at startup: it builds the
+validator of every model again to time it (model_timings()), then runs each model against its declared
+examples, and gives the time of one validation, in nanoseconds, from Python objects (what FastAPI does with a
+decoded body) and from the raw JSON. The examples are the ones that end up in the docs:
+
+model_config = {"json_schema_extra": {"examples": [...]}} on the model,
+Field(examples=[...]) on every required field of the model (they're combined into one example),
+Body(examples=[...]) or Body(openapi_examples={...}) on the path operation parameter.
+
+A model without examples only gets its build time. The slow ones to validate, for their size, are the ones
+worth flattening.
+
+Command to print the report for some modules (or all of them):
+python model_warmup.py body_fields body_nested_models declare_request_example_data
+python model_warmup.py"""
+
+import sys
+import time
+import typing
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+
+from tutorials import TUTORIALS_DIR, import_tutorial, tutorial_paths
+
+
+@dataclass
+class ModelTiming:
+    model: type[BaseModel]
+    build_ns: int | None = None
+    examples: list[Any] = field(default_factory=list)
+    python_ns: int | None = None
+    json_ns: int | None = None
+    invalid_examples: int = 0
+
+
+def _models_in(annotation: Any) -> list[type[BaseModel]]:
+    """The models in a type, like Items in list[Items] | None."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation]
+    models = []
+    for argument in typing.get_args(annotation):
+        models.extend(_models_in(argument))
+    return models
+
+
+def _dependant_fields(dependant: Dependant):
+    for params in (
+        dependant.path_params,
+        dependant.query_params,
+        dependant.header_params,
+        dependant.cookie_params,
+        dependant.body_params,
+    ):
+        yield from params
+    for sub_dependant in dependant.dependencies:
+        yield from _dependant_fields(sub_dependant)
+
+
+def _field_examples(model_field) -> list[Any]:
+    info = model_field.field_info
+    examples = list(info.examples or [])
+    openapi_examples = getattr(info, "openapi_examples", None) or {}
+    examples.extend(example["value"] for example in openapi_examples.values() if "value" in example)
+    return examples
+
+
+def model_examples(model: type[BaseModel]) -> list[Any]:
+    """The examples declared on the model itself."""
+    extra = model.model_config.get("json_schema_extra")
+    examples = list(extra.get("examples", [])) if isinstance(extra, dict) else []
+    required = {name: info for name, info in model.model_fields.items() if info.is_required()}
+    if required and all(info.examples for info in required.values()):
+        example = {}
+        for name, info in model.model_fields.items():
+            if info.examples:
+                example[info.alias or name] = info.examples[0]
+        examples.append(example)
+    return examples
+
+
+def route_models(app: FastAPI) -> dict[type[BaseModel], list[Any]]:
+    """{model: examples} for every model referenced by the routes of the app, nested models included."""
+    found: dict[type[BaseModel], list[Any]] = {}
+
+    def add(model: type[BaseModel], examples: list[Any]) -> None:
+        if model not in found:
+            found[model] = model_examples(model)
+            for info in model.model_fields.values():
+                for nested in _models_in(info.annotation):
+                    add(nested, [])
+        found[model].extend(example for example in examples if example not in found[model])
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for model_field in _dependant_fields(route.dependant):
+            models = _models_in(model_field.field_info.annotation)
+            for model in models:
+                # Examples on the parameter belong to its model, when it's the only one in the type.
+                add(model, _field_examples(model_field) if len(models) == 1 else [])
+        if route.response_model is not None:
+            for model in _models_in(route.response_model):
+                add(model, [])
+    return found
+
+
+def warmup_models(app: FastAPI) -> dict[type[BaseModel], int]:
+    """Build the validators of the models referenced by the routes that are not built yet, and return
+    {model: build time in ns} for those."""
+    build_ns = {}
+    for model in route_models(app):
+        if not model.__pydantic_complete__:
+            start = time.perf_counter_ns()
+            model.model_rebuild()
+            build_ns[model] = time.perf_counter_ns() - start
+    return build_ns
+
+
+def model_timings(app: FastAPI) -> dict[type[BaseModel], ModelTiming]:
+    """Build the validator of every model referenced by the routes again, even the ones already built, to time
+    each build. For the report, not for startup."""
+    timings = {}
+    for model, examples in route_models(app).items():
+        start = time.perf_counter_ns()
+        model.model_rebuild(force=True)
+        timings[model] = ModelTiming(model, time.perf_counter_ns() - start, examples)
+    return timings
+
+
+def _per_call_ns(function, argument, min_seconds: float = 0.02, repeat: int = 5) -> int:
+    """Best time of one call, over `repeat` batches of calls that each last at least min_seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function(argument)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_seconds * 1e9:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function(argument)
+        best = min(best, time.perf_counter_ns() - start)
+    return best // number
+
+
+def time_validation(timing: ModelTiming) -> ModelTiming:
+    """Per-validation time, averaged over the valid examples of the model."""
+    python_ns, json_ns = [], []
+    for example in timing.examples:
+        try:
+            timing.model.model_validate(example)
+        except ValidationError:
+            timing.invalid_examples += 1
+            continue
+        python_ns.append(_per_call_ns(timing.model.model_validate, example))
+        json_ns.append(_per_call_ns(timing.model.model_validate_json, to_json(example)))
+    if python_ns:
+        timing.python_ns = sum(python_ns) // len(python_ns)
+        timing.json_ns = sum(json_ns) // len(json_ns)
+    return timing
+
+
+def validation_report(apps: dict[str, FastAPI]) -> str:
+    lines = [f"{'module / model':<48} {'build ns':>11} {'examples':>9} {'python ns':>10} {'json ns':>10}"]
+    for name, app in apps.items():
+        lines.append(name)
+        for timing in model_timings(app).values():
+            time_validation(timing)
+            examples = f"{len(timing.examples)}" + (f" ({timing.invalid_examples} invalid)" if timing.invalid_examples else "")
+            python_ns = f"{timing.python_ns:>10}" if timing.python_ns is not None else f"{'-':>10}"
+            json_ns = f"{timing.json_ns:>10}" if timing.json_ns is not None else f"{'-':>10}"
+            lines.append(f"  {timing.model.__qualname__:<46} {timing.build_ns:>11} {examples:>9} {python_ns} {json_ns}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    modules = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    paths = [TUTORIALS_DIR / f"{module}.py" for module in modules] if modules else tutorial_paths()
+    print(validation_report({path.stem: import_tutorial(path).app for path in paths}))
@@ -0,0 +1,137 @@
+"""Partial Updates¶
+get_items in body_updates.py applies a partial update by building a model from the stored data, dumping it,
+merging the update in, building (and so validating) the whole model again, and encoding all of it back. On a
+record with thousands of tags, updating its price validates and copies every tag, twice.
+
+PartialUpdate(Items, things) validates only the fields that are sent, each one with its own validator (the
+type and constraints of the field, built once), in the same JSON-compatible form jsonable_encoder gives. The store
+is a VersionedStore (see versioned_store.py): the record is not changed in place, each update makes a new version
+of it, a shallow copy of its top-level fields with the changed ones replaced, which shares all the values that
+didn't change (a price update doesn't copy the tags). The cost is that of the change and of the number of fields,
+not of the size of the record. Updates can be made conditional with If-Match.
+
+item_updates = PartialUpdate(Items, things)
+
+@app.patch("/items/{item_id}", response_model=Items, openapi_extra=item_updates.openapi_extra)
+async def update_item(item_id: str, changes: Annotated[dict, Depends(item_updates.changes)]):
+    return item_updates.update(item_id, changes).data
+
+The errors are the ones the model gives for the same fields, with the same loc (["body", "price"]). Fields
+the model doesn't know are ignored (or rejected, with extra="forbid"), like the model does. As the fields are
+validated one by one, a model with model validators, or field validators, can't be used.
+
+Command to run the benchmark with records of different sizes:
+python partial_update.py --benchmark"""
+
+import json
+import sys
+import time
+from typing import Annotated, Any
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from content_types import is_json_request
+from versioned_store import Snapshot, VersionedStore
+
+_OBJECT = TypeAdapter(dict[str, Any])
+
+
+class PartialUpdate:
+    def __init__(self, model: type[BaseModel], store: VersionedStore):
+        decorators = model.__pydantic_decorators__
+        if decorators.model_validators or decorators.field_validators:
+            raise TypeError(f"{model.__name__} has validators that need the whole model")
+        self.model = model
+        self.store = store
+        self.forbid_extra = model.model_config.get("extra") == "forbid"
+        # key in the body: (field name, validator of the field alone)
+        self.fields = {
+            info.alias or name: (name, TypeAdapter(Annotated[info.annotation, info]))
+            for name, info in model.model_fields.items()
+        }
+        schema = model.model_json_schema()
+        schema.pop("required", None)
+        self.openapi_extra = {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+    def validate(self, data: Any) -> dict[str, Any]:
+        """Validate the fields in data, and return them in their JSON-compatible form, by field name."""
+        try:
+            data = _OBJECT.validate_python(data)
+        except ValidationError as exc:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]) from None
+        changes, errors = {}, []
+        for key, value in data.items():
+            field = self.fields.get(key)
+            if field is None:
+                if self.forbid_extra:
+                    errors.append({"type": "extra_forbidden", "loc": ("body", key), "msg": "Extra inputs are not permitted", "input": value})
+                continue
+            name, adapter = field
+            try:
+                changes[name] = adapter.dump_python(adapter.validate_python(value), mode="json")
+            except ValidationError as exc:
+                errors.extend({**error, "loc": ("body", key, *error["loc"])} for error in exc.errors(include_url=False))
+        if errors:
+            raise RequestValidationError(errors)
+        return changes
+
+    async def changes(self, request: Request) -> dict[str, Any]:
+        """Dependency that gives the validated fields of the body."""
+        body = await request.body()
+        if not body or not is_json_request(request.headers.get("content-type")):
+            raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as exc:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", exc.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": exc.msg}}]
+            ) from None
+        return self.validate(data)
+
+    def update(self, key: str, changes: dict[str, Any], if_match: str | None = None) -> Snapshot:
+        """Apply validated changes to the stored record, and return its new version."""
+        return self.store.update(key, changes, if_match=if_match)
+
+
+"""Benchmark¶
+Updates the price of records with more and more tags, the way get_items in body_updates.py does it (rebuilding
+the whole model) and with PartialUpdate."""
+
+
+def _rebuild_update(store: VersionedStore, key: str, update: dict, model: type[BaseModel]) -> None:
+    from fastapi.encoders import jsonable_encoder
+
+    item = model(**update)
+    stored_item_model = model(**store[key])
+    merged_data = {**stored_item_model.model_dump(), **item.model_dump(exclude_unset=True)}
+    store.put(key, jsonable_encoder(model(**merged_data)))
+
+
+def benchmark_updates(sizes: tuple[int, ...] = (10, 1_000, 100_000), rounds: int = 20) -> list[dict]:
+    from body_updates import Items
+
+    results = []
+    for tags in sizes:
+        record = {"name": "Shanmuga", "description": "Killer of Soorabadhman", "price": 666.666, "tax": 6.66666,
+                  "tags": [f"tag {number}" for number in range(tags)]}
+        store = VersionedStore({"item": record})
+        updates = PartialUpdate(Items, store)
+        row = {"tags": tags}
+        for name, update in (
+            ("rebuild", lambda price: _rebuild_update(store, "item", {"name": "Shanmuga", "price": price}, Items)),
+            ("partial", lambda price: updates.update("item", updates.validate({"price": price}))),
+        ):
+            start = time.perf_counter()
+            for round_ in range(rounds):
+                update(100.0 + round_)
+            row[name] = (time.perf_counter() - start) / rounds * 1_000_000
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'tags':>8} {'rebuild us':>12} {'partial us':>12}   (update of the price)")
+    for row in benchmark_updates():
+        print(f"{row['tags']:>8} {row['rebuild']:>12.1f} {row['partial']:>12.1f}")
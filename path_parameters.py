@@ -119,13 +119,26 @@ class ModelName(str, Enum):
 
 # Declare a path parameter¶
 # Then create a path parameter with a type annotation using the enum class we created (ModelName):
-@app.get("/models/{model_name}")
-async def get_model(model_name: ModelName):
-    if model_name == ModelName.alexnet: # We can compare it with the enumeration member in our created enum ModelName:
-        return {"Model Name": model_name, "message": "Best CV model"} # The value of the path parameter will be an enumeration member.
-    if model_name.value == "LeNet":
-        return {"Model Name": model_name, "message": "Developed by Yann LeCun"}
-    return ModelName.resnet.value, {"message": "Residual Network"}
+# model_name: ModelName would be validated by Pydantic on every request. This route is hot, so instead
+# EnumPath converts it with a value -> member map built once, and answers unknown values with a cached 422.
+from typing import Annotated
+from fastapi import Depends
+from enum_path import EnumPath, add_enum_path_handler
+
+model_name_path = EnumPath(ModelName, "model_name")
+add_enum_path_handler(app)
+
+# Each model name maps to its own response (its backend), so the path operation dispatches through a table
+# instead of comparing the enumeration member with each member of ModelName.
+model_backends = {
+    ModelName.alexnet: {"Model Name": ModelName.alexnet, "message": "Best CV model"},
+    ModelName.lenet: {"Model Name": ModelName.lenet, "message": "Developed by Yann LeCun"},
+    ModelName.resnet: (ModelName.resnet.value, {"message": "Residual Network"}),
+}
+
+@app.get("/models/{model_name}", openapi_extra=model_name_path.openapi_extra)
+async def get_model(model_name: Annotated[ModelName, Depends(model_name_path)]):
+    return model_backends[model_name] # The value of the path parameter will be an enumeration member.
 """We can get the actual value (a str in this case) using model_name.value, or in general, our_enum_member.value:"""
 
 """Get the enumeration value¶
@@ -159,6 +172,45 @@ In this case, the name of the parameter is file_path, and the last part, :path,
 
 So, we can use it with:"""
 
+"""Serving the file¶
+Instead of just echoing file_path back, the path operation can serve the file itself, from the
+directory set in the FILES_DIR environment variable, or else the files/ directory next to this file
+(not the current directory: that would serve the source code, .git included).
+
+SendfileResponse lets the server send the file with os.sendfile() (no copies through Python buffers),
+when the server supports the ASGI zero-copy extension (Uvicorn doesn't, see sendfile_response.py), and
+supports Range and If-None-Match, so large artifacts can be downloaded in parts and cached by clients.
+
+get_path is a plain def: resolving the path and checking the file hit the disk, so FastAPI runs it in
+a worker thread instead of on the event loop.
+
+Paths that resolve outside FILES_DIR (e.g. /files/../../etc/passwd), and hidden files and directories
+(any part of the path starting with ".", like .git/config or .env), are answered with a 404, like missing files."""
+
+import os
+from pathlib import Path
+import fastapi
+from fastapi import HTTPException
+from sendfile_response import SendfileResponse
+
+FILES_DIR = Path(os.environ.get("FILES_DIR", Path(__file__).parent / "files")).resolve()
+
 @app.get("/files/{file_path:path}")
-async def get_path(file_path: str):
-    return {"File Path": file_path}
+def get_path(file_path: Annotated[str, fastapi.Path(examples=["hello.txt"])]):
+    if any(part.startswith(".") for part in Path(file_path).parts):
+        raise HTTPException(status_code=404, detail="File not found")
+    full_path = (FILES_DIR / file_path).resolve()
+    if not full_path.is_relative_to(FILES_DIR) or not full_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    return SendfileResponse(full_path)
+
+
+"""Compiled Router¶
+All the path operations are declared: from here on, the requests are routed by a CompiledRouter
+(see compiled_router.py). The typed /items/{item_id} and the second /users above are declared on purpose,
+to show that they are never reached: with strict=False, compile_router logs them at startup instead of
+refusing to start."""
+
+from compiled_router import compile_router
+
+compile_router(app, strict=False)
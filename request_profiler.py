@@ -0,0 +1,202 @@
+"""Request Profiler¶
+When a single path operation (e.g. get_albums in body_multiple_parameters.py) gets slower in production,
+profiling the whole process mixes its stacks with everything else the server is doing.
+
+ProfilerMiddleware profiles only the requests it selects:
+
+Requests with a valid X-Profile header, signed with a secret (see profile_header()), so only the people
+who know the secret can turn the profiler on. The signature covers the method, the path and an expiry time.
+A random fraction of the requests, with sample_rate (e.g. 0.001 for 1 request in 1000).
+
+For a selected request, a sampler thread looks at the stack of the event loop thread every interval seconds
+and keeps it only when it contains the frame of that request, so other requests running concurrently on the
+same loop aren't counted. When the request finishes, the stacks are written in the collapsed format used by
+flamegraph tools (one line per stack, "outer;inner;innermost count") to output_dir, in a file named after the
+path operation, like get_albums-1718000000123-1.collapsed. They can be rendered with flamegraph.pl or speedscope.
+
+A request that isn't selected only costs a random() call and, when a secret is set, a look at its headers.
+
+from request_profiler import ProfilerMiddleware, profile_header
+app.add_middleware(ProfilerMiddleware, secret=b"...", sample_rate=0.001, endpoints={"get_albums"})
+
+headers = {"X-Profile": profile_header(b"...", "PUT", "/albums/1")}
+
+Only the time spent running on the event loop is sampled. The time a request spends waiting (for I/O,
+or for a sync (def) path operation running in the threadpool) doesn't appear in its profile.
+
+Command to run the overhead benchmark:
+python request_profiler.py --benchmark"""
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_HEADER = b"x-profile"
+
+
+def _signature(secret: bytes, method: str, path: str, expires: int) -> str:
+    message = f"{expires}:{method.upper()} {path}".encode("utf-8")
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def profile_header(secret: bytes, method: str, path: str, ttl: int = 300) -> str:
+    """The X-Profile header value that turns on the profiler for this method and path, for ttl seconds."""
+    expires = int(time.time()) + ttl
+    return f"{expires}:{_signature(secret, method, path, expires)}"
+
+
+def verify_profile_header(secret: bytes, method: str, path: str, value: str) -> bool:
+    expires, _, signature = value.partition(":")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(secret, method, path, int(expires)))
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """A thread that samples the stacks of the profiled requests, every interval seconds.
+    It only runs while at least one request is being profiled."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.profiles: dict = {}  # root frame -> (thread id, Counter of collapsed stacks)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self, root_frame) -> Counter:
+        stacks = Counter()
+        with self.lock:
+            self.profiles[root_frame] = (threading.get_ident(), stacks)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return stacks
+
+    def stop(self, root_frame) -> None:
+        with self.lock:
+            del self.profiles[root_frame]
+
+    def _run(self) -> None:
+        while True:
+            if not self.profiles:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                profiles = list(self.profiles.items())
+            for root_frame, (thread_id, stacks) in profiles:
+                labels = []
+                frame = frames.get(thread_id)
+                while frame is not None and frame is not root_frame:
+                    labels.append(_label(frame))
+                    frame = frame.f_back
+                # Without the root frame, the thread is running something else (e.g. another request).
+                if frame is root_frame and labels:
+                    stacks[";".join(reversed(labels))] += 1
+
+
+sampler = StackSampler()
+
+
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret: bytes | None = None,
+        sample_rate: float = 0.0,
+        endpoints: set[str] | None = None,
+        output_dir: str = "profiles",
+        sampler: StackSampler = sampler,
+    ):
+        self.app = app
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.endpoints = endpoints
+        self.output_dir = output_dir
+        self.sampler = sampler
+        self.counter = itertools.count(1)
+
+    def is_selected(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.secret is None:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return verify_profile_header(self.secret, scope["method"], scope["path"], value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.is_selected(scope):
+            await self.app(scope, receive, send)
+            return
+        root_frame = sys._getframe()
+        stacks = self.sampler.start(root_frame)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.stop(root_frame)
+            route = scope.get("route")
+            name = getattr(route, "name", None) or "unmatched"
+            if stacks and (self.endpoints is None or name in self.endpoints):
+                self.write(name, stacks)
+
+    def write(self, name: str, stacks: Counter) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{name}-{time.time_ns() // 1_000_000}-{next(self.counter)}.collapsed")
+        with open(path, "w") as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        return path
+
+
+"""Overhead benchmark¶
+Measures what the middleware adds to the requests it doesn't select, around an ASGI app that does nothing."""
+
+
+async def _time_calls(app: ASGIApp, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    headers = [(b"host", b"localhost"), (b"user-agent", b"benchmark"), (b"accept", b"*/*"), (b"content-type", b"application/json")]
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await app({"type": "http", "method": "PUT", "path": "/albums/1", "headers": headers}, receive, send)
+    return (time.perf_counter_ns() - start) / requests
+
+
+async def _noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+
+def benchmark_overhead(requests: int = 200_000) -> dict:
+    bare_ns = asyncio.run(_time_calls(_noop_app, requests))
+    profiled = ProfilerMiddleware(_noop_app, secret=b"secret", sample_rate=1e-9)
+    middleware_ns = asyncio.run(_time_calls(profiled, requests))
+    return {"bare_ns": bare_ns, "overhead_ns": middleware_ns - bare_ns}
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    results = benchmark_overhead()
+    print(f"Request without middleware: {results['bare_ns']:>6.0f} ns")
+    print(f"Overhead when not sampled:  {results['overhead_ns']:>6.0f} ns")
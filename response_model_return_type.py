@@ -9,8 +9,11 @@ from fastapi import FastAPI, Response
 from fastapi.responses import JSONResponse, RedirectResponse
 from pydantic import BaseModel, EmailStr
 from typing import Annotated, Any
+from direct_json import DirectJSONRoute
 
 app = FastAPI()
+# The responses with a response model are dumped straight to JSON bytes, see the response_model Parameter below.
+app.router.route_class = DirectJSONRoute
 
 @app.get("/")
 async def get_root():
@@ -58,24 +61,31 @@ You can use the response_model parameter in any of the path operations:
 @app.post()
 @app.put()
 @app.delete()
-etc."""
+etc.
+
+The path operations of this app are served by DirectJSONRoute (see direct_json.py), set on its router right
+after it's created: the value they return is validated by the response model and dumped straight to JSON bytes,
+without going through dicts."""
 
 # Need to import 'Any' subclass from typing module
 @app.post("/Sockets/", response_model = ResponseModel)
 async def get_sockets(items: ResponseModel) -> Any:
     return items
 
-@app.post("/Floors/", response_model=list[ResponseModel])
+"""A list response model can also be sent item by item, as a JSON array, while the path operation yields them
+(see json_array_stream.py): the client gets the first item without waiting for the whole list."""
+
+from json_array_stream import StreamingJSONArrayResponse
+
+@app.post("/Floors/", response_model=list[ResponseModel], response_class=StreamingJSONArrayResponse)
 async def get_floors(param_floor: ResponseModel) -> Any:
-    return [
-        ResponseModel(
-            name="Valliammai",
-            description="Murugan Wife Name",
-            price=66.6666,
-            tax=6.66,
-            tags=["Deivanai", "IndranMagal", "Iravadham"]
-        )
-    ]
+    yield ResponseModel(
+        name="Valliammai",
+        description="Murugan Wife Name",
+        price=66.6666,
+        tax=6.66,
+        tags=["Deivanai", "IndranMagal", "Iravadham"]
+    )
 
 """Return the same input data¶
 Here we are declaring a UserIn model, it will contain a plaintext password:"""
@@ -0,0 +1,165 @@
+"""Response Plans¶
+read_item_name (response_model_include={"name", "description"}) and read_item_public_data
+(response_model_exclude={"tax"}) in response_model_return_type.py, and their list-form variants read_comp_name
+and read_cat_domain_data, give their include and exclude to Pydantic's serializer on every response, and it
+works out again, for every response, which fields of the model are kept.
+
+response_plan(model, include, exclude, by_alias, exclude_unset, exclude_defaults, exclude_none) compiles that
+once, when the path operation is declared (DirectJSONRoute in direct_json.py does it for its routes), and keeps
+it for every path operation with the same combination. The fields that are left out are compiled into the
+serializer itself: the plan validates the returned value into a projection of the model, the same model with
+those fields marked exclude=True, and dumps it without any include or exclude. Each response is then a fixed
+projection, with the cost of the fields that are kept, not of the filtering.
+
+plan = response_plan(Item, include={"name", "description"})
+plan.serialize_json(plan.validate(items["bar"], loc=("response",))[0])
+# b'{"name":"Bar","description":"The War fighters"}'
+
+The validation is the same as with the model (same validators, same errors), and exclude_unset,
+exclude_defaults and exclude_none still apply to the values of each response. Lists and tuples of field
+names are taken as sets. A plan only compiles top-level sets of field names, for a model without computed
+fields or extra fields; nested include and exclude (dicts), other response models, and instances of the model
+returned as they are, are dumped with the include and exclude given to the serializer, as before.
+
+Command to run the benchmark against include and exclude given on every response:
+python response_plans.py --benchmark"""
+
+import sys
+import threading
+import time
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+from pydantic.fields import FieldInfo
+
+
+def _field_names(fields: Any) -> frozenset[str] | None:
+    """The field names of a top-level include or exclude, or None when it's nested (a dict)."""
+    if isinstance(fields, (set, frozenset, list, tuple)) and all(isinstance(name, str) for name in fields):
+        return frozenset(fields)
+    return None
+
+
+def project(model: type[BaseModel], include: frozenset[str] | None, exclude: frozenset[str] | None) -> type[BaseModel]:
+    """A subclass of the model whose serializer leaves out the fields not in include, or in exclude."""
+    left_out = {
+        name: (info.annotation, FieldInfo.merge_field_infos(info, exclude=True))
+        for name, info in model.model_fields.items()
+        if (include is not None and name not in include) or (exclude is not None and name in exclude)
+    }
+    # Same name, so that the errors and the class name in them stay the same.
+    return create_model(model.__name__, __base__=model, __module__=model.__module__, **left_out)
+
+
+class ResponsePlan:
+    def __init__(self, response_model: Any, include: Any = None, exclude: Any = None, by_alias: bool = True,
+                 exclude_unset: bool = False, exclude_defaults: bool = False, exclude_none: bool = False):
+        self.model = response_model
+        self.adapter = TypeAdapter(response_model)
+        self.options = {"include": include, "exclude": exclude, "by_alias": by_alias, "exclude_unset": exclude_unset,
+                        "exclude_defaults": exclude_defaults, "exclude_none": exclude_none}
+        self.projection = None
+        include_names, exclude_names = _field_names(include), _field_names(exclude)
+        if (
+            (include is not None or exclude is not None)
+            and (include is None or include_names is not None)
+            and (exclude is None or exclude_names is not None)
+            and isinstance(response_model, type)
+            and issubclass(response_model, BaseModel)
+            and not response_model.model_computed_fields
+            and response_model.model_config.get("extra") != "allow"
+        ):
+            self.projection = project(response_model, include_names, exclude_names)
+            self.projection_adapter = TypeAdapter(self.projection)
+            self.projection_options = {**self.options, "include": None, "exclude": None}
+
+    def validate(self, value: Any, values: dict = {}, *, loc: tuple = ()) -> tuple[Any, list[dict]]:
+        """Validate a value returned by a path operation, like the response field of the route does."""
+        adapter = self.adapter
+        # An instance of the model is kept as it is (with the fields that were set in it), not copied into the
+        # projection.
+        if self.projection is not None and not isinstance(value, self.model):
+            adapter = self.projection_adapter
+        try:
+            return adapter.validate_python(value, from_attributes=True), []
+        except ValidationError as exc:
+            return None, [{**error, "loc": (*loc, *error["loc"])} for error in exc.errors(include_url=False)]
+
+    def serialize_json(self, value: Any) -> bytes:
+        if self.projection is not None and type(value) is self.projection:
+            return self.projection_adapter.dump_json(value, **self.projection_options)
+        return self.adapter.dump_json(value, **self.options)
+
+    def serialize(self, value: Any) -> Any:
+        if self.projection is not None and type(value) is self.projection:
+            return self.projection_adapter.dump_python(value, mode="json", **self.projection_options)
+        return self.adapter.dump_python(value, mode="json", **self.options)
+
+
+_plans: dict[tuple, ResponsePlan] = {}
+_lock = threading.Lock()
+
+
+def response_plan(response_model: Any, include: Any = None, exclude: Any = None, by_alias: bool = True,
+                  exclude_unset: bool = False, exclude_defaults: bool = False, exclude_none: bool = False) -> ResponsePlan:
+    """The plan for this combination, compiled the first time it's asked for."""
+    include_names, exclude_names = _field_names(include), _field_names(exclude)
+    if (include is not None and include_names is None) or (exclude is not None and exclude_names is None):
+        # Nested include or exclude: not hashable, and not compiled anyway.
+        return ResponsePlan(response_model, include, exclude, by_alias, exclude_unset, exclude_defaults, exclude_none)
+    key = (response_model, include_names, exclude_names, by_alias, exclude_unset, exclude_defaults, exclude_none)
+    plan = _plans.get(key)
+    if plan is None:
+        with _lock:
+            plan = _plans.get(key)
+            if plan is None:
+                plan = _plans[key] = ResponsePlan(response_model, include_names, exclude_names, by_alias,
+                                                  exclude_unset, exclude_defaults, exclude_none)
+    return plan
+
+
+"""Benchmark¶
+Validates and dumps the items of response_model_return_type.py with the include and exclude of read_item_name
+and read_item_public_data, and a model with 200 fields keeping half of them, given to the serializer on every
+response and with a plan."""
+
+
+def _per_response_us(plan: ResponsePlan, value: Any, compiled: bool, rounds: int) -> float:
+    if compiled:
+        def respond():
+            return plan.serialize_json(plan.validate(value)[0])
+    else:
+        def respond():
+            return plan.adapter.dump_json(plan.adapter.validate_python(value, from_attributes=True), **plan.options)
+    assert respond() == plan.adapter.dump_json(plan.adapter.validate_python(value), **plan.options)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        respond()
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def benchmark_plans(rounds: int = 20_000) -> list[dict]:
+    from response_model_return_type import Item, items
+
+    wide = create_model("Wide", **{f"field_{number}": (int, 0) for number in range(200)})
+    samples = [
+        ("include name, description", Item, {"include": {"name", "description"}}, items["bar"]),
+        ("exclude tax", Item, {"exclude": {"tax"}}, items["bar"]),
+        ("200 fields, include 100", wide, {"include": {f"field_{number}" for number in range(0, 200, 2)}},
+         {f"field_{number}": number for number in range(200)}),
+    ]
+    results = []
+    for name, model, filters, value in samples:
+        plan = response_plan(model, **filters)
+        results.append({
+            "response": name,
+            "per response": _per_response_us(plan, value, False, rounds),
+            "plan": _per_response_us(plan, value, True, rounds),
+        })
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'response':<28} {'per response us':>16} {'plan us':>10}")
+    for row in benchmark_plans():
+        print(f"{row['response']:<28} {row['per response']:>16.2f} {row['plan']:>10.2f}")
@@ -0,0 +1,157 @@
+"""Streaming Bodies¶
+A body declared as fimage: list[ModImage] (see body_nested_models.py) is read completely, parsed into a
+Python list and validated, before the path operation runs. With hundreds of thousands of records, all of
+them are in memory at the same time, more than once.
+
+StreamedBody(ModImage) is a dependency that gives the path operation an async iterator instead. It reads the
+body chunk by chunk, and validates and yields each record as soon as it has been received completely, so
+only one record (plus one chunk) is kept in memory, whatever the size of the body. It accepts:
+
+NDJSON, one JSON object per line, with Content-Type: application/x-ndjson (or application/jsonl).
+A JSON array, with any other Content-Type, e.g. sent with Transfer-Encoding: chunked.
+
+image_stream = StreamedBody(ModImage)
+
+@app.post("/images/stream/", openapi_extra=image_stream.openapi_extra)
+async def stream_images(images: Annotated[AsyncIterator[ModImage], Depends(image_stream)]):
+    async for image in images:
+        ...
+
+An invalid record raises a RequestValidationError, so the client gets the usual 422 response, with the
+position of the record in the loc, like ["body", 3, "url"], as long as the path operation hasn't started
+sending its response. A record bigger than max_record_size gives a 413."""
+
+import re
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/jsonl", "application/jsonlines"}
+
+# A complete string, a structural character, or the start of a string that isn't complete yet.
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},]|"', re.DOTALL)
+_OPEN, _CLOSE = frozenset(b"[{"), frozenset(b"]}")
+
+
+class ArraySplitter:
+    """Splits a JSON array received in chunks into the raw bytes of its elements, without parsing them."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0  # where to look for the next token
+        self.start = None  # where the current element starts, None until the array is opened
+        self.depth = 0
+        self.count = 0
+        self.closed = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        self.buffer += chunk
+        elements = []
+        while not self.closed:
+            match = _TOKEN.search(self.buffer, self.position)
+            if match is None:
+                self.position = len(self.buffer)
+                break
+            token = match.group()
+            if token == b'"':
+                self.position = match.start()
+                break
+            self.position = match.end()
+            if token[0] == ord('"'):
+                continue
+            if self.start is None:
+                if token != b"[" or self.buffer[:match.start()].strip():
+                    raise ValueError("Expected a JSON array")
+                self.start = match.end()
+            elif token[0] in _OPEN:
+                self.depth += 1
+            elif token[0] in _CLOSE and self.depth:
+                self.depth -= 1
+            elif token[0] in _CLOSE:
+                element = bytes(self.buffer[self.start:match.start()].strip())
+                if element or self.count:
+                    elements.append(self._element(element))
+                self.closed = True
+                self.start = match.end()
+            elif token == b"," and not self.depth:
+                elements.append(self._element(bytes(self.buffer[self.start:match.start()].strip())))
+                self.start = match.end()
+        if self.start:
+            del self.buffer[:self.start]
+            self.position -= self.start
+            self.start = 0
+        return elements
+
+    def _element(self, element: bytes) -> bytes:
+        if not element:
+            raise ValueError(f"Missing value at index {self.count} of the JSON array")
+        self.count += 1
+        return element
+
+    def pending(self) -> int:
+        """Bytes of the element still being received."""
+        return len(self.buffer)
+
+    def close(self) -> None:
+        if not self.closed or self.buffer.strip():
+            raise ValueError("Incomplete JSON array" if not self.closed else "Data after the end of the JSON array")
+
+
+class StreamedBody:
+    def __init__(self, model: type[BaseModel], max_record_size: int = 1024 * 1024):
+        self.model = model
+        self.max_record_size = max_record_size
+        items = {"type": "array", "items": model.model_json_schema()}
+        self.openapi_extra = {"requestBody": {"required": True, "content": {
+            "application/json": {"schema": items},
+            "application/x-ndjson": {"schema": model.model_json_schema()},
+        }}}
+
+    async def __call__(self, request: Request) -> AsyncIterator[BaseModel]:
+        media_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+        if media_type in NDJSON_MEDIA_TYPES:
+            return self.ndjson_records(request)
+        return self.array_records(request)
+
+    def validate(self, raw: bytes, index: int) -> BaseModel:
+        try:
+            return self.model.model_validate_json(raw)
+        except ValidationError as exc:
+            errors = exc.errors(include_url=False)
+            raise RequestValidationError(
+                [{**error, "loc": ("body", index, *error["loc"])} for error in errors]
+            ) from None
+
+    def check_size(self, pending: int) -> None:
+        if pending > self.max_record_size:
+            raise HTTPException(status_code=413, detail=f"Records can't be bigger than {self.max_record_size} bytes")
+
+    async def ndjson_records(self, request: Request) -> AsyncIterator[BaseModel]:
+        index, rest = 0, b""
+        async for chunk in request.stream():
+            lines = (rest + chunk).split(b"\n")
+            rest = lines.pop()
+            self.check_size(len(rest))
+            for line in lines:
+                if line.strip():
+                    yield self.validate(line, index)
+                    index += 1
+        if rest.strip():
+            yield self.validate(rest, index)
+
+    async def array_records(self, request: Request) -> AsyncIterator[BaseModel]:
+        splitter = ArraySplitter()
+        index = 0
+        try:
+            async for chunk in request.stream():
+                for element in splitter.feed(chunk):
+                    yield self.validate(element, index)
+                    index += 1
+                self.check_size(splitter.pending())
+            splitter.close()
+        except ValueError as exc:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", splitter.count), "msg": "JSON decode error", "input": {}, "ctx": {"error": str(exc)}}]
+            ) from None
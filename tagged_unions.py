@@ -0,0 +1,124 @@
+"""Tagged Unions¶
+get_vehicle_details in extra_models.py declares response_model=PlaneItem | CarItem. With a plain union,
+Pydantic validates each response against the members, one after the other, and keeps the best match: the cost
+grows with the number of members, and as a car is also a valid PlaneItem (size has a default), a car comes
+out as a plane, with a size.
+
+tagged_union(...) is the same union, dispatched on a field of the value, like "type": the value of the field
+gives the member, and only that one is validated, and used to serialize the response, whatever the number
+of members.
+
+The tags are inferred from the members when they declare the field with a Literal:
+
+class CarItem(BaseItem):
+    type: Literal["car"]
+
+VehicleItem = tagged_union(PlaneItem, CarItem, field="type")
+
+or they're declared, for members whose field is a plain str:
+
+VehicleItem = tagged_union(field="type", tags={"plane": PlaneItem, "car": CarItem})
+
+@app.post("/vehicles/{vehicle_id}", response_model=VehicleItem)
+async def get_vehicle_details(vehicle_id: str):
+    return vehicles[vehicle_id]
+
+A value whose tag is missing, or not one of the tags, is not valid: a tag_invalid error with declared tags,
+Pydantic's union_tag_not_found or union_tag_invalid with inferred ones. The docs show the union as a oneOf of
+the members (with the mapping of the tags when they are inferred).
+
+Command to run the benchmark with more and more members:
+python tagged_unions.py --benchmark"""
+
+import sys
+import time
+import typing
+from collections import Counter
+from collections.abc import Mapping
+from typing import Annotated, Any, Literal, Union
+
+from pydantic import BaseModel, Discriminator, Tag, TypeAdapter, create_model
+
+
+def _literal_tags(member: type[BaseModel], field: str) -> tuple | None:
+    info = member.model_fields.get(field)
+    if info is None or typing.get_origin(info.annotation) is not Literal:
+        return None
+    return typing.get_args(info.annotation)
+
+
+def tagged_union(*members: type[BaseModel], field: str = "type", tags: Mapping[Any, type[BaseModel]] | None = None) -> Any:
+    """The union of the members (and of the models in tags), dispatched on the value of field."""
+    tags = dict(tags or {})
+    members = list(dict.fromkeys([*members, *tags.values()]))
+    if not members:
+        raise TypeError("A tagged union needs at least one member")
+    if not tags:
+        inferred = {member: _literal_tags(member, field) for member in members}
+        missing = [member.__name__ for member, values in inferred.items() if values is None]
+        if missing:
+            raise TypeError(f"Can't infer the tags of {', '.join(missing)}: declare {field} as a Literal, or give the tags")
+        # Pydantic's own tagged union, with the mapping of the tags in the JSON Schema.
+        return Annotated[Union[tuple(members)], Discriminator(field)]
+    for member in members:
+        if member not in tags.values():
+            raise TypeError(f"{member.__name__} has no tag")
+    counts = Counter(member.__name__ for member in members)
+    names = {member: member.__name__ if counts[member.__name__] == 1 else f"{member.__module__}.{member.__qualname__}"
+             for member in members}
+    # tag of the value: name of the member
+    choices = {tag: names[member] for tag, member in tags.items()}
+
+    def member_of(value: Any) -> str | None:
+        tag = value.get(field) if isinstance(value, Mapping) else getattr(value, field, None)
+        try:
+            return choices.get(tag)
+        except TypeError:  # not hashable
+            return None
+
+    discriminator = Discriminator(member_of, custom_error_type="tag_invalid",
+                                  custom_error_message=f"Input {field} should be one of {', '.join(map(repr, choices))}")
+    return Annotated[Union[tuple(Annotated[member, Tag(names[member])] for member in members)], discriminator]
+
+
+"""Benchmark¶
+Validates and dumps a value of the last member of unions of more and more members, like PlaneItem and CarItem
+(extra_models.py), with a plain union, and with tagged_union, with inferred and declared tags."""
+
+
+def _members(count: int, literal: bool) -> list[type[BaseModel]]:
+    return [
+        create_model(f"Vehicle{number}", description=(str | None, None), size=(float, 10.5),
+                     type=(Literal[f"vehicle {number}"] if literal else str, ...))
+        for number in range(count)
+    ]
+
+
+def _per_response_us(response_model: Any, value: dict, rounds: int) -> float:
+    adapter = TypeAdapter(response_model)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def benchmark_unions(sizes: tuple[int, ...] = (2, 8, 32, 128), rounds: int = 20_000) -> list[dict]:
+    results = []
+    for size in sizes:
+        value = {"description": "This is a plane", "type": f"vehicle {size - 1}", "size": 66.66666}
+        literal, plain = _members(size, literal=True), _members(size, literal=False)
+        declared = tagged_union(tags={f"vehicle {number}": member for number, member in enumerate(plain)})
+        assert type(TypeAdapter(declared).validate_python(value)) is plain[-1]
+        results.append({
+            "members": size,
+            "union": _per_response_us(Union[tuple(literal)], value, rounds),
+            "inferred tags": _per_response_us(tagged_union(*literal), value, rounds),
+            "declared tags": _per_response_us(declared, value, rounds),
+        })
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    print(f"{'members':>8} {'union us':>10} {'inferred tags us':>18} {'declared tags us':>18}")
+    for row in benchmark_unions():
+        print(f"{row['members']:>8} {row['union']:>10.2f} {row['inferred tags']:>18.2f} {row['declared tags']:>18.2f}")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The tutorial modules are top-level modules of the repository.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
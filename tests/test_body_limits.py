@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from body_limits import BodyShapeError, JsonShapeChecker
+
+JSON = {"content-type": "application/json"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    from handling_errors import app
+
+    return TestClient(app)
+
+
+def test_too_deep_is_a_validation_error(client):
+    response = client.post("/bodyhandlers/", content=b"[" * 17 + b"]" * 17, headers=JSON)
+    assert response.status_code == 422
+    assert response.headers["content-type"] == "application/json"
+    [error] = response.json()["detail"]
+    assert (error["type"], error["loc"], error["ctx"]) == ("json_too_deep", ["body"], {"max_depth": 16})
+
+
+def test_too_long_is_a_validation_error(client):
+    body = b"[" + b",".join([b"1"] * 1001) + b"]"
+    response = client.post("/bodyhandlers/", content=body, headers=JSON)
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert (error["type"], error["loc"]) == ("too_long", ["body"])
+
+
+def test_too_long_while_streamed(client):
+    chunks = [b"[", *[b"1," for _ in range(1000)], b"1]"]
+    response = client.post("/bodyhandlers/", content=iter(chunks), headers=JSON)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+
+
+def test_too_large_is_a_413(client):
+    response = client.post("/bodyhandlers/", content=b" " * (64 * 1024 + 1), headers=JSON)
+    assert response.status_code == 413
+
+
+def test_within_the_limits(client):
+    response = client.post("/bodyhandlers/", json={"name": "Murugan", "size": 6})
+    assert response.status_code == 200
+
+
+def test_route_limits_override_the_app_ones():
+    from body_nested_models import app
+
+    client = TestClient(app)
+    body = b"[" + b",".join([b"1"] * 10_001) + b"]"
+    assert client.put("/items/1", content=body, headers=JSON).json()["detail"][0]["type"] == "too_long"
+    # /order/lazy/ takes up to 100_000 items: the body gets to the path operation, which finds it's not an order.
+    response = client.post("/order/lazy/", content=body, headers=JSON)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] != "too_long"
+
+
+def test_checker_across_chunks():
+    checker = JsonShapeChecker(max_depth=2)
+    checker.feed(b'{"a": "[[[", "b": [')
+    with pytest.raises(BodyShapeError) as exc_info:
+        checker.feed(b"[1]]}")
+    assert exc_info.value.errors()[0]["type"] == "json_too_deep"
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from body_nested_models import app
+from columnar_weights import Weights, parse_weights
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("body", [
+    b'{"1726": 78.95, "7892": 121.7, "5270": 45.38}',
+    b'{}',
+    b'{"-3": 1e3, "0": -0.5, "12": 7}',
+    b'{"1": "2.5"}',
+    b'{"1": 1.0, "1": 2.0}',
+])
+def test_same_response_as_the_dict_body(body):
+    headers = {"Content-Type": "application/json"}
+    expected = client.post("/arbitdict/", content=body, headers=headers)
+    response = client.post("/arbitdict/columnar/", content=body, headers=headers)
+    assert response.status_code == expected.status_code == 200
+    assert response.json() == expected.json()
+
+
+@pytest.mark.parametrize("body", [
+    b'{"x": 1.5}',
+    b'{"1": "heavy"}',
+    b'{"1e3": 1.5}',
+    b'[1, 2]',
+    b'{"1": 1.5',
+])
+def test_same_errors_as_the_dict_body(body):
+    headers = {"Content-Type": "application/json"}
+    expected = client.post("/arbitdict/", content=body, headers=headers)
+    response = client.post("/arbitdict/columnar/", content=body, headers=headers)
+    assert response.status_code == expected.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [error["loc"] for error in expected.json()["detail"]]
+
+
+def test_body_without_json_content_type_is_rejected_like_fastapi():
+    body = b'{"1": 1.5}'
+    expected = client.post("/arbitdict/", content=body, headers={"Content-Type": "text/plain"})
+    response = client.post("/arbitdict/columnar/", content=body, headers={"Content-Type": "text/plain"})
+    assert response.status_code == expected.status_code
+
+
+def test_weights_are_two_arrays():
+    weights = parse_weights(json.dumps({str(key): key / 2 for key in range(1000)}).encode())
+    assert isinstance(weights, Weights)
+    assert weights.keys.dtype == np.int64 and weights.values.dtype == np.float64
+    assert len(weights) == 1000
+    assert weights.to_dict() == {key: key / 2 for key in range(1000)}
@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from body_multiple_parameters import app
+
+client = TestClient(app)
+
+BODY = {"item_id": {"item_id": 6, "item_name": "Gugan"}, "user_id": {"emp_id": 1, "name": "Arun"}, "importance": "high"}
+
+
+def test_tutorial_route_is_unchanged():
+    response = client.put("/albums/3", json=BODY)
+    assert response.json() == {"Album Details": 3, "Item Details": BODY["item_id"], "User Details": BODY["user_id"],
+                               "Importance": "high"}
+    schema = client.get("/openapi.json").json()["components"]["schemas"]
+    body_schema = schema[[name for name in schema if name.startswith("Body_get_albums")][0]]
+    assert body_schema["properties"]["item_id"] == {"$ref": "#/components/schemas/Items"}
+
+
+def test_combined_route_gives_the_same_response():
+    assert client.put("/albums/3/combined", json=BODY).json() == client.put("/albums/3", json=BODY).json()
+
+
+@pytest.mark.parametrize("body", [
+    {**BODY, "importance": None},
+    {key: value for key, value in BODY.items() if key != "user_id"},
+    {**BODY, "item_id": {"item_id": "six"}},
+    [BODY],
+    "high",
+])
+def test_combined_route_gives_the_same_errors(body):
+    expected = client.put("/albums/3", json=body)
+    response = client.put("/albums/3/combined", json=body)
+    assert response.status_code == expected.status_code == 422
+    assert response.json() == expected.json()
+
+
+def test_body_not_sent_as_json_is_missing_every_parameter():
+    expected = client.put("/albums/3", content=b"importance=high", headers={"Content-Type": "text/plain"})
+    response = client.put("/albums/3/combined", content=b"importance=high", headers={"Content-Type": "text/plain"})
+    assert response.status_code == expected.status_code == 422
+    assert response.json() == expected.json()
@@ -0,0 +1,88 @@
+import datetime
+import enum
+import uuid
+from typing import Any
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ConfigDict, computed_field, field_serializer
+
+from compiled_encoder import build_encoder, compiled_jsonable_encoder
+
+
+class Colour(enum.Enum):
+    RED = "red"
+
+
+class Leaf(BaseModel):
+    id: uuid.UUID
+    colour: Colour
+    at: datetime.datetime
+
+
+class Tree(BaseModel):
+    name: str
+    leaves: list[Leaf] = []
+    weights: dict[int, float] = {}
+    labels: dict[str, Any] = {}
+    parent: "Tree | None" = None
+
+
+class Computed(BaseModel):
+    price: float
+
+    @computed_field
+    @property
+    def doubled(self) -> float:
+        return self.price * 2
+
+
+class Serialized(BaseModel):
+    at: datetime.datetime
+
+    @field_serializer("at")
+    def at_date(self, at: datetime.datetime) -> str:
+        return at.date().isoformat()
+
+
+class Extra(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    name: str
+
+
+at = datetime.datetime(2024, 1, 1, 6, 30, tzinfo=datetime.timezone.utc)
+leaf = Leaf(id=uuid.UUID(int=1), colour=Colour.RED, at=at)
+samples = [
+    Tree(name="Murugan", leaves=[leaf, leaf], weights={1: 0.5},
+         labels={"_sa_instance_state": 1, "when": at, "nested": {"_sa_x": 2, "ok": [Colour.RED]}},
+         parent=Tree(name="Sivan")),
+    Computed(price=3),
+    Serialized(at=at),
+    Extra(name="Valli", _sa_hidden=1, shown=at),
+    {"tree": Tree(name="Kumaran"), "at": at},
+    [leaf],
+    None,
+]
+
+
+@pytest.mark.parametrize("obj", samples)
+def test_same_result_as_jsonable_encoder(obj):
+    assert compiled_jsonable_encoder(obj) == jsonable_encoder(obj)
+    assert compiled_jsonable_encoder(obj) == jsonable_encoder(obj)  # with the encoder kept
+
+
+def test_only_the_fields_that_need_it_are_walked():
+    assert build_encoder(Leaf).walked_fields == []
+    # parent is a Tree, with labels in it
+    assert build_encoder(Tree).walked_fields == ["labels", "parent"]
+    for cls in (Computed, Serialized, Extra):
+        assert build_encoder(cls) is jsonable_encoder
+
+
+def test_json_compatible_encoder_app():
+    from json_compatible_encoder import app, details
+
+    response = TestClient(app).put("/users/Murugan", json={"name": "Murugan", "joining_date": "2024-01-01T06:30:00Z"})
+    assert response.json() == {"name": "Murugan", "description": None, "joining_date": "2024-01-01T06:30:00Z"}
+    assert details["Murugan"] == response.json()
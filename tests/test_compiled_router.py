@@ -0,0 +1,140 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route, Router
+
+from compiled_router import CompiledRouter, RouteConflictError, compile_router
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/users/me")
+    async def get_me():
+        return {"user": "me"}
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: str):
+        return {"user": user_id}
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item": item_id}
+
+    @app.get("/files/{file_path:path}")
+    async def get_file(file_path: str):
+        return {"file": file_path}
+
+    return app
+
+
+@pytest.mark.parametrize("path", ["/users/me", "/users/Murugan", "/items/3", "/items/foo", "/files/a/b.txt",
+                                  "/missing", "/users/me/"])
+def test_same_responses_as_the_router(path):
+    expected = TestClient(make_app()).get(path, follow_redirects=False)
+    app = make_app()
+    compile_router(app)
+    response = TestClient(app).get(path, follow_redirects=False)
+    assert (response.status_code, response.content) == (expected.status_code, expected.content)
+
+
+def test_method_not_allowed():
+    app = make_app()
+    compile_router(app)
+    response = TestClient(app).post("/users/me")
+    assert response.status_code == 405
+
+
+def test_shadowed_and_duplicated_routes_are_refused():
+    app = FastAPI()
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: str):
+        return {"user": user_id}
+
+    @app.get("/users/me")
+    async def get_me():
+        return {"user": "me"}
+
+    @app.get("/users")
+    async def get_users():
+        return []
+
+    @app.get("/users")
+    async def get_users_again():
+        return []
+
+    with pytest.raises(RouteConflictError) as exc_info:
+        compile_router(app)
+    assert len(exc_info.value.conflicts) == 2
+
+
+def test_conflicts_are_logged_when_not_strict(caplog):
+    app = make_app()
+
+    @app.get("/users/me")
+    async def get_me_again():
+        return {"user": "me again"}
+
+    with caplog.at_level("WARNING", logger="compiled_router"):
+        compiled = compile_router(app, strict=False)
+    assert len(compiled.conflicts) == 1
+    assert "Unreachable path operations" in caplog.text and "/users/me" in caplog.text
+    assert TestClient(app).get("/users/me").json() == {"user": "me"}
+
+
+def test_partial_match_falls_back_to_routes_after_a_mount():
+    async def read(request):
+        return PlainTextResponse("compiled")
+
+    async def create(request):
+        return PlainTextResponse("mounted")
+
+    app = FastAPI()
+    app.router.routes.extend([
+        Route("/items", read, methods=["GET"]),
+        Mount("/", app=Router([Route("/items", create, methods=["POST"])])),
+    ])
+    compile_router(app)
+    client = TestClient(app)
+    assert client.get("/items").text == "compiled"
+    assert client.post("/items").text == "mounted"
+
+
+def test_router_middleware_is_kept():
+    class Tagged:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            async def tagged_send(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message["headers"], (b"x-router", b"1")]
+                await send(message)
+
+            await self.app(scope, receive, tagged_send)
+
+    app = make_app()
+    # What Router(middleware=[...]) builds.
+    app.router.middleware_stack = Tagged(app.router.app)
+    compiled = compile_router(app)
+    assert isinstance(app.router.middleware_stack, Tagged)
+    assert app.router.middleware_stack.app is compiled
+    assert isinstance(compiled, CompiledRouter)
+    response = TestClient(app).get("/users/Murugan")
+    assert response.json() == {"user": "Murugan"}
+    assert response.headers["x-router"] == "1"
+
+
+def test_path_parameters_is_compiled():
+    from path_parameters import app
+
+    compiled = app.router.middleware_stack
+    assert isinstance(compiled, CompiledRouter)
+    # The typed /items/{item_id} and the second /users, declared to show they are never reached.
+    assert len(compiled.conflicts) == 2
+    client = TestClient(app)
+    assert client.get("/users/me").json() == {"user id": "This is current item"}
+    assert client.get("/items/3").json() == {"Items are: ": "3"}
+    assert client.get("/users").json() == ["Ricky, Martin"]
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from constant_responses import serve_constant_responses
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def get_root():
+        return {"message": "Hello Constant Responses!"}
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
+
+
+def test_only_constant_path_operations_are_switched():
+    app = make_app()
+    switched = serve_constant_responses(app)
+    assert [route.path for route in switched] == ["/"]
+
+
+def test_constant_response_is_the_rendered_response():
+    expected = TestClient(make_app()).get("/")
+    app = make_app()
+    serve_constant_responses(app)
+    response = TestClient(app).get("/")
+    assert response.status_code == expected.status_code
+    assert response.content == expected.content
+    assert response.headers["content-type"] == expected.headers["content-type"]
+    assert response.headers["content-length"] == expected.headers["content-length"]
+    assert TestClient(app).get("/items/3").json() == {"item_id": 3}
+
+
+def test_headers_are_not_shared_between_requests():
+    app = make_app()
+    serve_constant_responses(app)
+    app.add_middleware(CORSMiddleware, allow_origins=["https://example.com"])
+    client = TestClient(app)
+    for _ in range(3):
+        response = client.get("/", headers={"Origin": "https://example.com"})
+        assert response.headers["vary"] == "Origin"
+        assert response.headers["access-control-allow-origin"] == "https://example.com"
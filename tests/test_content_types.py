@@ -0,0 +1,15 @@
+import pytest
+
+from content_types import is_json_request
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "application/json; charset=utf-8",
+                                          "Application/JSON", "application/vnd.api+json"])
+def test_json(content_type):
+    assert is_json_request(content_type)
+
+
+@pytest.mark.parametrize("content_type", [None, "", "text/plain", "application/x-www-form-urlencoded",
+                                          "text/json", "application/jsonp", "multipart/form-data; boundary=x"])
+def test_not_json(content_type):
+    assert not is_json_request(content_type)
@@ -0,0 +1,121 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.routing import APIRoute
+from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from direct_json import DirectJSONRoute
+from json_array_stream import StreamingJSONArrayResponse
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+    tax: float | None = None
+
+
+def make_app(route_class=DirectJSONRoute) -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = route_class
+
+    @app.get("/item", response_model=Item, response_model_exclude_none=True)
+    async def get_item() -> Any:
+        return {"name": "Murugan", "price": 6, "password": "Vel"}
+
+    @app.get("/items", response_model=list[Item], response_class=JSONResponse)
+    async def get_items() -> Any:
+        return [{"name": "Kumaran", "price": 1, "tax": 0.5}]
+
+    @app.get("/stream", response_model=list[Item], response_class=StreamingJSONArrayResponse)
+    async def stream_items():
+        for price in range(3):
+            yield {"name": "Valli", "price": price}
+
+    @app.get("/html", response_class=HTMLResponse)
+    async def get_html():
+        return "<p>Vel</p>"
+
+    router = APIRouter(route_class=DirectJSONRoute)
+
+    @router.get("/item", response_model=Item, response_model_include={"name"})
+    async def get_included_item() -> Any:
+        return {"name": "Senthil", "price": 1}
+
+    app.include_router(router, prefix="/included")
+    return app
+
+
+def test_same_responses_as_apiroute():
+    direct, plain = TestClient(make_app()), TestClient(make_app(route_class=APIRoute))
+    for path in ("/item", "/items", "/included/item", "/html"):
+        response, expected = direct.get(path), plain.get(path)
+        assert (response.status_code, response.content) == (expected.status_code, expected.content), path
+        assert response.headers["content-type"] == expected.headers["content-type"], path
+    assert direct.get("/item").json() == {"name": "Murugan", "price": 6.0}
+    assert direct.get("/included/item").json() == {"name": "Senthil"}
+
+
+def test_stream_is_a_json_array():
+    response = TestClient(make_app()).get("/stream")
+    assert response.json() == [{"name": "Valli", "price": float(price), "tax": None} for price in range(3)]
+
+
+def test_route_keeps_its_own_response_class_and_field():
+    app = make_app()
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/items")
+    response_field, response_class = route.response_field, route.response_class
+    for _ in range(2):
+        route.get_route_handler()
+    assert (route.response_field, route.response_class) == (response_field, response_class)
+    schema = app.openapi()["paths"]["/item"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema == {"$ref": "#/components/schemas/Item"}
+
+
+def test_tutorial_apps_use_it_from_the_start():
+    from extra_models import app as extra_models_app
+    from response_model_return_type import app as return_type_app
+
+    for app in (extra_models_app, return_type_app):
+        assert app.router.route_class is DirectJSONRoute
+    client = TestClient(return_type_app)
+    item = {"name": "Valliammai", "price": 6.6}
+    assert client.post("/ResponseType/", json=item).json() == {**item, "description": None, "tax": None, "tags": []}
+    assert client.post("/Floors/", json=item).json()[0]["name"] == "Valliammai"
+    assert TestClient(extra_models_app).get("/items/").json() == [
+        {"name": "Foo", "description": "There comes my hero"},
+        {"name": "Red", "description": "It's my aeroplane"},
+    ]
+
+
+def test_status_code_headers_and_validation_are_kept():
+    def tag(response: Response):
+        response.headers["X-Vel"] = "Murugan"
+
+    app = FastAPI()
+    app.router.route_class = DirectJSONRoute
+
+    @app.post("/item", response_model=Item, response_class=JSONResponse, status_code=201, dependencies=[Depends(tag)])
+    def create_item(name: str, response: Response) -> Any:
+        response.set_cookie("valli", "1")
+        return {"name": name, "price": 1}
+
+    @app.get("/moved", response_model=Item, response_class=JSONResponse)
+    async def moved(response: Response) -> Any:
+        response.status_code = 202
+        return {"name": "Kandan", "price": 2}
+
+    @app.get("/invalid", response_model=Item, response_class=JSONResponse)
+    async def invalid() -> Any:
+        return {"name": "Guhan"}
+
+    client = TestClient(app, raise_server_exceptions=False)
+    response = client.post("/item", params={"name": "Saravanan"})
+    assert (response.status_code, response.json()) == (201, {"name": "Saravanan", "price": 1.0, "tax": None})
+    assert response.headers["x-vel"] == "Murugan"
+    assert response.cookies["valli"] == "1"
+    assert client.get("/moved").status_code == 202
+    assert client.get("/invalid").status_code == 500
+    parameters = app.openapi()["paths"]["/item"]["post"]["parameters"]
+    assert [parameter["name"] for parameter in parameters] == ["name"]
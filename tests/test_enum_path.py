@@ -0,0 +1,43 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from path_parameters import ModelName, app
+
+client = TestClient(app)
+
+
+def test_known_values():
+    assert client.get("/models/AlexNet").json() == {"Model Name": "AlexNet", "message": "Best CV model"}
+    assert client.get("/models/LeNet").json() == {"Model Name": "LeNet", "message": "Developed by Yann LeCun"}
+    assert client.get("/models/ResNet").json() == ["ResNet", {"message": "Residual Network"}]
+
+
+def test_unknown_value_gives_the_same_422_as_fastapi():
+    plain = FastAPI()
+
+    @plain.get("/models/{model_name}")
+    async def get_model(model_name: ModelName):
+        return model_name
+
+    expected = TestClient(plain).get("/models/VGG")
+    response = client.get("/models/VGG")
+    assert response.status_code == expected.status_code == 422
+    assert response.json() == expected.json()
+    assert response.headers["content-type"] == expected.headers["content-type"]
+
+
+def test_rejected_value_is_json_escaped():
+    response = client.get('/models/"quoted"')
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["input"] == '"quoted"'
+
+
+# path_parameters.py declares /items/{item_id} twice, to show that the second one is never reached.
+@pytest.mark.filterwarnings("ignore:Duplicate Operation ID:UserWarning")
+def test_parameter_is_documented():
+    parameters = client.get("/openapi.json").json()["paths"]["/models/{model_name}"]["get"]["parameters"]
+    assert parameters == [{"name": "model_name", "in": "path", "required": True,
+                           "schema": {"type": "string", "enum": [member.value for member in ModelName],
+                                      "title": "ModelName"}}]
+
@@ -0,0 +1,72 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from gateway import Gateway, LifespanFailed
+
+
+def make_app(name: str, events: list[str]) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append(f"{name} startup")
+        yield
+        events.append(f"{name} shutdown")
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"app": name, "item_id": item_id}
+
+    return app
+
+
+def test_dispatches_on_first_segment():
+    events = []
+    client = TestClient(Gateway({"first": make_app("first", events), "second": make_app("second", events)}))
+    assert client.get("/second/items/3").json() == {"app": "second", "item_id": 3}
+    assert client.get("/first/items/1").json() == {"app": "first", "item_id": 1}
+
+
+def test_unknown_prefix_is_not_found():
+    client = TestClient(Gateway({"first": make_app("first", [])}))
+    response = client.get("/third/items/1")
+    assert response.status_code == 404
+
+
+def test_bare_prefix_redirects_with_slash():
+    client = TestClient(Gateway({"first": make_app("first", [])}))
+    response = client.get("/first", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "http://testserver/first/"
+
+
+def test_mounted_apps_get_docs_urls_under_their_prefix():
+    client = TestClient(Gateway({"first": make_app("first", [])}))
+    assert "/first/openapi.json" in client.get("/first/docs").text
+
+
+def test_lifespan_is_forwarded_to_mounted_apps():
+    events = []
+    gateway = Gateway({"first": make_app("first", events), "second": make_app("second", events)})
+    with TestClient(gateway):
+        assert events == ["first startup", "second startup"]
+    assert events == ["first startup", "second startup", "second shutdown", "first shutdown"]
+
+
+def test_failed_startup_fails_the_gateway():
+    @asynccontextmanager
+    async def lifespan(app):
+        raise RuntimeError("no database")
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    events = []
+    gateway = Gateway({"first": make_app("first", events), "broken": app})
+    with pytest.raises(LifespanFailed, match="no database"):
+        with TestClient(gateway):
+            pass
+    assert events == ["first startup", "first shutdown"]
@@ -0,0 +1,65 @@
+import json
+import sys
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel
+
+from body_nested_models import Item
+from interning import InternPool
+
+
+def test_equal_tags_of_different_items_are_the_same_object():
+    first = Item.model_validate(json.loads('{"name": "a", "price": 1, "tax": 0, "tags": ["Velan", "Senthuran"]}'))
+    second = Item.model_validate(json.loads('{"name": "b", "price": 2, "tax": 0, "tags": ["Velan"]}'))
+    [first_tag] = [tag for tag in first.tags if tag == "Velan"]
+    [second_tag] = list(second.tags)
+    assert first_tag is second_tag
+
+
+def test_schema_is_the_same_as_str():
+    class PlainItem(BaseModel):
+        tags: set[str] = set()
+
+    assert Item.model_json_schema()["properties"]["tags"] == PlainItem.model_json_schema()["properties"]["tags"]
+
+
+def test_pool_is_bounded():
+    pool = InternPool(maxsize=2)
+
+    class Tagged(BaseModel):
+        tags: list[Annotated[str, AfterValidator(pool)]]
+
+    Tagged(tags=["a", "b", "c", "a", "c"])
+    assert len(pool) == 2
+    assert (pool.hits, pool.misses) == (1, 4)
+    pool.clear()
+    assert (len(pool), pool.hits, pool.misses) == (0, 0, 0)
+
+
+def test_long_values_are_not_pooled():
+    pool = InternPool(max_length=8)
+    assert pool("Velan") is pool("".join(["Vel", "an"]))
+    long_value = "Senthuran" * 1000
+    assert pool(long_value) is long_value
+    assert len(pool) == 1
+
+
+def test_random_values_only_push_out_the_ones_not_in_use():
+    pool = InternPool(maxsize=100, max_bytes=8 * 1024)
+    for number in range(100_000):
+        pool(f"random-{number}")
+        if number % 10 == 0:
+            pool("".join(["Vel", "an"]))
+    assert len(pool) <= 100 and pool.bytes <= 8 * 1024
+    assert pool.bytes == sum(sys.getsizeof(value) for value in pool.strings)
+    assert "Velan" in pool.strings
+    assert pool.hits == 10_000 - 1
+    assert pool.evictions > 0
+
+
+def test_pool_is_bounded_by_bytes():
+    pool = InternPool(max_length=64, max_bytes=1024)
+    for number in range(1000):
+        pool(f"{number:064d}")
+    assert pool.bytes <= 1024
+    assert len(pool) == 1024 // sys.getsizeof("0" * 64)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.exceptions import ResponseValidationError
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from direct_json import DirectJSONRoute
+from json_array_stream import StreamingJSONArrayResponse, json_array
+from response_plans import response_plan
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+    tax: float | None = None
+
+
+def make_app(items, route_class=DirectJSONRoute) -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = route_class
+
+    @app.get("/async", response_model=list[Item], response_class=StreamingJSONArrayResponse,
+             response_model_exclude={"tax"})
+    async def async_items():
+        for item in items:
+            yield item
+
+    @app.get("/sync", response_model=list[Item], response_class=StreamingJSONArrayResponse)
+    def sync_items():
+        yield from items
+
+    @app.get("/list", response_model=list[Item])
+    async def list_items():
+        return items
+
+    return app
+
+
+async def _chunks(items, plan=None):
+    return [chunk async for chunk in json_array(items, plan)]
+
+
+def test_one_chunk_per_item():
+    assert asyncio.run(_chunks([1, {"a": "é"}])) == [b"[1", b',{"a":"\xc3\xa9"}', b"]"]
+    assert asyncio.run(_chunks([])) == [b"[]"]
+
+
+def test_same_json_as_the_list():
+    items = [{"name": "Murugan", "price": 6, "tax": 1}, {"name": "Valli", "price": 1.5}]
+    client = TestClient(make_app(items))
+    assert client.get("/sync").content == client.get("/list").content
+    assert client.get("/async").json() == [{"name": "Murugan", "price": 6.0}, {"name": "Valli", "price": 1.5}]
+    assert client.get("/sync").headers["content-type"] == "application/json"
+
+
+def test_without_direct_json_route_items_are_encoded_as_they_are():
+    from fastapi.routing import APIRoute
+
+    client = TestClient(make_app([{"name": "Murugan", "price": 6, "extra": True}], route_class=APIRoute))
+    assert client.get("/sync").json() == [{"name": "Murugan", "price": 6, "extra": True}]
+
+
+def test_invalid_item_leaves_the_array_open():
+    plan = response_plan(Item)
+
+    async def chunks():
+        received = []
+        with pytest.raises(ResponseValidationError) as exc_info:
+            async for chunk in json_array([{"name": "Murugan", "price": 6}, {"name": "Valli"}], plan):
+                received.append(chunk)
+        return received, exc_info.value.errors()
+
+    received, errors = asyncio.run(chunks())
+    assert received == [b'[{"name":"Murugan","price":6.0,"tax":null}']
+    assert errors[0]["loc"] == ("response", 1, "price")
+
+
+def test_docs_show_the_list_model():
+    schema = make_app([]).openapi()["paths"]["/async"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert schema["schema"] == {"type": "array", "items": {"$ref": "#/components/schemas/Item"},
+                                "title": "Response Async Items Async Get"}
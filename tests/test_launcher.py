@@ -0,0 +1,50 @@
+import mmap
+
+from launcher import SLOT_HEADER, SharedMetrics
+from metrics import MetricsRegistry
+
+SLOT_SIZE = 4096
+
+
+def make_workers(slots: int = 2) -> list[SharedMetrics]:
+    segment = mmap.mmap(-1, slots * SLOT_SIZE)
+    return [SharedMetrics(segment, slot, slots, SLOT_SIZE) for slot in range(slots)]
+
+
+def make_registry(*durations_us: int) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    for duration_us in durations_us:
+        registry.record("GET", "/items/{item_id}", 200, duration_us)
+    return registry
+
+
+def test_collect_adds_up_all_the_workers():
+    first, second = make_workers()
+    second.publish(make_registry(100, 200))
+    cluster = first.collect(make_registry(300))
+    histogram = cluster.histograms[("GET", "/items/{item_id}", 200)]
+    assert (histogram.count, histogram.sum) == (3, 600)
+
+
+def test_sequence_is_even_after_every_publish():
+    worker, _ = make_workers()
+    for _ in range(3):
+        worker.publish(make_registry(100))
+        assert SLOT_HEADER.unpack_from(worker.segment, 0)[0] % 2 == 0
+
+
+def test_slot_of_a_worker_killed_while_publishing_recovers():
+    dead, reader = make_workers()
+    dead.publish(make_registry(100))
+    sequence, _ = SLOT_HEADER.unpack_from(dead.segment, 0)
+    # Killed between the two writes of the header.
+    SLOT_HEADER.pack_into(dead.segment, 0, sequence + 1, 0)
+    assert reader.read(0) == []
+
+    restarted = SharedMetrics(dead.segment, 0, 2, SLOT_SIZE)
+    restarted.publish(make_registry(100, 200))
+    assert SLOT_HEADER.unpack_from(dead.segment, 0)[0] % 2 == 0
+    restarted.publish(make_registry(100, 200))
+    assert SLOT_HEADER.unpack_from(dead.segment, 0)[0] % 2 == 0
+    histogram = reader.collect(MetricsRegistry()).histograms[("GET", "/items/{item_id}", 200)]
+    assert (histogram.count, histogram.sum) == (2, 300)
@@ -0,0 +1,85 @@
+import textwrap
+import warnings
+
+import fastapi
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from lazy_app import create_app, lazy_routes, startup_report, warmup
+
+TUTORIAL = '''
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+app = FastAPI()
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+@app.get("/")
+async def get_root():
+    return {"message": "Hello Lazy"}
+
+@app.post("/items/")
+async def create_item(item: Item):
+    return item
+'''
+
+
+def make_module(tmp_path, name: str):
+    path = tmp_path / f"{name}.py"
+    path.write_text(textwrap.dedent(TUTORIAL))
+    return path
+
+
+def test_routes_are_built_on_first_request(tmp_path):
+    app = create_app(make_module(tmp_path, "lazy_tutorial_first_request"))
+    root, items = lazy_routes(app)
+    assert not root.is_built and not items.is_built
+    client = TestClient(app)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert client.get("/").json() == {"message": "Hello Lazy"}
+        assert root.is_built and not items.is_built
+        assert client.post("/items/", json={"name": "Murugan", "price": 6}).json() == {"name": "Murugan", "price": 6.0}
+        assert client.post("/items/", json={"name": "Murugan"}).status_code == 422
+
+
+def test_warmup_builds_routes_and_models(tmp_path):
+    path = make_module(tmp_path, "lazy_tutorial_warmup")
+    app = create_app(path)
+    import lazy_tutorial_warmup
+
+    assert not lazy_tutorial_warmup.Item.__pydantic_complete__
+    warmup(app)
+    assert all(route.is_built for route in lazy_routes(app))
+    assert lazy_tutorial_warmup.Item.__pydantic_complete__
+    assert "deferred" not in startup_report({"lazy_tutorial_warmup": app})
+
+
+def test_report_lists_deferred_routes(tmp_path):
+    app = create_app(make_module(tmp_path, "lazy_tutorial_report"))
+    report = startup_report({"lazy_tutorial_report": app})
+    assert "GET /" in report and "POST /items/" in report
+    assert report.count("deferred") == 2
+
+
+def test_only_the_tutorial_module_is_lazy(tmp_path):
+    (tmp_path / "lazy_tutorial_helpers.py").write_text(textwrap.dedent('''
+        from pydantic import BaseModel
+
+        class Helper(BaseModel):
+            name: str
+    '''))
+    path = make_module(tmp_path, "lazy_tutorial_scope")
+    path.write_text(path.read_text() + "\nimport fastapi as imported_fastapi\nfrom lazy_tutorial_helpers import Helper\n")
+    fastapi_app, config = fastapi.FastAPI, dict(BaseModel.model_config)
+    create_app(path)
+    import lazy_tutorial_helpers
+    import lazy_tutorial_scope
+
+    assert (fastapi.FastAPI, BaseModel.model_config) == (fastapi_app, config)
+    assert lazy_tutorial_helpers.Helper.__pydantic_complete__
+    assert not lazy_tutorial_scope.Item.__pydantic_complete__
+    assert lazy_tutorial_scope.imported_fastapi.Body is fastapi.Body
@@ -0,0 +1,74 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+
+from body_nested_models import LazyOffer, Offer, TModItem, app
+
+ITEM = {"name": "Shanmugar", "price": 389.99, "tax": 18.4, "tags": ["Velan"],
+        "image": [{"url": "https://instagram.com/", "name": "Instagram"}]}
+OFFER = {"name": "SevalKodiVeeran", "items": [ITEM, {**ITEM, "name": "SenthilNathar"}]}
+INVALID = {**OFFER, "items": [ITEM, {**ITEM, "price": "free"}]}
+
+
+def test_items_are_validated_on_first_use():
+    offer = LazyOffer.model_validate(OFFER)
+    assert not offer.items.is_validated
+    assert len(offer.items) == 2
+    assert not offer.items.is_validated
+    assert isinstance(offer.items[0], TModItem)
+    assert offer.items.is_validated
+    assert offer.model_dump() == Offer.model_validate(OFFER).model_dump()
+
+
+def test_invalid_items_give_the_eager_errors_on_first_use():
+    offer = LazyOffer.model_validate(INVALID)
+    with pytest.raises(RequestValidationError) as exc_info:
+        list(offer.items)
+    assert [error["loc"] for error in exc_info.value.errors()] == [("body", "items", 1, "price")]
+
+
+def test_route_only_counting_items_does_not_validate_them():
+    client = TestClient(app)
+    assert client.post("/order/lazy/", json=OFFER).json() == {"Offer": "SevalKodiVeeran", "Items": 2}
+
+
+def test_returned_offer_with_invalid_items_is_a_422():
+    lazy_app = FastAPI()
+
+    @lazy_app.post("/order/")
+    async def create_item(offer: LazyOffer):
+        return offer
+
+    client = TestClient(lazy_app)
+    assert client.post("/order/", json=OFFER).json()["items"][1]["name"] == "SenthilNathar"
+    response = client.post("/order/", json=INVALID)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "items", 1, "price"]
+
+
+def test_schema_is_the_same_as_a_list():
+    assert LazyOffer.model_json_schema()["properties"]["items"] == Offer.model_json_schema()["properties"]["items"]
+
+
+@pytest.mark.parametrize("route_class", ["APIRoute", "DirectJSONRoute"])
+def test_returned_offer_with_a_response_model(route_class):
+    from fastapi.routing import APIRoute
+
+    from direct_json import DirectJSONRoute
+
+    lazy_app = FastAPI()
+    lazy_app.router.route_class = {"APIRoute": APIRoute, "DirectJSONRoute": DirectJSONRoute}[route_class]
+
+    @lazy_app.post("/order/", response_model=LazyOffer)
+    async def create_item(offer: LazyOffer):
+        assert not offer.items.is_validated
+        return offer
+
+    client = TestClient(lazy_app)
+    response = client.post("/order/", json=INVALID)
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "items", 1, "price"]]
+    response = client.post("/order/", json=OFFER)
+    assert response.status_code == 200
+    assert response.json() == Offer.model_validate(OFFER).model_dump(mode="json")
@@ -0,0 +1,79 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+
+from load_benchmark import first_valid, format_results, generate_requests, run_benchmark
+from tutorials import load_tutorial_apps
+
+TUTORIAL = '''
+from typing import Annotated
+
+from fastapi import FastAPI, Header, HTTPException
+
+app = FastAPI()
+
+items = {"foo": {"name": "Foo"}, "bar": {"name": "Bar"}}
+prices = {1: 50.2, 2: 62.0}
+
+@app.get("/items/{item_id}")
+async def read_item(item_id: str):
+    if item_id not in items:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return items[item_id]
+
+@app.get("/prices/{price_id}")
+async def read_price(price_id: int):
+    if price_id not in prices:
+        raise HTTPException(status_code=404, detail="Price not found")
+    return prices[price_id]
+
+@app.get("/secret/")
+async def read_secret(x_token: Annotated[str, Header(examples=["fake-super-secret-token"])],
+                      if_match: Annotated[str | None, Header()] = None):
+    if x_token != "fake-super-secret-token" or if_match is not None:
+        raise HTTPException(status_code=400, detail="Bad headers")
+    return {"secret": 42}
+'''
+
+
+@pytest.fixture
+def tutorial(tmp_path):
+    for name in ("load_tutorial_used", "load_tutorial_unused"):
+        (tmp_path / f"{name}.py").write_text(textwrap.dedent(TUTORIAL))
+    yield tmp_path
+    for name in ("load_tutorial_used", "load_tutorial_unused"):
+        sys.modules.pop(name, None)
+
+
+def test_only_the_requested_modules_are_imported(tutorial):
+    apps = load_tutorial_apps(tutorial, names=["load_tutorial_used"])
+    assert list(apps) == ["load_tutorial_used"]
+    assert "load_tutorial_unused" not in sys.modules
+    with pytest.raises(ValueError, match="missing"):
+        load_tutorial_apps(tutorial, names=["missing"])
+
+
+def test_ids_come_from_the_module_data(tutorial):
+    app = load_tutorial_apps(tutorial, names=["load_tutorial_used"])["load_tutorial_used"]
+    requests = dict(generate_requests(app, vars(sys.modules["load_tutorial_used"])))
+    assert [request.path for request in requests["GET /items/{item_id}"]][:2] == ["/items/foo", "/items/bar"]
+    assert requests["GET /prices/{price_id}"][0].path == "/prices/1"
+    secret = requests["GET /secret/"]
+    assert len(secret) == 1
+    assert dict(secret[0].headers) == {b"x-token": b"fake-super-secret-token"}
+    chosen = asyncio.run(first_valid(app, requests["GET /items/{item_id}"]))
+    assert chosen.path == "/items/foo"
+
+
+def test_every_endpoint_gets_valid_requests(tutorial):
+    apps = load_tutorial_apps(tutorial, names=["load_tutorial_used"])
+    results = asyncio.run(run_benchmark(apps, requests=20, concurrency=2))
+    assert {result.endpoint: result.error_rate for result in results} == {
+        "load_tutorial_used GET /items/{item_id}": 0,
+        "load_tutorial_used GET /prices/{price_id}": 0,
+        "load_tutorial_used GET /secret/": 0,
+    }
+    assert all(result.peak_alloc_bytes > 0 for result in results)
+    assert "peak alloc B" in format_results(results).splitlines()[0]
@@ -0,0 +1,80 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from metrics import Histogram, MetricsRegistry, add_metrics
+
+
+def make_app(registry: MetricsRegistry) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        if item_id == 3:
+            raise HTTPException(status_code=418, detail="Nope! I don't like 3")
+        return {"item_id": item_id}
+
+    add_metrics(app, registry=registry)
+    return app
+
+
+def test_record_matches_index():
+    for value in [0, 1, 255, 256, 257, 1000, 123_456, 59_999_999]:
+        histogram = Histogram()
+        histogram.record(value)
+        index = Histogram.index(value)
+        assert histogram.counts[index] == 1
+        assert Histogram.highest_value(index) >= value
+        assert index == 0 or Histogram.highest_value(index - 1) < value
+
+
+def test_quantiles_keep_two_significant_digits():
+    values = list(range(1000, 1_000_000, 997))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for quantile in (0.5, 0.9, 0.99):
+        exact = values[round(quantile * len(values)) - 1]
+        assert abs(histogram.value_at_quantile(quantile) - exact) <= exact / 100
+
+
+def test_requests_are_labelled_by_route_template_and_status():
+    registry = MetricsRegistry()
+    client = TestClient(make_app(registry))
+    for item_id in (1, 2, 3, 42):
+        client.get(f"/items/{item_id}")
+    client.get("/missing")
+    counts = {key: histogram.count for key, histogram in registry.histograms.items()}
+    assert counts == {
+        ("GET", "/items/{item_id}", 200): 3,
+        ("GET", "/items/{item_id}", 418): 1,
+        ("GET", "<unmatched>", 404): 1,
+    }
+
+
+def test_prometheus_exposition():
+    registry = MetricsRegistry()
+    client = TestClient(make_app(registry))
+    client.get("/items/1")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    labels = 'method="GET",route="/items/{item_id}",status="200"'
+    assert f"http_request_duration_seconds_count{{{labels}}} 1" in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines if line.startswith(f"http_request_duration_seconds_bucket{{{labels}")]
+    assert buckets == sorted(buckets)
+
+
+def test_snapshot_and_merge_add_up():
+    first, second = MetricsRegistry(), MetricsRegistry()
+    for value in (100, 2_000, 30_000):
+        first.record("GET", "/", 200, value)
+        second.record("GET", "/", 200, value * 2)
+    total = MetricsRegistry()
+    total.merge(first.snapshot())
+    total.merge(second.snapshot())
+    histogram = total.histograms[("GET", "/", 200)]
+    assert histogram.count == 6
+    assert histogram.sum == 3 * (100 + 2_000 + 30_000)
+    assert sum(histogram.counts) == 6
@@ -0,0 +1,81 @@
+from typing import Annotated
+
+from fastapi import Body, FastAPI
+from pydantic import BaseModel, ConfigDict, Field
+
+from model_warmup import model_timings, route_models, time_validation, validation_report, warmup_models
+
+
+class Image(BaseModel):
+    url: str
+    name: str
+
+
+class Item(BaseModel):
+    name: str = Field(examples=["Murugan"])
+    price: float = Field(examples=[6.66])
+    images: list[Image] | None = None
+
+
+class Receipt(BaseModel):
+    total: float
+
+    model_config = {"json_schema_extra": {"examples": [{"total": 6.66}, {"total": "not a number"}]}}
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.put("/items/{item_id}", response_model=Receipt)
+    async def update_item(item_id: int, item: Annotated[Item, Body(examples=[{"name": "Valli", "price": 1}])]):
+        return {"total": item.price}
+
+    return app
+
+
+def test_models_of_parameters_responses_and_nested_fields():
+    found = route_models(make_app())
+    assert set(found) == {Item, Image, Receipt}
+    assert found[Item] == [{"name": "Murugan", "price": 6.66}, {"name": "Valli", "price": 1}]
+    assert found[Image] == []
+    assert found[Receipt] == [{"total": 6.66}, {"total": "not a number"}]
+
+
+def test_warmup_only_builds_deferred_models():
+    class Deferred(BaseModel):
+        model_config = ConfigDict(defer_build=True)
+        image: Image
+
+    app = make_app()
+
+    @app.post("/deferred")
+    async def create_deferred(deferred: Deferred):
+        return deferred
+
+    assert not Deferred.__pydantic_complete__
+    validator = Item.__pydantic_validator__
+    build_ns = warmup_models(app)
+    assert list(build_ns) == [Deferred] and build_ns[Deferred] > 0
+    assert Deferred.__pydantic_complete__
+    assert Item.__pydantic_validator__ is validator
+    assert warmup_models(app) == {}
+
+
+def test_timings_time_every_build():
+    timings = model_timings(make_app())
+    assert set(timings) == {Item, Image, Receipt}
+    assert all(timing.build_ns > 0 for timing in timings.values())
+
+
+def test_invalid_examples_are_counted_not_timed():
+    timing = time_validation(model_timings(make_app())[Receipt])
+    assert timing.invalid_examples == 1
+    assert timing.python_ns > 0 and timing.json_ns > 0
+    assert time_validation(model_timings(make_app())[Image]).python_ns is None
+
+
+def test_report_has_a_line_per_model():
+    lines = validation_report({"tutorial": make_app()}).splitlines()
+    assert lines[1] == "tutorial"
+    assert sorted(line.split()[0] for line in lines[2:]) == ["Image", "Item", "Receipt"]
+    assert "(1 invalid)" in next(line for line in lines if line.strip().startswith("Receipt"))
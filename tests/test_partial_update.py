@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client():
+    import body_updates
+
+    return TestClient(body_updates.app)
+
+
+def test_response_has_the_shape_of_the_model(client):
+    response = client.patch("/items/Murugan", json={"price": 1})
+    assert response.status_code == 200
+    assert response.json() == {"name": "Murugan", "description": "God Of War", "price": 1.0, "tax": None, "tags": []}
+    assert response.headers["etag"]
+
+
+def test_only_the_sent_fields_change(client):
+    response = client.patch("/items/Shanmugar", json={"tax": 2})
+    assert response.json()["tags"] == ["Shanmugar", "JayanthiNathar", "Thirucheeralaivai Murugan"]
+    assert response.json()["tax"] == 2.0
+
+
+def test_invalid_field_has_the_loc_of_the_model(client):
+    response = client.patch("/items/Senthil", json={"price": "free"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "price"]
+
+
+def test_missing_item(client):
+    assert client.patch("/items/Valli", json={"price": 1}).status_code == 404
+
+
+def test_stale_if_match(client):
+    etag = client.patch("/items/Senthil", json={"price": 3}).headers["etag"]
+    client.patch("/items/Senthil", json={"price": 4})
+    assert client.patch("/items/Senthil", json={"price": 5}, headers={"If-Match": etag}).status_code == 412
+
+
+def test_openapi_declares_the_model(client):
+    operation = client.get("/openapi.json").json()["paths"]["/items/{item_id}"]["patch"]
+    schema = operation["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema == {"$ref": "#/components/schemas/Items"}
+
+
+def test_tutorial_put_still_replaces_the_item(client):
+    response = client.put("/items/Murugan", json={"name": "Murugan", "price": 7})
+    assert response.status_code == 200
+    assert client.patch("/items/Murugan", json={}).json()["price"] == 7.0
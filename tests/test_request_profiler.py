@@ -0,0 +1,68 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from request_profiler import ProfilerMiddleware, StackSampler, profile_header, verify_profile_header
+
+SECRET = b"fake-super-secret"
+
+
+def busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_client(tmp_path, **options) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/albums/{album_id}")
+    async def get_albums(album_id: int):
+        busy_loop(0.05)
+        return {"album_id": album_id}
+
+    @app.get("/other")
+    async def get_other():
+        busy_loop(0.05)
+        return {}
+
+    app.add_middleware(ProfilerMiddleware, secret=SECRET, output_dir=str(tmp_path),
+                       sampler=StackSampler(interval=0.001), **options)
+    return TestClient(app)
+
+
+def test_profile_header_is_bound_to_method_path_and_expiry():
+    value = profile_header(SECRET, "GET", "/albums/1")
+    assert verify_profile_header(SECRET, "GET", "/albums/1", value)
+    assert not verify_profile_header(SECRET, "PUT", "/albums/1", value)
+    assert not verify_profile_header(SECRET, "GET", "/albums/2", value)
+    assert not verify_profile_header(b"other secret", "GET", "/albums/1", value)
+    assert not verify_profile_header(SECRET, "GET", "/albums/1", profile_header(SECRET, "GET", "/albums/1", ttl=-10))
+    assert not verify_profile_header(SECRET, "GET", "/albums/1", "garbage")
+
+
+def test_signed_request_writes_a_collapsed_profile(tmp_path):
+    client = make_client(tmp_path)
+    response = client.get("/albums/1", headers={"X-Profile": profile_header(SECRET, "GET", "/albums/1")})
+    assert response.json() == {"album_id": 1}
+    [profile] = tmp_path.glob("get_albums-*.collapsed")
+    lines = profile.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "busy_loop" in profile.read_text()
+
+
+def test_unsigned_and_wrongly_signed_requests_are_not_profiled(tmp_path):
+    client = make_client(tmp_path)
+    client.get("/albums/1")
+    client.get("/albums/1", headers={"X-Profile": profile_header(SECRET, "GET", "/albums/2")})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_only_the_selected_endpoints_are_written(tmp_path):
+    client = make_client(tmp_path, sample_rate=1.0, endpoints={"get_albums"})
+    client.get("/other")
+    client.get("/albums/1")
+    assert [path.name.split("-")[0] for path in tmp_path.iterdir()] == ["get_albums"]
@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from response_plans import response_plan
+
+
+class Item(BaseModel):
+    name: str
+    description: str | None = None
+    price: float
+    tax: float = 10.5
+
+
+bar = {"name": "Bar", "description": "The War fighters", "price": 62, "tax": 20.2}
+options = [
+    {"include": {"name", "description"}},
+    {"exclude": {"tax"}},
+    {"include": ["name", "price"], "exclude": ("price",)},
+    {"exclude": {"tax"}, "exclude_unset": True},
+    {"include": {"name": True, "tax": True}},
+    {"exclude_none": True},
+]
+
+
+@pytest.mark.parametrize("value", [bar, {"name": "Foo", "price": 50.2}, Item(name="Baz", price=1)])
+@pytest.mark.parametrize("option", options)
+def test_same_json_as_the_serializer(option, value):
+    plan = response_plan(Item, **option)
+    validated, errors = plan.validate(value, loc=("response",))
+    assert errors == []
+    expected = {**option}
+    for name in ("include", "exclude"):
+        if isinstance(expected.get(name), (list, tuple)):
+            expected[name] = set(expected[name])
+    adapter = TypeAdapter(Item)
+    assert plan.serialize_json(validated) == adapter.dump_json(adapter.validate_python(value), **expected)
+    assert plan.serialize(validated) == adapter.dump_python(adapter.validate_python(value), mode="json", **expected)
+
+
+def test_fields_left_out_are_compiled():
+    plan = response_plan(Item, include={"name"})
+    assert plan.projection is not None and plan.projection.__name__ == "Item"
+    assert response_plan(Item, include=["name"]) is plan
+    assert response_plan(Item, include={"name": True}).projection is None
+
+
+def test_same_errors_as_the_model():
+    plan = response_plan(Item, exclude={"tax"})
+    _, errors = plan.validate({"name": "Foo"}, loc=("response",))
+    with pytest.raises(ValidationError) as exc_info:
+        Item.model_validate({"name": "Foo"})
+    assert [error["loc"] for error in errors] == [("response", "price")]
+    assert [error["type"] for error in errors] == [error["type"] for error in exc_info.value.errors()]
+
+
+def test_response_model_return_type_routes():
+    from response_model_return_type import app
+
+    client = TestClient(app)
+    assert client.get("/items/bar/name").json() == {"name": "Bar", "description": "The War fighters"}
+    assert client.get("/items/bar/public").json() == {"name": "Bar", "description": "The War fighters", "price": 62.0}
+    assert client.get("/Component/x/identity", params={"item_id": "foo"}).json() == {"name": "Foo", "description": None}
+    assert client.get("/Category/x/domain", params={"item_id": "baz"}).json() == {
+        "name": "Baz", "description": "There goes my baz", "price": 50.2}
+    # exclude_unset, and items is the one of the include/exclude example by then
+    assert client.get("/boiler/foo").json() == {"name": "Foo", "price": 50.2}
@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+import path_parameters
+from sendfile_response import FileCache, SendfileResponse, parse_range
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "artifact.bin").write_bytes(CONTENT)
+    (tmp_path / ".env").write_text("SECRET=1")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("[core]")
+    monkeypatch.setattr(path_parameters, "FILES_DIR", tmp_path)
+    return TestClient(path_parameters.app)
+
+
+def test_whole_file(client):
+    response = client.get("/files/artifact.bin")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_range(client):
+    response = client.get("/files/artifact.bin", headers={"range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+
+def test_suffix_range(client):
+    response = client.get("/files/artifact.bin", headers={"range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-10:]
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/files/artifact.bin", headers={"range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    assert response.content == b""
+
+
+def test_if_none_match(client):
+    etag = client.get("/files/artifact.bin").headers["etag"]
+    response = client.get("/files/artifact.bin", headers={"if-none-match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get("/files/artifact.bin", headers={"if-none-match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("path", [".env", ".git/config", "../artifact.bin", "missing.bin", "%2e%2e/%2e%2e/etc/passwd"])
+def test_hidden_outside_and_missing_files_are_not_found(client, path):
+    assert client.get(f"/files/{path}").status_code == 404
+
+
+@pytest.mark.skipif("FILES_DIR" in os.environ, reason="FILES_DIR is set")
+def test_default_directory_is_the_files_directory():
+    assert path_parameters.FILES_DIR == (Path(path_parameters.__file__).parent / "files").resolve()
+
+
+def test_file_removed_before_sending_is_not_found(tmp_path):
+    path = tmp_path / "gone.bin"
+
+    async def endpoint(request):
+        return SendfileResponse(path, cache=FileCache())
+
+    response = TestClient(Starlette(routes=[Route("/", endpoint)])).get("/")
+    assert response.status_code == 404
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=0-9,20-29", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+def test_blocking_calls_run_in_worker_threads(client, monkeypatch):
+    import threading
+
+    import sendfile_response
+
+    threads = {}
+
+    def recorded(name, function):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return function(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(FileCache, "acquire", recorded("acquire", FileCache.acquire))
+    monkeypatch.setattr(Path, "resolve", recorded("resolve", Path.resolve))
+
+    async def loop_thread():
+        threads["loop"] = {threading.get_ident()}
+
+    app = path_parameters.app
+    with TestClient(app) as test_client:
+        test_client.portal.call(loop_thread)
+        assert test_client.get("/files/artifact.bin").content == CONTENT
+    assert threads["acquire"] and threads["resolve"]
+    assert not (threads["acquire"] | threads["resolve"]) & threads["loop"]
+    sendfile_response.file_cache.clear()
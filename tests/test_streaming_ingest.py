@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from body_nested_models import app
+from streaming_ingest import ArraySplitter
+
+client = TestClient(app)
+
+IMAGES = [
+    {"url": "https://example.com/murugan.jpg", "name": "Murugan"},
+    {"url": "https://example.org/valli.jpg", "name": "Valli [wife], {first}"},
+    {"url": "https://example.com/deivanai.jpg", "name": 'Deivanai \\"second\\"'},
+]
+
+
+def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_ndjson_body():
+    body = "\n".join(json.dumps(image) for image in IMAGES).encode()
+    response = client.post("/images/stream/", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.json() == {"Images": 3, "Hosts": ["example.com", "example.org"]}
+
+
+@pytest.mark.parametrize("size", [1, 7, 1024])
+def test_json_array_in_chunks(size):
+    body = json.dumps(IMAGES).encode()
+    response = client.post("/images/stream/", content=chunks(body, size), headers={"Content-Type": "application/json"})
+    assert response.json() == {"Images": 3, "Hosts": ["example.com", "example.org"]}
+
+
+def test_invalid_record_gives_its_position():
+    body = json.dumps([IMAGES[0], {"url": "not a url", "name": "broken"}]).encode()
+    response = client.post("/images/stream/", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "url"]
+
+
+def test_splitter_keeps_brackets_and_escapes_in_strings():
+    body = json.dumps(IMAGES).encode()
+    splitter = ArraySplitter()
+    elements = [element for chunk in chunks(body, 3) for element in splitter.feed(chunk)]
+    splitter.close()
+    assert [json.loads(element) for element in elements] == IMAGES
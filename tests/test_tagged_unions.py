@@ -0,0 +1,59 @@
+from typing import Literal
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from tagged_unions import tagged_union
+
+
+class Car(BaseModel):
+    type: Literal["car"]
+    description: str | None = None
+
+
+class Plane(BaseModel):
+    type: Literal["plane"]
+    size: float = 10.5
+
+
+class Boat(BaseModel):
+    type: str
+
+
+def test_inferred_tags():
+    adapter = TypeAdapter(tagged_union(Plane, Car))
+    assert type(adapter.validate_python({"type": "car"})) is Car
+    assert adapter.dump_python(adapter.validate_python({"type": "car"})) == {"type": "car", "description": None}
+    with pytest.raises(ValidationError) as exc_info:
+        adapter.validate_python({"type": "boat"})
+    assert exc_info.value.errors()[0]["type"] == "union_tag_invalid"
+    assert adapter.json_schema()["discriminator"]["mapping"] == {"car": "#/$defs/Car", "plane": "#/$defs/Plane"}
+
+
+def test_declared_tags():
+    adapter = TypeAdapter(tagged_union(field="type", tags={"boat": Boat, "plane": Plane}))
+    assert type(adapter.validate_python({"type": "boat"})) is Boat
+    assert type(adapter.validate_python(Plane(type="plane"))) is Plane
+    for value in ({"type": "car"}, {}, {"type": ["boat"]}):
+        with pytest.raises(ValidationError) as exc_info:
+            adapter.validate_python(value)
+        assert exc_info.value.errors()[0]["type"] == "tag_invalid"
+
+
+def test_members_without_tags_are_refused():
+    with pytest.raises(TypeError):
+        tagged_union(Plane, Boat)
+    with pytest.raises(TypeError):
+        tagged_union(Car, tags={"plane": Plane})
+    with pytest.raises(TypeError):
+        tagged_union()
+
+
+def test_vehicles():
+    from extra_models import app
+
+    client = TestClient(app)
+    assert client.post("/vehicles/foo").json() == {"description": "This a car type", "type": "car"}
+    assert client.post("/vehicles/bar").json() == {"description": "This is a plane", "type": "plane", "size": 66.66666}
+    assert client.post("/vehicles/baz").status_code == 404
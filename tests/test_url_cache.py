@@ -0,0 +1,75 @@
+import threading
+
+from fastapi.testclient import TestClient
+from pydantic import HttpUrl, TypeAdapter
+
+from body_nested_models import ModImage, app
+from url_cache import UrlCache, url_cache
+
+client = TestClient(app)
+
+OFFER = {
+    "name": "SevalKodiVeeran",
+    "items": [{
+        "name": "Shanmugar",
+        "price": 389.99,
+        "tax": 18.4,
+        "image": [{"url": "https://instagram.com/", "name": "Instagram"},
+                  {"url": "https://instagram.com/", "name": "Instagram again"}],
+    }],
+}
+
+
+def test_plain_models_do_not_use_the_cache():
+    url_cache.clear()
+    ModImage.model_validate({"url": "https://instagram.com/", "name": "Instagram"})
+    client.post("/order/", json=OFFER)
+    assert (url_cache.hits, url_cache.misses) == (0, 0)
+
+
+def test_cached_offer_gives_the_same_response():
+    url_cache.clear()
+    expected = client.post("/order/", json=OFFER).json()
+    assert client.post("/order/cached/", json=OFFER).json() == expected
+    assert (url_cache.hits, url_cache.misses) == (1, 1)
+
+
+def test_invalid_urls_are_rejected_every_time():
+    url_cache.clear()
+    offer = {**OFFER, "items": [{**OFFER["items"][0], "image": [{"url": "not a url", "name": "broken"}]}]}
+    for _ in range(2):
+        response = client.post("/order/cached/", json=offer)
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "items", 0, "image", 0, "url"]
+    assert url_cache.urls == {}
+
+
+def test_least_recently_used_url_is_evicted():
+    cache = UrlCache(maxsize=2)
+    handler = TypeAdapter(HttpUrl).validate_python
+    for url in ("https://a.com/", "https://b.com/", "https://a.com/", "https://c.com/"):
+        cache(url, handler)
+    assert list(cache.urls) == ["https://a.com/", "https://c.com/"]
+
+
+def test_concurrent_hits_and_evictions():
+    cache = UrlCache(maxsize=8)
+    handler = TypeAdapter(HttpUrl).validate_python
+    errors = []
+
+    def validate():
+        try:
+            for number in range(2000):
+                url = f"https://site{number % 16}.example.com/"
+                assert str(cache(url, handler)) == url
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=validate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache.urls) <= 8
+    assert cache.hits + cache.misses == 8000
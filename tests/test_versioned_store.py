@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from versioned_store import VersionedStore, not_modified
+
+
+def test_snapshots_are_read_only_and_kept():
+    store = VersionedStore({"Murugan": {"name": "Murugan", "tags": ["Kandha"]}})
+    before = store.snapshot("Murugan")
+    with pytest.raises(TypeError):
+        before.data["name"] = "Kumaran"
+    assert before.data["tags"] == ("Kandha",)
+    after = store.update("Murugan", {"price": 1})
+    assert before.data == {"name": "Murugan", "tags": ("Kandha",)}
+    assert after.data["tags"] is before.data["tags"]
+    assert after.version > before.version and after.etag != before.etag
+
+
+def test_if_match():
+    store = VersionedStore({"Murugan": {"name": "Murugan"}})
+    etag = store.snapshot("Murugan").etag
+    store.put("Murugan", {"name": "Kumaran"}, if_match=etag)
+    for if_match in (etag, f"W/{etag}"):
+        with pytest.raises(HTTPException) as exc_info:
+            store.update("Murugan", {"name": "Senthil"}, if_match=if_match)
+        assert exc_info.value.status_code == 412
+    store.update("Murugan", {"name": "Senthil"}, if_match="*")
+    with pytest.raises(HTTPException):
+        store.put("Valli", {"name": "Valli"}, if_match="*")
+    with pytest.raises(KeyError):
+        store.update("Valli", {"name": "Valli"})
+
+
+def test_not_modified():
+    snapshot = VersionedStore({"Murugan": {}}).snapshot("Murugan")
+    assert not_modified(snapshot, snapshot.etag)
+    assert not_modified(snapshot, f'"0", W/{snapshot.etag}')
+    assert not_modified(snapshot, "*")
+    assert not not_modified(snapshot, '"0"')
+    assert not not_modified(snapshot, None)
+
+
+def test_concurrent_conditional_writes_one_wins():
+    store = VersionedStore({"Murugan": {"price": 0}})
+    etag = store.snapshot("Murugan").etag
+    barrier = threading.Barrier(8)
+    won = []
+
+    def write(price):
+        barrier.wait()
+        try:
+            store.update("Murugan", {"price": price}, if_match=etag)
+            won.append(price)
+        except HTTPException:
+            pass
+
+    threads = [threading.Thread(target=write, args=(price,)) for price in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(won) == 1
+    assert store["Murugan"]["price"] == won[0]
+
+
+def test_body_updates_etags():
+    from body_updates import app
+
+    client = TestClient(app)
+    response = client.get("/details/Shanmugar")
+    etag = response.headers["etag"]
+    assert response.json()["tags"] == ["Shanmugar", "JayanthiNathar", "Thirucheeralaivai Murugan"]
+    cached = client.get("/details/Shanmugar", headers={"If-None-Match": etag})
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", etag)
+    assert client.get("/details/Valli").status_code == 404
+
+    item = {"name": "Deivanai", "price": 6.6}
+    created = client.put("/conversions/Deivanai", json=item)
+    assert created.json() == {**item, "description": None, "tax": None, "tags": []}
+    stale = created.headers["etag"]
+    assert client.put("/conversions/Deivanai", json=item, headers={"If-Match": stale}).status_code == 200
+    assert client.put("/conversions/Deivanai", json=item, headers={"If-Match": stale}).status_code == 412
@@ -0,0 +1,72 @@
+"""Tutorial modules¶
+Helpers shared by the gateway and the other tools that work across all the tutorial modules.
+
+A tutorial module is any .py file in this directory that declares a top-level `app = FastAPI()`.
+They are found by parsing the source, so listing them doesn't import (and build) anything."""
+
+import ast
+import importlib
+import importlib.util
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+
+from fastapi import FastAPI
+
+TUTORIALS_DIR = Path(__file__).resolve().parent
+
+
+def _declares_app(path: Path) -> bool:
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(target, ast.Name) and target.id == "app" for target in node.targets)
+            and isinstance(node.value, ast.Call)
+            and isinstance(node.value.func, ast.Name)
+            and node.value.func.id == "FastAPI"
+        ):
+            return True
+    return False
+
+
+def tutorial_paths(directory: Path = TUTORIALS_DIR) -> list[Path]:
+    """Return the files of every tutorial module, sorted by name."""
+    return [path for path in sorted(directory.glob("*.py")) if _declares_app(path)]
+
+
+def import_tutorial(path: Path, namespace: dict | None = None):
+    """Import a tutorial module from its file, including the ones whose file name
+    is not a valid Python identifier (e.g. sub-dependencies.py).
+
+    The names in namespace are set in the module before its code runs (e.g. its own __builtins__)."""
+    name = path.stem
+    if name in sys.modules:
+        return sys.modules[name]
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    if name.isidentifier() and namespace is None:
+        return importlib.import_module(name)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(namespace or {})
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def load_tutorial_apps(directory: Path = TUTORIALS_DIR, names: Iterable[str] | None = None) -> dict[str, FastAPI]:
+    """Return {module name: app} for every tutorial module, or only for the given ones (only those
+    are imported)."""
+    paths = tutorial_paths(directory)
+    if names is not None:
+        by_name = {path.stem: path for path in paths}
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ValueError(f"Not tutorial modules: {', '.join(unknown)}")
+        paths = [by_name[name] for name in names]
+    return {path.stem: import_tutorial(path).app for path in paths}
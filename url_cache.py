@@ -0,0 +1,124 @@
+"""Cached URL Validation¶
+Validating an HttpUrl (like ModImage.url in body_nested_models.py) means parsing the URL and building a new
+URL object, every time. When the same few hundred URLs come back in every request, that's the same work
+again and again.
+
+CachedHttpUrl is an HttpUrl whose validation goes through a bounded LRU cache, keyed by the raw string. URL
+objects are immutable, so the cached one can be returned as is. Only valid URLs are cached: an invalid one
+is validated (and rejected) every time, with the usual error.
+
+The cache is shared by the whole process, and is thread-safe: hits (which move the URL to the end of the LRU)
+and insertions both take the lock. It's opt-in, per field:
+
+from url_cache import CachedHttpUrl
+
+class CachedTModImage(TModImage):
+    url: CachedHttpUrl
+
+(see CachedOffer and POST /order/cached/ in body_nested_models.py). Fields declared as HttpUrl aren't cached.
+
+The JSON Schema (and so the docs) is the same as with HttpUrl. url_cache.hits, url_cache.misses and
+url_cache.hit_rate() tell how well the cache works.
+
+Command to run the benchmark with the Offer payload of body_nested_models.py:
+python url_cache.py --benchmark"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Any
+
+from pydantic import HttpUrl, ValidatorFunctionWrapHandler, WrapValidator
+
+
+class UrlCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.urls: OrderedDict[str, Any] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, value: Any, handler: ValidatorFunctionWrapHandler) -> Any:
+        if type(value) is not str or not self.maxsize:
+            return handler(value)
+        urls = self.urls
+        with self.lock:
+            url = urls.get(value)
+            if url is not None:
+                self.hits += 1
+                urls.move_to_end(value)
+                return url
+        url = handler(value)
+        with self.lock:
+            self.misses += 1
+            urls[value] = url
+            if len(urls) > self.maxsize:
+                urls.popitem(last=False)
+        return url
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.urls.clear()
+            self.hits = self.misses = 0
+
+
+url_cache = UrlCache()
+
+CachedHttpUrl = Annotated[HttpUrl, WrapValidator(url_cache)]
+
+
+"""Benchmark¶
+Validates an Offer and a CachedOffer (see body_nested_models.py) with thousands of items, whose images use a
+few hundred distinct URLs."""
+
+
+def offer_payload(items: int = 5000, distinct_urls: int = 300) -> bytes:
+    import json
+
+    urls = [f"https://site{number}.example.com/images/{number}.png" for number in range(distinct_urls)]
+    return json.dumps({
+        "name": "SevalKodiVeeran",
+        "description": "Yaamiruka Bayam Yen",
+        "items": [
+            {
+                "name": f"Item {number}",
+                "description": "Murugar Padai Veedu",
+                "price": 389.99,
+                "tax": 18.4,
+                "tags": ["Velan", "Senthuran", "Rawoothar"],
+                "image": [{"url": urls[(number * 4 + image) % distinct_urls], "name": "Image"} for image in range(4)],
+            }
+            for number in range(items)
+        ],
+    }).encode("utf-8")
+
+
+def benchmark_offer(items: int = 5000, distinct_urls: int = 300, rounds: int = 5) -> dict:
+    from body_nested_models import CachedOffer, Offer
+    # The cache used by body_nested_models (this file may be running as __main__)
+    from url_cache import url_cache
+
+    payload = offer_payload(items, distinct_urls)
+    url_cache.clear()
+    results = {}
+    for name, model in (("uncached", Offer), ("cached", CachedOffer)):
+        model.model_validate_json(payload)  # warm up
+        start = time.perf_counter()
+        for _ in range(rounds):
+            model.model_validate_json(payload)
+        results[name] = (time.perf_counter() - start) / rounds * 1000
+    results["hit_rate"] = url_cache.hit_rate()
+    return results
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    results = benchmark_offer()
+    print("Offer with 5000 items, 20000 URLs (300 distinct)")
+    print(f"uncached: {results['uncached']:.1f} ms")
+    print(f"cached:   {results['cached']:.1f} ms (hit rate {results['hit_rate']:.1%})")
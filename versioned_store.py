@@ -0,0 +1,120 @@
+"""Versioned Store¶
+The path operations of body_updates.py read and overwrite the things dict directly: two clients updating the
+same item at the same time silently overwrite each other's changes, and a client that already has an item gets
+all of it again on every GET.
+
+VersionedStore keeps each record as an immutable Snapshot, with a version and a strong ETag. A write never
+changes a snapshot: it builds a new one (copy-on-write, sharing the unchanged values with the previous one)
+and swaps it in, under a lock. Readers just take the current snapshot, without any lock, and it stays the
+same for as long as they use it, whatever the writers do meanwhile.
+
+things = VersionedStore({"Murugan": {"name": "Murugan", "price": 666666}})
+
+@app.get("/details/{id}", response_model=Items)
+async def updates(id: str, response: Response, if_none_match: Annotated[str | None, Header()] = None):
+    snapshot = things.snapshot(id)
+    if not_modified(snapshot, if_none_match):
+        return Response(status_code=304, headers={"ETag": snapshot.etag})
+    response.headers["ETag"] = snapshot.etag
+    return snapshot.data
+
+GET answers If-None-Match with a 304 (no body) when the client has the current version. Writes take the
+If-Match header: when it doesn't match the current ETag, the write is refused with a 412, and the client
+knows it has to read the item again (optimistic concurrency). Without If-Match, the write always happens.
+
+Snapshots are read-only: dicts are MappingProxyType and lists are tuples. snapshot.data can be returned from
+a path operation as is."""
+
+import itertools
+import threading
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from fastapi import HTTPException
+
+
+def freeze(value: Any) -> Any:
+    """A read-only copy of JSON-compatible data."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    version: int
+    data: Mapping[str, Any]
+
+    @property
+    def etag(self) -> str:
+        # Versions are unique in the store, so the same ETag always means the same data.
+        return f'"{self.version}"'
+
+
+def _etags(header: str) -> list[str]:
+    return [etag.strip() for etag in header.split(",") if etag.strip()]
+
+
+def not_modified(snapshot: Snapshot, if_none_match: str | None) -> bool:
+    """Whether a GET with this If-None-Match header gets a 304 (weak comparison)."""
+    if snapshot is None or not if_none_match:
+        return False
+    etags = _etags(if_none_match)
+    return "*" in etags or snapshot.etag in [etag.removeprefix("W/") for etag in etags]
+
+
+def _check_match(snapshot: Snapshot | None, if_match: str | None) -> None:
+    # Strong comparison: a weak ETag never matches.
+    if if_match is None:
+        return
+    etags = _etags(if_match)
+    if snapshot is None or ("*" not in etags and snapshot.etag not in etags):
+        raise HTTPException(status_code=412, detail="The item has changed, read it again")
+
+
+class VersionedStore(Mapping[str, Mapping[str, Any]]):
+    def __init__(self, records: Mapping[str, Mapping[str, Any]] = {}):
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, Snapshot] = {key: Snapshot(next(self._versions), freeze(data)) for key, data in records.items()}
+
+    def snapshot(self, key: str) -> Snapshot | None:
+        return self._snapshots.get(key)
+
+    def __getitem__(self, key: str) -> Mapping[str, Any]:
+        return self._snapshots[key].data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._snapshots))
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def __setitem__(self, key: str, data: Mapping[str, Any]) -> None:
+        # things[key] = data, like with a dict: put() without If-Match.
+        self.put(key, data)
+
+    def put(self, key: str, data: Mapping[str, Any], if_match: str | None = None) -> Snapshot:
+        """Replace (or create) a record."""
+        data = freeze(data)
+        with self._lock:
+            _check_match(self._snapshots.get(key), if_match)
+            snapshot = self._snapshots[key] = Snapshot(next(self._versions), data)
+        return snapshot
+
+    def update(self, key: str, changes: Mapping[str, Any], if_match: str | None = None) -> Snapshot:
+        """Change some fields of a record. The other values are shared with the previous snapshot, not copied.
+
+        Raises KeyError when there's no such record (and no If-Match)."""
+        changes = {name: freeze(value) for name, value in changes.items()}
+        with self._lock:
+            current = self._snapshots.get(key)
+            _check_match(current, if_match)
+            if current is None:
+                raise KeyError(key)
+            snapshot = self._snapshots[key] = Snapshot(next(self._versions), MappingProxyType({**current.data, **changes}))
+        return snapshot